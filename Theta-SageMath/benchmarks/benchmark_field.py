@@ -0,0 +1,59 @@
+"""
+Time the arithmetic of every available implementation of GF(p^2) and show
+which one `select_fp2_implementation()` picks, for the primes of `DIAMONDS`
+and for random primes p = 3 mod 4 of the sizes given with `--bits`. The choice
+is only used by `fp2_field()` after `set_fp2_implementation()`.
+
+For each implementation the time of a multiplication, squaring, inversion,
+square root and exponentiation is printed in nanoseconds and relative to the
+cost of a multiplication, which can be compared with the costs documented in
+the docstrings and used by `utilities/strategy.py`.
+
+Run from the root of the project with:
+
+    sage -python benchmarks/benchmark_field.py --bits 254 381 1293
+"""
+
+import argparse
+import sys
+
+from sage.all import ZZ, random_prime
+
+from isogeny_diamond import DIAMONDS
+from utilities.field_backend import select_fp2_implementation
+from utilities.utils import speed_up_sagemath
+
+
+def diamond_prime(test_index):
+    f, ea, eb, _, _ = DIAMONDS[test_index]
+    return f * 4 * ZZ(2**ea) * ZZ(3**eb) - 1
+
+
+def random_prime_3_mod_4(bits):
+    while True:
+        p = random_prime(2**bits, lbound=2 ** (bits - 1))
+        if p % 4 == 3:
+            return p
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--bits", type=int, nargs="*", default=[], help="sizes of random primes"
+    )
+    parser.add_argument(
+        "--no-diamonds", action="store_true", help="skip the primes of DIAMONDS"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    speed_up_sagemath()
+
+    primes = [] if args.no_diamonds else [diamond_prime(i) for i in range(len(DIAMONDS))]
+    primes += [random_prime_3_mod_4(bits) for bits in args.bits]
+
+    for p in primes:
+        select_fp2_implementation(p, verbose=True)
+        print()
@@ -0,0 +1,98 @@
+"""
+Measure the cold-start cost of importing the package and guard against
+regressions which pull in the whole of `sage.all` at import time.
+
+Each import is timed in a fresh interpreter. The script exits with a non-zero
+status if importing the package loads `sage.all`, loads the Richelot or
+Montgomery modules eagerly, or takes more than `MAX_RATIO` of the time taken to
+import `sage.all` itself.
+
+Run from the root of the project with:
+
+    sage -python benchmarks/benchmark_import.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a short-lived worker needs to compute a (2^n, 2^n)-isogeny
+PACKAGE_IMPORT = "; ".join(
+    [
+        "import theta_structures.couple_point",
+        "import theta_isogenies.product_isogeny",
+        "import theta_isogenies.product_isogeny_sqrt",
+        "import utilities.supersingular",
+        "import isogeny_diamond",
+    ]
+)
+
+# Modules which should only be loaded when they are used
+LAZY_MODULES = [
+    "sage.all",
+    "richelot_isogenies.richelot_isogenies",
+    "montgomery_isogenies.isogenies_x_only",
+    "montgomery_isogenies.kummer_isogeny",
+]
+
+# The package import must be at least this much faster than sage.all
+MAX_RATIO = 0.5
+
+
+def time_import(statement, repeats=5):
+    """
+    Median wall-clock time in seconds to run `statement` in a new interpreter
+    """
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings)
+
+
+def eagerly_loaded_modules():
+    """
+    Return the modules from LAZY_MODULES which are loaded by PACKAGE_IMPORT
+    """
+    statement = (
+        f"{PACKAGE_IMPORT}; import sys; "
+        f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return output.stdout.split()
+
+
+if __name__ == "__main__":
+    baseline = time_import("pass")
+    sage_all = time_import("import sage.all")
+    package = time_import(PACKAGE_IMPORT)
+
+    print(f"Python interpreter startup took: {1000 * baseline:.2f} ms")
+    print(f"Importing sage.all took: {1000 * sage_all:.2f} ms")
+    print(f"Importing the package took: {1000 * package:.2f} ms")
+
+    failed = False
+
+    loaded = eagerly_loaded_modules()
+    if loaded:
+        print(f"FAIL: modules loaded at import time: {', '.join(loaded)}")
+        failed = True
+
+    ratio = (package - baseline) / (sage_all - baseline)
+    print(f"Package import costs {100 * ratio:.1f}% of sage.all")
+    if ratio > MAX_RATIO:
+        print(f"FAIL: package import is above {100 * MAX_RATIO:.0f}% of sage.all")
+        failed = True
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,427 @@
+"""
+Count the field operations of the theta, Kummer and Mumford code with
+`utilities/operation_count.py`. Unlike timings, these counts are deterministic
+and independent of the hardware, so they can be tracked in CI.
+
+The script reports:
+
+- For each formula with a "Cost:" line in its docstring, the measured count
+  against the documented cost, computed on random inputs.
+- For the (2^n, 2^n)-isogeny chain in the theta model, the operations in each
+  phase of the chain (as in `benchmark_regression.py`) and the average cost of
+  a single doubling and image.
+- The number of doublings and images in the strategy, and the cost predicted
+  from `THETA_LEFT_COST` and `THETA_RIGHT_COST` against the measured cost.
+
+Arithmetic on the elliptic curves, such as the doublings on E1 x E2 before the
+gluing, is done by SageMath and is not counted. The script exits with a
+non-zero status if a measured count differs from a documented one.
+
+Run from the root of the project with:
+
+    sage -python benchmarks/benchmark_operation_count.py [--output counts.json]
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+
+from sage.all import set_random_seed
+
+from isogeny_diamond import DIAMONDS
+from diamond_fixtures import diamond_field, load_splitting_kernel
+from theta_structures.couple_point import CouplePoint
+from theta_structures.dimension_two import ThetaStructure, ThetaPoint
+from theta_structures.split_structure import SplitThetaStructure
+from theta_isogenies.gluing_isogeny import GluingThetaIsogeny
+from theta_isogenies.product_isogeny import EllipticProductIsogeny
+from montgomery_isogenies.kummer_line import KummerPoint
+from richelot_isogenies import divisor_arithmetic as da
+from richelot_isogenies.richelot_isogenies import (
+    _poly_mul,
+    _third_quadratic,
+    _delta_cofactors,
+)
+from utilities.polynomial_inversion import _quartic_inverse_system
+from utilities.strategy import (
+    optimised_strategy,
+    strategy_moves,
+    THETA_LEFT_COST,
+    THETA_RIGHT_COST,
+)
+from utilities.operation_count import (
+    OperationCounter,
+    documented_cost,
+    format_cost,
+    unwrap,
+)
+from utilities.utils import speed_up_sagemath
+
+from benchmark_regression import KIND_PHASES, PhaseTracer
+
+# Operations compared against the documented costs, additions
+# are only compared when the docstring includes them
+COMPARED_OPERATIONS = ("M", "S", "I", "sqrt", "exp")
+
+# ============================== #
+#  Documented costs of formulas  #
+# ============================== #
+
+
+def formula_cases(F, counter):
+    """
+    Pairs (f, run) where f is a function with a documented cost and
+    run() computes f on random, counted inputs
+    """
+
+    def r(k):
+        return counter.wrap([F.random_element() for _ in range(k)])
+
+    def theta_point(O=None):
+        # The counts do not depend on the coordinates being valid
+        if O is None:
+            O = ThetaStructure(r(4))
+            O._arithmetic_precomputation()
+        return ThetaPoint(O, r(4))
+
+    def compact(u1, u0, v1, v0):
+        return u1, u0, v1, v0, u1 * u1, u1 * u0
+
+    def theta_double():
+        P = theta_point()
+        return lambda: P.double()
+
+    def theta_diff_addition():
+        P = theta_point()
+        Q, PQ = theta_point(P.parent()), theta_point(P.parent())
+        return lambda: ThetaPoint.diff_addition(P, Q, PQ)
+
+    def kummer(f, k):
+        def setup():
+            args = r(k)
+            return lambda: f(*args)
+
+        return setup
+
+    def add_generic_compact():
+        D1, D2, f = compact(*r(4)), compact(*r(4)), r(3)
+        return lambda: da._add_generic_compact(*D1, *D2, *f)
+
+    def dbl_generic(f):
+        def setup():
+            u1, u0, v1, v0, U1, U0 = compact(*r(4))
+            fs = r(5)
+            return lambda: f(u1, u0, v1, v0, U0, U1, *fs)
+
+        return setup
+
+    def dbl_generic_finish():
+        u1, u0, v1, v0, U1, U0 = compact(*r(4))
+        fs = r(5)
+        precomp, to_invert = da._dbl_divisor_generic_precomp(
+            u1, u0, v1, v0, U0, U1, *fs
+        )
+        C = 1 / to_invert
+        return lambda: da._dbl_divisor_generic_finish(precomp, C, fs[2], fs[3])
+
+    def dbl_projective():
+        D, fs = r(5), r(5)
+        return lambda: da._dbl_divisor_projective(D, *fs)
+
+    def add_projective():
+        D, Dd, fs = r(5), r(5), r(3)
+        return lambda: da._add_divisor_projective(D, Dd, *fs)
+
+    def projective_finish():
+        L, D, Dd, fs = r(3), r(5), r(5), r(3)
+        return lambda: da._projective_finish(*L, D, Dd, *fs)
+
+    def quartic_inverse_system():
+        f, g = r(4), r(4)
+        return lambda: _quartic_inverse_system(f, g)
+
+    def third_quadratic():
+        # h must be divisible by G1 * G2
+        G1, G2, G3 = ([*r(2), F.one()] for _ in range(3))
+        h = counter.wrap(_poly_mul(_poly_mul(unwrap(G1), unwrap(G2)), unwrap(G3)))
+        return lambda: _third_quadratic(h, G1, G2)
+
+    def delta_cofactors():
+        G = [r(3) for _ in range(3)]
+        return lambda: _delta_cofactors(*G)
+
+    return [
+        (ThetaPoint.double, theta_double),
+        (ThetaPoint.diff_addition, theta_diff_addition),
+        (KummerPoint.xDBL, kummer(KummerPoint.xDBL, 4)),
+        (KummerPoint.xTPL, kummer(KummerPoint.xTPL, 4)),
+        (KummerPoint.xADD, kummer(KummerPoint.xADD, 6)),
+        (KummerPoint.xDBLADD, kummer(KummerPoint.xDBLADD, 8)),
+        (da._add_generic_compact, add_generic_compact),
+        (da._dbl_divisor_generic, dbl_generic(da._dbl_divisor_generic)),
+        (da._dbl_divisor_generic_precomp, dbl_generic(da._dbl_divisor_generic_precomp)),
+        (da._dbl_divisor_generic_finish, dbl_generic_finish),
+        (da._dbl_divisor_projective, dbl_projective),
+        (da._add_divisor_projective, add_projective),
+        (da._projective_finish, projective_finish),
+        (_quartic_inverse_system, quartic_inverse_system),
+        (_third_quadratic, third_quadratic),
+        (_delta_cofactors, delta_cofactors),
+    ]
+
+
+def compare_costs(documented, measured):
+    """
+    Whether the measured count agrees with the documented cost, only
+    comparing additions when they are documented
+    """
+    operations = COMPARED_OPERATIONS + (("a",) if documented["a"] else ())
+    return all(documented[op] == measured[op] for op in operations)
+
+
+def check_documented_costs(F, counter):
+    """
+    Measure each formula with a documented cost, returns a list of
+    (name, documented, measured, agrees)
+    """
+    results = []
+    for f, setup in formula_cases(F, counter):
+        documented = documented_cost(f)
+        run = setup()
+        with counter.measure() as measured:
+            run()
+        name = f"{f.__module__}.{f.__qualname__}"
+        agrees = documented is not None and compare_costs(documented, measured)
+        results.append((name, documented, measured, agrees))
+    return results
+
+
+# ========================== #
+#  Counting the theta chain  #
+# ========================== #
+
+
+class PhaseCounter(PhaseTracer):
+    """
+    Tracer which counts the field operations of an isogeny chain in the
+    theta model, attributing them to the phases of `KIND_PHASES` and
+    recording the number of doublings and images in each phase.
+
+    Within the context, operations are recorded as "pending" and moved to
+    the phase of each step when the chain reports it. Images from the
+    elliptic product are much more expensive, so they are reported as
+    "gluing_images", separately from the rest of the images.
+
+    The theta coordinates are wrapped as they leave the elliptic product in
+    `GluingThetaIsogeny.base_change()` and unwrapped again when they reach the
+    `SplitThetaStructure`, so everything in between is counted. Doublings on
+    E1 x E2 are done by SageMath and are not counted.
+    """
+
+    def __init__(self, counter, n, strategy):
+        self.counter = counter
+        self.calls = Counter()
+        self._strategy = iter(strategy)
+        self._originals = []
+        self._step = None
+        super().__init__(n)
+
+    def __call__(self, index, kind, elapsed, depth):
+        super().__call__(index, kind, elapsed, depth)
+        counts = self.counter.by_step.pop("pending", Counter())
+        phase = KIND_PHASES.get(self.relabel(index, kind), "other")
+
+        # The doublings before the gluing are on E1 x E2
+        if phase == "doubling":
+            doublings = next(self._strategy)
+            if index == 0:
+                return
+            self.calls[phase] += 2 * doublings
+        elif phase == "images":
+            # The pairs of kernel points left after the step are pushed
+            phase = "gluing_images" if index == 0 else phase
+            self.calls[phase] += 2 * depth
+        else:
+            self.calls[phase] += 1
+        self.counter.by_step[phase] += counts
+
+    def _patch(self, cls, name, method):
+        self._originals.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, method)
+
+    def __enter__(self):
+        counter = self.counter
+        base_change = GluingThetaIsogeny.__dict__["base_change"]
+        split_init = SplitThetaStructure.__dict__["__init__"]
+
+        def counted_base_change(gluing, P):
+            return counter.wrap(base_change(gluing, P))
+
+        def uncounted_split_init(split, T):
+            split_init(split, ThetaStructure(unwrap(T.coords())))
+
+        self._patch(GluingThetaIsogeny, "base_change", counted_base_change)
+        self._patch(SplitThetaStructure, "__init__", uncounted_split_init)
+        self._step = counter.step("pending")
+        self._step.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._step.__exit__(*exc)
+        for cls, name, method in reversed(self._originals):
+            setattr(cls, name, method)
+        self._originals = []
+
+
+def count_theta_chain(kernel, n, strategy):
+    """
+    Count the operations of the chain, returns the `OperationCounter`, with
+    the operations of each phase in `by_step`, and the number of doublings
+    and images in each phase (the number of steps for the other phases)
+    """
+    P1, Q1, P2, Q2 = kernel
+    ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+
+    counter = OperationCounter()
+    with counter.hooks(), PhaseCounter(counter, n, strategy) as phases:
+        EllipticProductIsogeny(ker_Phi, n, strategy=strategy, tracer=phases)
+
+    # Bookkeeping outside of the traced steps, such as the splitting
+    # isomorphism
+    if counter.by_step.get("pending"):
+        counter.by_step["other"] += counter.by_step.pop("pending")
+        phases.calls["other"] += 1
+
+    return counter, phases.calls
+
+
+def strategy_operations(strategy, n):
+    """
+    Count the doublings and images of pairs of kernel points of the strategy
+    on the leftmost edge (on E1 x E2, or images from it) and in the rest of
+    the tree
+    """
+    counts = Counter()
+    for direction, _, count, leftmost in strategy_moves(strategy, n):
+        if direction == "left":
+            counts["left_doubling" if leftmost else "doubling"] += count
+        else:
+            counts["first_image" if leftmost else "image"] += count
+    return counts
+
+
+def predicted_cost(counts, left_cost=THETA_LEFT_COST, right_cost=THETA_RIGHT_COST):
+    """
+    The cost of the strategy with operation counts from `strategy_operations()`
+    """
+    return (
+        counts["doubling"] * left_cost[0]
+        + counts["left_doubling"] * left_cost[1]
+        + counts["image"] * right_cost[0]
+        + counts["first_image"] * right_cost[1]
+    )
+
+
+# ========= #
+#  Output   #
+# ========= #
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--index", type=int, default=0, help="DIAMONDS index used for the chain"
+    )
+    parser.add_argument(
+        "--functions", type=int, default=10, help="number of functions to print"
+    )
+    parser.add_argument("--output", help="write the counts as JSON to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    speed_up_sagemath()
+    set_random_seed(0)
+
+    F = diamond_field(args.index)
+
+    print("Documented costs:")
+    formulas = check_documented_costs(F, OperationCounter())
+    for name, documented, measured, agrees in formulas:
+        status = "ok" if agrees else "MISMATCH"
+        documented = "unknown" if documented is None else format_cost(documented)
+        print(f"  {status:>8} {name}: documented {documented}, measured {format_cost(measured)}")
+
+    _, ea, _, _, _ = DIAMONDS[args.index]
+    strategy = optimised_strategy(ea)
+    kernel, _ = load_splitting_kernel(args.index)
+    counter, calls = count_theta_chain(kernel, ea, strategy)
+    phases = counter.by_step
+
+    print(f"\nTheta chain for DIAMONDS[{args.index}] of length {ea}:")
+    for phase, counts in phases.items():
+        per_call = Counter({op: c / calls[phase] for op, c in counts.items()})
+        print(
+            f"  {phase:>10}: {format_cost(counts)} in {calls[phase]} calls, "
+            f"{' '.join(f'{c:.1f}{op}' for op, c in per_call.items())} per call"
+        )
+    print(f"  {'total':>10}: {format_cost(counter.total)}")
+
+    print("\nFunctions with the most multiplications and squarings:")
+    functions = sorted(
+        counter.by_function.items(), key=lambda fc: -(fc[1]["M"] + fc[1]["S"])
+    )
+    for name, counts in functions[: args.functions]:
+        print(f"  {name}: {format_cost(counts)}")
+
+    operations = strategy_operations(strategy, ea)
+    print(f"\nStrategy for a chain of length {ea}:")
+    print(
+        f"  {operations['left_doubling']} doublings on E1 x E2 (not counted), "
+        f"{operations['doubling']} doublings after the gluing"
+    )
+    print(
+        f"  {operations['first_image']} gluing images, "
+        f"{operations['image']} images after the gluing"
+    )
+    print(f"  predicted cost: {predicted_cost(operations)}")
+
+    # Compare the relative cost of a doubling and an image after the
+    # gluing with the strategy
+    measured_dbl = sum(phases["doubling"].values()) / calls["doubling"]
+    measured_img = sum(phases["images"].values()) / calls["images"]
+    print(
+        f"  doubling / image: measured {measured_dbl / measured_img:.2f} field operations, "
+        f"strategy {THETA_LEFT_COST[0] / THETA_RIGHT_COST[0]:.2f}"
+    )
+
+    if args.output:
+        output = {
+            "formulas": {
+                name: {
+                    "documented": None if documented is None else dict(documented),
+                    "measured": dict(measured),
+                    "agrees": agrees,
+                }
+                for name, documented, measured, agrees in formulas
+            },
+            "chain": {
+                "index": args.index,
+                "n": ea,
+                "phases": {phase: dict(counts) for phase, counts in phases.items()},
+                "functions": {
+                    name: dict(counts) for name, counts in counter.by_function.items()
+                },
+                "calls": dict(calls),
+                "strategy": dict(operations),
+                "predicted_cost": predicted_cost(operations),
+            },
+        }
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"\nCounts written to {args.output}")
+
+    if not all(agrees for *_, agrees in formulas):
+        sys.exit(1)
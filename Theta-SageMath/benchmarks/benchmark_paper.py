@@ -1,11 +1,14 @@
-from sage.all import ZZ, GF, EllipticCurve
-from isogeny_diamond import generate_splitting_kernel, DIAMONDS
+from sage.all import ZZ, EllipticCurve
+from isogeny_diamond import DIAMONDS, generate_dual_kernel
+from diamond_fixtures import load_splitting_kernel
 from theta_structures.couple_point import CouplePoint
+from theta_isogenies.composed_isogeny import ComposedProductIsogeny
 from theta_isogenies.product_isogeny import EllipticProductIsogeny
 from theta_isogenies.product_isogeny_sqrt import EllipticProductIsogenySqrt
 from utilities.supersingular import torsion_basis, fix_torsion_basis_renes
-from utilities.strategy import optimised_strategy_old, optimised_strategy
+from utilities.strategy import optimised_strategy, optimised_strategy_richelot
 from utilities.utils import speed_up_sagemath
+from utilities.field_backend import fp2_field
 
 from richelot_isogenies.richelot_isogenies import (
     compute_richelot_chain,
@@ -24,11 +27,11 @@ speed_up_sagemath()
 def time_theta(test_index, test_N=1):
     """
     Selects a kernel generating an isogeny between elliptic products from
-    `isogeny_diamond.py` using `generate_splitting_kernel()` and times
+    `diamond_fixtures.py` using `load_splitting_kernel()` and times
     the average computation time of codomain and evaluation time for the
     isogeny chain in the theta model.
     """
-    (P1, Q1, P2, Q2), _ = generate_splitting_kernel(test_index)
+    (P1, Q1, P2, Q2), _ = load_splitting_kernel(test_index)
 
     # Create kernel from CouplePoint data
     ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
@@ -58,14 +61,52 @@ def time_theta(test_index, test_N=1):
     )
 
 
+def time_composed(test_index, test_N=1):
+    """
+    Selects a kernel generating an isogeny Phi between elliptic products from
+    `diamond_fixtures.py` and its dual, and times the average evaluation of
+    the composition of the two isogeny chains, one after the other and with
+    `ComposedProductIsogeny`, which skips the splitting and gluing between
+    them.
+    """
+    (P1, Q1, P2, Q2), _ = load_splitting_kernel(test_index)
+    ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+    EA, EB = ker_Phi[0].curves()
+
+    _, ea, eb, _, _ = DIAMONDS[test_index]
+    PB3, _ = torsion_basis(EB, 3**eb)
+
+    strategy = optimised_strategy(ea)
+    Phi = EllipticProductIsogeny(ker_Phi, ea, strategy=strategy)
+    Phi_dual = EllipticProductIsogeny(
+        generate_dual_kernel(Phi, (P1, Q1, P2, Q2)), ea, strategy=strategy
+    )
+    Phi_composed = ComposedProductIsogeny(Phi, Phi_dual)
+
+    L1 = CouplePoint(EA(0), PB3)
+    t0 = time.process_time_ns()
+    for _ in range(test_N):
+        _ = Phi_dual(Phi(L1))
+    print(
+        f"Theta Model two chains image took: {(time.process_time_ns() - t0) / (1_000_000 * test_N):.5f} ms"
+    )
+
+    t0 = time.process_time_ns()
+    for _ in range(test_N):
+        _ = Phi_composed(L1)
+    print(
+        f"Theta Model composed image took: {(time.process_time_ns() - t0) / (1_000_000 * test_N):.5f} ms"
+    )
+
+
 def time_theta_sqrt(test_index, test_N=1):
     """
     Selects a kernel generating an isogeny between elliptic products from
-    `isogeny_diamond.py` using `generate_splitting_kernel()` and times
+    `diamond_fixtures.py` using `load_splitting_kernel()` and times
     the average computation time of codomain and evaluation time for the
     isogeny chain in the theta model without additional torsion available.
     """
-    (P1, Q1, P2, Q2), _ = generate_splitting_kernel(test_index)
+    (P1, Q1, P2, Q2), _ = load_splitting_kernel(test_index)
 
     # Create kernel from CouplePoint data
     ker_Phi = (CouplePoint(4 * P1, 4 * P2), CouplePoint(4 * Q1, 4 * Q2))
@@ -98,11 +139,11 @@ def time_theta_sqrt(test_index, test_N=1):
 def time_mumford(test_index, test_N=1):
     """
     Selects a kernel generating an isogeny between elliptic products from
-    `isogeny_diamond.py` using `generate_splitting_kernel()` and times
+    `diamond_fixtures.py` using `load_splitting_kernel()` and times
     the average computation time of codomain and evaluation time for the
     isogeny chain in the  Mumford model.
     """
-    ker_Phi, (E0, _) = generate_splitting_kernel(test_index)
+    ker_Phi, (E0, _) = load_splitting_kernel(test_index)
     EA = ker_Phi[0].curve()
     EB = ker_Phi[2].curve()
 
@@ -116,7 +157,7 @@ def time_mumford(test_index, test_N=1):
     N1 = B
     N2 = C
     N_constant = F(N1 + N2) / F(N1 - N2)
-    strategy = optimised_strategy_old(ea - 1, mul_c=0.175)
+    strategy = optimised_strategy_richelot(ea - 1)
 
     # Compute the chain and make sure it splits
     (P1, Q1, P2, Q2) = ker_Phi
@@ -145,7 +186,7 @@ def time_dim_one(test_index, test_N=1):
     using x-only arithmetic
     """
     _, ea, eb, _, _ = DIAMONDS[test_index]
-    (P1, Q1, _, _), _ = generate_splitting_kernel(test_index)
+    (P1, Q1, _, _), _ = load_splitting_kernel(test_index)
 
     EA = P1.curve()
     P3, _ = torsion_basis(EA, 3**eb)
@@ -174,15 +215,16 @@ def time_dim_one(test_index, test_N=1):
     )
 
 
-def time_festa(test_N=100):
+def festa_data():
+    """
+    Data from the FESTA decryption routine: the kernel (P1, Q1, P2, Q2) of a
+    (2^b, 2^b)-isogeny between elliptic products, the chain length b, a pair
+    of points (L1_1, L1_2) to push through the isogeny and the constant used
+    to avoid a sqrt in the splitting of the Mumford model
     """
-    Takes data from the FESTA decryption routine and computes an isogeny between
-    elliptic products using both the Theta and Mumford models, and computes the
-    average computation time for the codmain and isogeny evaluation time."""
-
     # Finite field
     p = 0x176C11CF13E54B11406FCEC87BD4C1480F2BF6B3CF47C54370FEBD1C756E54F72C1501712922BAF5993402979D50DD13D09A841FED4773CFDB168F19A73E323F656921D7DCD797059B7B9AC3245C4D7BE6B343FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF
-    F = GF(p**2, name="z2", modulus=[1, 0, 1])
+    F = fp2_field(p, name="z2")
     z2 = F.gen()
 
     # Chain length
@@ -262,6 +304,22 @@ def time_festa(test_N=100):
         1,
     )
 
+    # Constant used to avoid a sqrt in Splitting
+    N1 = 192729671223345290055305446055954513499182494471785873649972414082519774713316809959561158425449734854278826918033567581235514748532869748214197303852542496769226727250863486372243704483921
+    N2 = 17629303991363354782761771138710808474364991361967901355174998358961523847195579231079160760783032295531042694853819585976142238069339934932460260976312356676090127469468921474888983608979375
+    N_constant = F(N1 + N2) / F(N1 - N2)
+
+    return (P1, Q1, P2, Q2), (L1_1, L1_2), b, N_constant
+
+
+def time_festa(test_N=100):
+    """
+    Takes data from the FESTA decryption routine and computes an isogeny between
+    elliptic products using both the Theta and Mumford models, and computes the
+    average computation time for the codmain and isogeny evaluation time."""
+
+    (P1, Q1, P2, Q2), (L1_1, L1_2), b, N_constant = festa_data()
+
     # Pack the kernel
     ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
 
@@ -307,9 +365,6 @@ def time_festa(test_N=100):
     )
 
     # Now compute the isogeny in the Mumford Model
-    N1 = 192729671223345290055305446055954513499182494471785873649972414082519774713316809959561158425449734854278826918033567581235514748532869748214197303852542496769226727250863486372243704483921
-    N2 = 17629303991363354782761771138710808474364991361967901355174998358961523847195579231079160760783032295531042694853819585976142238069339934932460260976312356676090127469468921474888983608979375
-    N_constant = F(N1 + N2) / F(N1 - N2)  # Constant used to avoid a sqrt in Splitting
     ker_Phi_scaled = (
         4 * P1,
         4 * Q1,
@@ -317,8 +372,7 @@ def time_festa(test_N=100):
         4 * Q2,
     )  # We do not need torsion about the kernel for the Mumford model.
 
-    # Naive strategy using the old formula
-    strategy_mumford = optimised_strategy_old(b - 1, mul_c=0.175)
+    strategy_mumford = optimised_strategy_richelot(b - 1)
 
     # Codomain time
     t0 = time.process_time_ns()
@@ -372,6 +426,7 @@ if __name__ == "__main__":
     print(f"Testing 254 bit prime, with a chain of length 126")
     time_theta(2, test_N=100)
     time_theta_sqrt(2, test_N=100)
+    time_composed(2, test_N=100)
     time_mumford(2, test_N=100)
     time_dim_one(2, test_N=100)
     print()
@@ -379,6 +434,7 @@ if __name__ == "__main__":
     print(f"Testing 381 bit prime, with a chain of length 208")
     time_theta(4, test_N=100)
     time_theta_sqrt(4, test_N=100)
+    time_composed(4, test_N=100)
     time_mumford(4, test_N=100)
     time_dim_one(4, test_N=100)
     print()
@@ -0,0 +1,412 @@
+"""
+Regression benchmarks for the (2^n, 2^n)-isogeny chain in the theta model.
+
+Unlike `benchmark_paper.py`, which prints the average time of a whole
+computation, every run of the chain is split into phases, using the steps
+reported to a `StatsTracer` (see `utilities/tracing.py`):
+
+- doubling: doubling the kernel points along the strategy
+- gluing: codomain of the gluing isogeny E1 x E2 -> A
+- middle: codomains of the generic (2,2)-isogenies
+- final: codomains of the last two steps (with sqrts for `_sqrt` cases)
+- splitting: the splitting isomorphism and the split theta structure
+- images: pushing the kernel points through each step
+- other: bookkeeping not covered by the above
+- evaluation: pushing a single point through the whole chain
+
+For each phase the median and spread (median absolute deviation, min and max)
+are reported in milliseconds over `--repeat` runs, for every entry of
+`DIAMONDS` and the FESTA data from `benchmark_paper.py`. With `--scaling`, the
+chain for the largest parameter set is also computed for shorter lengths n,
+with the same prime, and the time of each phase is fitted to c * n^k.
+
+Results can be written as JSON with `--output`. When a previous output is given
+with `--baseline`, the script exits with a non-zero status if the median of any
+phase is slower than the baseline by more than `--threshold`.
+
+Run from the root of the project with:
+
+    sage -python benchmarks/benchmark_regression.py --output bench.json
+    sage -python benchmarks/benchmark_regression.py --baseline bench.json
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from sage.all import ZZ
+
+from isogeny_diamond import DIAMONDS
+from diamond_fixtures import load_splitting_kernel
+from theta_structures.couple_point import CouplePoint
+from theta_isogenies.product_isogeny import EllipticProductIsogeny
+from theta_isogenies.product_isogeny_sqrt import EllipticProductIsogenySqrt
+from utilities.supersingular import torsion_basis
+from utilities.strategy import optimised_strategy
+from utilities.tracing import StatsTracer
+from utilities.utils import speed_up_sagemath
+
+from benchmark_paper import festa_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Phases of the computation of the chain, in the order they are reported
+CHAIN_PHASES = [
+    "doubling",
+    "gluing",
+    "middle",
+    "final",
+    "splitting",
+    "images",
+    "other",
+]
+PHASES = CHAIN_PHASES + ["total", "evaluation"]
+
+# Phases faster than this (in ms) are too noisy to compare against a baseline
+MIN_COMPARE_MS = 0.5
+
+# Shortest chain used when fitting the scaling in n
+MIN_SCALING_LENGTH = 8
+
+# ============================= #
+#  Timing of individual phases  #
+# ============================= #
+
+
+# Phase of each kind of step traced by `PhaseTracer`, the other
+# kinds of steps are counted in "other"
+KIND_PHASES = {
+    "doubling": "doubling",
+    "gluing": "gluing",
+    "middle": "middle",
+    "final": "final",
+    "splitting": "splitting",
+    "push": "images",
+}
+
+
+class PhaseTracer(StatsTracer):
+    """
+    A `StatsTracer` for a chain of length n which reports the codomains of
+    the generic (2,2)-isogenies as "middle" steps and the last two, which
+    switch to and from dual coordinates, as "final" steps
+    """
+
+    def __init__(self, n):
+        self.n = n
+        super().__init__()
+
+    def relabel(self, index, kind):
+        """
+        The kind under which the step is reported
+        """
+        if kind == "isogeny":
+            return "final" if index >= self.n - 2 else "middle"
+        return kind
+
+    def __call__(self, index, kind, elapsed, depth):
+        super().__call__(index, self.relabel(index, kind), elapsed, depth)
+
+
+def time_chain_phases(isogeny, kernel, n, strategy, point):
+    """
+    Compute the isogeny chain once and evaluate it on point, returning
+    the time spent in each phase in nanoseconds
+    """
+    tracer = PhaseTracer(n)
+    t0 = time.perf_counter_ns()
+    Phi = isogeny(kernel, n, strategy=strategy, tracer=tracer)
+    total = time.perf_counter_ns() - t0
+
+    timings = {phase: 0 for phase in CHAIN_PHASES}
+    for kind, stats in tracer.stats()["kinds"].items():
+        if kind in KIND_PHASES:
+            timings[KIND_PHASES[kind]] += round(stats["total"] * 1e9)
+    timings["other"] = total - sum(timings.values())
+    timings["total"] = total
+
+    t0 = time.perf_counter_ns()
+    Phi(point)
+    timings["evaluation"] = time.perf_counter_ns() - t0
+
+    return timings, Phi
+
+
+# ======================== #
+#  Statistics and fitting  #
+# ======================== #
+
+
+def summarise(samples):
+    """
+    Median and spread of a list of timings in nanoseconds, in milliseconds
+    """
+    samples = [s / 1_000_000 for s in samples]
+    median = statistics.median(samples)
+    return {
+        "median": median,
+        "mad": statistics.median(abs(s - median) for s in samples),
+        "min": min(samples),
+        "max": max(samples),
+        "runs": len(samples),
+    }
+
+
+def fit_power_law(lengths, timings):
+    """
+    Least squares fit of log(t) = log(c) + k log(n), returns (c, k)
+
+    Only positive timings can be fitted, and at least two distinct
+    lengths are needed.
+    """
+    points = [(math.log(n), math.log(t)) for n, t in zip(lengths, timings) if t > 0]
+    if len({x for x, _ in points}) < 2:
+        raise ValueError("At least two distinct chain lengths are needed for a fit")
+
+    x_mean = statistics.fmean(x for x, _ in points)
+    y_mean = statistics.fmean(y for _, y in points)
+    sxx = sum((x - x_mean) ** 2 for x, _ in points)
+    sxy = sum((x - x_mean) * (y - y_mean) for x, y in points)
+
+    k = sxy / sxx
+    c = math.exp(y_mean - k * x_mean)
+    return c, k
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Return a list of (case, phase, baseline_ms, current_ms) for each phase
+    whose median is slower than the baseline by more than threshold
+    """
+    regressions = []
+    for case, data in results.items():
+        if case not in baseline:
+            continue
+        for phase, stats in data["phases"].items():
+            old = baseline[case]["phases"].get(phase)
+            if old is None or old["median"] < MIN_COMPARE_MS:
+                continue
+            if stats["median"] > (1 + threshold) * old["median"]:
+                regressions.append((case, phase, old["median"], stats["median"]))
+    return regressions
+
+
+# ================== #
+#  Benchmark cases   #
+# ================== #
+
+
+def diamond_case(test_index):
+    """
+    Kernel, chain length and a point to evaluate for DIAMONDS[test_index]
+    """
+    (P1, Q1, P2, Q2), _ = load_splitting_kernel(test_index)
+    _, ea, eb, _, _ = DIAMONDS[test_index]
+
+    EA, EB = P1.curve(), P2.curve()
+    PB3, _ = torsion_basis(EB, ZZ(3**eb))
+    L1 = CouplePoint(EA(0), PB3)
+
+    return (P1, Q1, P2, Q2), ea, L1
+
+
+def festa_case():
+    """
+    Kernel, chain length and a point to evaluate for the FESTA data
+    """
+    kernel, (L1_1, L1_2), b, _ = festa_data()
+    return kernel, b, CouplePoint(L1_1, L1_2)
+
+
+def benchmark_case(kernel, n, point, repeat, sqrt=False):
+    """
+    Median and spread of each phase of the chain of length n over
+    repeat runs. With sqrt=True, the last two steps are computed with
+    `EllipticProductIsogenySqrt` from the kernel without the torsion above.
+    """
+    P1, Q1, P2, Q2 = kernel
+    if sqrt:
+        P1, Q1, P2, Q2 = (4 * X for X in kernel)
+        isogeny = EllipticProductIsogenySqrt
+        strategy = optimised_strategy(n - 2)
+    else:
+        isogeny = EllipticProductIsogeny
+        strategy = optimised_strategy(n)
+    ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+
+    samples = {phase: [] for phase in PHASES}
+    for _ in range(repeat):
+        timings, _ = time_chain_phases(isogeny, ker_Phi, n, strategy, point)
+        for phase, t in timings.items():
+            samples[phase].append(t)
+
+    return {
+        "n": n,
+        "phases": {phase: summarise(samples[phase]) for phase in PHASES},
+    }
+
+
+def benchmark_scaling(kernel, n, point, repeat):
+    """
+    Compute the chain for the same prime with lengths n, n/2, n/4, ...
+    by doubling the kernel, and fit the median of each phase to c * n^k
+    """
+    lengths = []
+    m = n
+    while m >= MIN_SCALING_LENGTH:
+        lengths.append(m)
+        m //= 2
+
+    medians = {phase: [] for phase in PHASES}
+    for m in lengths:
+        shorter = [X * ZZ(2 ** (n - m)) for X in kernel]
+        data = benchmark_case(shorter, m, point, repeat)
+        for phase in PHASES:
+            medians[phase].append(data["phases"][phase]["median"])
+
+    fits = {}
+    for phase in PHASES:
+        try:
+            c, k = fit_power_law(lengths, medians[phase])
+        except ValueError:
+            continue
+        fits[phase] = {"c": c, "k": k}
+
+    return {"lengths": lengths, "medians": medians, "fit": fits}
+
+
+# ========= #
+#  Output   #
+# ========= #
+
+
+def metadata():
+    """
+    Information about the machine and the code which was benchmarked
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    from sage.version import version as sage_version
+
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": commit,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "sage": sage_version,
+    }
+
+
+def print_case(case, data):
+    print(f"{case} (n = {data['n']}):")
+    for phase, stats in data["phases"].items():
+        print(
+            f"  {phase:>10}: {stats['median']:10.3f} ms "
+            f"(mad {stats['mad']:.3f}, min {stats['min']:.3f}, max {stats['max']:.3f})"
+        )
+
+
+def print_scaling(case, scaling):
+    print(f"Scaling in n for {case}, lengths {scaling['lengths']}:")
+    for phase, fit in scaling["fit"].items():
+        print(f"  {phase:>10}: {fit['c']:.4f} * n^{fit['k']:.3f} ms")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--index",
+        type=int,
+        action="append",
+        help="DIAMONDS index to benchmark, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--no-festa", action="store_true", help="skip the FESTA parameters"
+    )
+    parser.add_argument(
+        "--no-sqrt",
+        action="store_true",
+        help="skip the chains using EllipticProductIsogenySqrt",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="number of runs of each chain"
+    )
+    parser.add_argument(
+        "--scaling",
+        action="store_true",
+        help="fit the scaling in n for the largest DIAMONDS index",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON output of a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed relative slowdown of a median against the baseline",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    speed_up_sagemath()
+
+    indices = args.index if args.index is not None else range(len(DIAMONDS))
+    cases = [(f"diamond_{i}", lambda i=i: diamond_case(i)) for i in indices]
+    if not args.no_festa:
+        cases.append(("festa", festa_case))
+
+    results = {}
+    for name, setup in cases:
+        kernel, n, point = setup()
+        results[name] = benchmark_case(kernel, n, point, args.repeat)
+        print_case(name, results[name])
+        if not args.no_sqrt:
+            results[f"{name}_sqrt"] = benchmark_case(
+                kernel, n, point, args.repeat, sqrt=True
+            )
+            print_case(f"{name}_sqrt", results[f"{name}_sqrt"])
+
+    output = {"metadata": metadata(), "results": results}
+
+    if args.scaling:
+        test_index = max(indices)
+        kernel, n, point = diamond_case(test_index)
+        scaling = benchmark_scaling(kernel, n, point, args.repeat)
+        output["scaling"] = {f"diamond_{test_index}": scaling}
+        print_scaling(f"diamond_{test_index}", scaling)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for case, phase, old, new in regressions:
+            print(
+                f"REGRESSION {case} {phase}: {old:.3f} ms -> {new:.3f} ms "
+                f"(+{100 * (new / old - 1):.1f}%)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {100 * args.threshold:.0f}% of the baseline")
@@ -0,0 +1,191 @@
+"""
+Measure the costs of the doublings and images in the (2,2)-chain in the
+Mumford model, which are used to set `RICHELOT_LEFT_COST` and
+`RICHELOT_RIGHT_COST` in `utilities/strategy.py`.
+
+The doublings and images on the leftmost edge of the strategy tree happen
+on the first Jacobian after gluing, so these are timed separately from the
+ones on the following Jacobians.
+
+The chain is then timed with the strategy given by the stored costs, the
+one given by the costs just measured and the one from
+`optimised_strategy_old(n, mul_c=0.175)`, which the chain used before the
+costs were calibrated.
+
+Finally, the doublings of the pair of kernel divisors with batched affine
+coordinates (`affine_dbl_iter_many`) and with projective coordinates
+(`projective_dbl_iter_many`) are timed for random primes of the sizes in
+`CROSSOVER_BITS`, along with the cost of an inversion in multiplications.
+
+Run from the root of the project with:
+
+    sage -python benchmarks/benchmark_richelot_strategy.py
+"""
+
+from sage.all import ZZ, PolynomialRing, random_prime
+from utilities.utils import speed_up_sagemath
+
+from isogeny_diamond import DIAMONDS
+from diamond_fixtures import load_splitting_kernel
+from richelot_isogenies.richelot_isogenies import (
+    FromProdToJac,
+    FromJacToJac,
+    _check_maximally_isotropic,
+    compute_richelot_chain,
+)
+from richelot_isogenies.divisor_arithmetic import (
+    affine_dbl_iter_many,
+    projective_dbl_iter_many,
+)
+from utilities.field_backend import fp2_field
+from utilities.strategy import (
+    optimised_strategy,
+    optimised_strategy_old,
+    optimised_strategy_richelot,
+    RICHELOT_LEFT_COST,
+    RICHELOT_RIGHT_COST,
+)
+
+import time
+
+speed_up_sagemath()
+
+# Sizes of the primes for which the affine and projective doublings are
+# compared
+CROSSOVER_BITS = [254, 381, 1293, 2048, 4096]
+
+
+def time_us(f, test_N):
+    """
+    Average time of f() in microseconds
+    """
+    t0 = time.process_time_ns()
+    for _ in range(test_N):
+        f()
+    return (time.process_time_ns() - t0) / (1_000 * test_N)
+
+
+def richelot_step(h, divisors, n):
+    """
+    Double the pair of divisors n times and compute the Richelot
+    isogeny with this kernel
+    """
+    return FromJacToJac(h, *affine_dbl_iter_many(h, divisors, n))
+
+
+def image_cost(f, divisors, test_N):
+    """
+    Time to push the pair of divisors through the Richelot isogeny f
+    """
+    return time_us(lambda: f.map_many(divisors), test_N)
+
+
+def measure_richelot_costs(test_index, test_N=100):
+    """
+    Measure the cost of doubling and pushing the pair of kernel divisors
+    on the leftmost edge and on the rest of the strategy tree
+    """
+    ker_Phi, _ = load_splitting_kernel(test_index)
+    _, a, _, _, _ = DIAMONDS[test_index]
+    P, Q, R, S = (4 * X for X in ker_Phi)
+
+    # Glue to the first Jacobian
+    _, (P2, Q2, R2, S2) = _check_maximally_isotropic(P, Q, R, S, a)
+    h, glue = FromProdToJac(P2, Q2, R2, S2)
+    divisors = [glue((P, R)), glue((Q, S))]
+
+    # Costs on the leftmost edge
+    left_dbl = time_us(lambda: affine_dbl_iter_many(h, divisors, 1), test_N)
+    h, f = richelot_step(h, divisors, a - 2)
+    first_right = image_cost(f, divisors, test_N)
+
+    # Costs for the rest of the tree
+    divisors = f.map_many(divisors)
+    dbl = time_us(lambda: affine_dbl_iter_many(h, divisors, 1), test_N)
+    h, f = richelot_step(h, divisors, a - 3)
+    right = image_cost(f, divisors, test_N)
+
+    # Costs are for the pair of kernel divisors
+    left_cost = (ZZ(round(dbl)), ZZ(round(left_dbl)))
+    right_cost = (ZZ(round(right)), ZZ(round(first_right)))
+    return left_cost, right_cost
+
+
+def time_chain(test_index, strategy, test_N=10):
+    """
+    Time in milliseconds of the (2,2)-chain in the Mumford model
+    computed with the strategy
+    """
+    ker_Phi, _ = load_splitting_kernel(test_index)
+    _, ea, eb, _, _ = DIAMONDS[test_index]
+    F = ker_Phi[0].curve().base_ring()
+    B = ZZ(3**eb)
+    C = ZZ(2**ea) - B
+    N_constant = F(B + C) / F(B - C)
+    ker_Phi_scaled = tuple(4 * X for X in ker_Phi)
+
+    return time_us(
+        lambda: compute_richelot_chain(ker_Phi_scaled, ea, N_constant, strategy),
+        test_N,
+    ) / 1_000
+
+
+def random_divisors(F):
+    """
+    A sextic h and a pair of divisors on the Jacobian of y^2 = h(x),
+    with h = v^2 + u*w so that D = (u, v) lies on it
+    """
+    R = PolynomialRing(F, "x")
+    u1, u0, v1, v0 = (F.random_element() for _ in range(4))
+    w = R([F.random_element() for _ in range(5)])
+    h = (R([v0, v1]) ** 2 + R([u0, u1, 1]) * w).padded_list(7)
+    D = (u1, u0, v1, v0)
+    return h, [D, affine_dbl_iter_many(h, [D], 1)[0]]
+
+
+def time_doublings(bits, n=40, test_N=5):
+    """
+    Time in microseconds of a doubling of a pair of divisors with batched
+    affine and with projective coordinates, for a random prime of the
+    given size, and the cost of an inversion in multiplications
+    """
+    while True:
+        p = random_prime(2**bits, lbound=2 ** (bits - 1))
+        if p % 4 == 3:
+            break
+    F = fp2_field(p)
+    h, divisors = random_divisors(F)
+
+    affine = time_us(lambda: affine_dbl_iter_many(h, divisors, n), test_N) / n
+    projective = time_us(lambda: projective_dbl_iter_many(h, divisors, n), test_N) / n
+
+    x, y = F.random_element(), F.random_element()
+    M = time_us(lambda: x * y, 1000)
+    I = time_us(lambda: ~x, 1000)
+    return affine, projective, I / M
+
+
+if __name__ == "__main__":
+    print(f"Current costs: {RICHELOT_LEFT_COST = }, {RICHELOT_RIGHT_COST = }")
+    for test_index in [2, 4]:
+        _, ea, _, _, _ = DIAMONDS[test_index]
+        left_cost, right_cost = measure_richelot_costs(test_index)
+
+        print(f"DIAMONDS[{test_index}], chain of length {ea}:")
+        print(f"  measured (us): left_cost = {left_cost}, right_cost = {right_cost}")
+
+        strategies = [
+            ("optimised_strategy_old(mul_c=0.175)", optimised_strategy_old(ea - 1, mul_c=0.175)),
+            ("optimised_strategy_richelot", optimised_strategy_richelot(ea - 1)),
+            ("measured costs", optimised_strategy(ea - 1, left_cost, right_cost)),
+        ]
+        for name, strategy in strategies:
+            print(f"  chain with {name}: {time_chain(test_index, strategy):.3f} ms")
+
+    print("Doubling the pair of kernel divisors:")
+    for bits in CROSSOVER_BITS:
+        affine, projective, I = time_doublings(bits)
+        print(
+            f"  {bits} bits: affine {affine:.1f} us, projective {projective:.1f} us, "
+            f"1I = {I:.1f}M"
+        )
@@ -0,0 +1,333 @@
+"""
+Audit of the costs used by `optimised_strategy()` for the (2^n, 2^n)-isogeny
+chain in the theta model.
+
+The strategy is chosen with fixed costs for the left moves (doubling the pair
+of kernel points, `THETA_LEFT_COST`) and the right moves (pushing a pair of
+kernel points through an isogeny, `THETA_RIGHT_COST`), each with a separate
+cost on the leftmost edge, where the doublings are on E1 x E2 and the images
+go through the gluing. This script replays the chain with a strategy, times
+every move with a tracer and compares them node by node with the costs the
+strategy was chosen with.
+
+For each case it reports:
+
+- the time of one unit of cost, such that the model predicts the total time
+  of the moves exactly
+- the relative error of the model for the moves, and with `--nodes` the
+  predicted and observed time of every move
+- the four costs measured in the same units, and the relative error of each
+  cost of the model
+- the strategy chosen with the measured costs and its predicted saving, which
+  is checked by replaying it with `--verify`
+
+Run from the root of the project with:
+
+    sage -python benchmarks/benchmark_strategy_audit.py --index 2 --verify
+    sage -python benchmarks/benchmark_strategy_audit.py --left-cost 1,1 --right-cost 1,1
+"""
+
+import argparse
+import json
+import statistics
+import sys
+
+from isogeny_diamond import DIAMONDS
+from theta_structures.couple_point import CouplePoint
+from theta_isogenies.product_isogeny import EllipticProductIsogeny
+from utilities.strategy import (
+    optimised_strategy,
+    strategy_moves,
+    move_cost,
+    strategy_cost,
+    THETA_LEFT_COST,
+    THETA_RIGHT_COST,
+)
+from utilities.utils import speed_up_sagemath
+
+from benchmark_regression import diamond_case, festa_case
+
+# The four costs of the model as (name, direction, leftmost)
+MODEL_COSTS = [
+    ("doubling", "left", False),
+    ("left edge doubling", "left", True),
+    ("image", "right", False),
+    ("first image", "right", True),
+]
+
+# ================= #
+#  Replaying moves  #
+# ================= #
+
+
+class MoveRecorder:
+    """
+    Tracer keeping the time of the doublings and of the pushes of the
+    kernel points, in the order they are performed by the chain
+    """
+
+    def __init__(self):
+        self.left = []
+        self.right = []
+
+    def __call__(self, index, kind, elapsed, depth):
+        if kind == "doubling":
+            self.left.append(elapsed)
+        elif kind == "push":
+            self.right.append(elapsed)
+
+
+def replay(kernel, n, strategy, repeat):
+    """
+    Compute the chain of length n with the strategy repeat times and
+    return each move of `strategy_moves()` with its median time in
+    microseconds
+    """
+    P1, Q1, P2, Q2 = kernel
+    ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+    moves = strategy_moves(strategy, n)
+
+    samples = [[] for _ in moves]
+    for _ in range(repeat):
+        recorder = MoveRecorder()
+        EllipticProductIsogeny(ker_Phi, n, strategy=strategy, tracer=recorder)
+        assert len(recorder.left) + len(recorder.right) == len(moves)
+
+        timings = {"left": iter(recorder.left), "right": iter(recorder.right)}
+        for move, s in zip(moves, samples):
+            s.append(next(timings[move[0]]) * 1_000_000)
+
+    return [(move, statistics.median(s)) for move, s in zip(moves, samples)]
+
+
+# =============================== #
+#  Comparing with the cost model  #
+# =============================== #
+
+
+def unit_time(timed_moves, left_cost, right_cost):
+    """
+    Time in microseconds of one unit of cost, chosen so the model
+    predicts the total time of the moves
+    """
+    predicted = observed = 0
+    for move, t in timed_moves:
+        cost = move_cost(move, left_cost, right_cost)
+        if cost:
+            predicted += cost
+            observed += t
+    return observed / predicted
+
+
+def node_errors(timed_moves, left_cost, right_cost, unit):
+    """
+    For each move which does some work, the move, its predicted and
+    observed time in microseconds and the relative error of the model
+    """
+    nodes = []
+    for move, observed in timed_moves:
+        predicted = unit * move_cost(move, left_cost, right_cost)
+        if predicted:
+            nodes.append((move, predicted, observed, observed / predicted - 1))
+    return nodes
+
+
+def measured_costs(timed_moves, left_cost, right_cost, unit):
+    """
+    The time of a single doubling or image for each cost of the model,
+    in units of cost, as the pairs (left_cost, right_cost). Costs which
+    no move of the strategy uses are kept from the model.
+    """
+    model = {"left": left_cost, "right": right_cost}
+    measured = {"left": list(left_cost), "right": list(right_cost)}
+    for _, direction, leftmost in MODEL_COSTS:
+        moves = [
+            (m, t) for m, t in timed_moves if m[0] == direction and m[3] == leftmost
+        ]
+        count = sum(m[2] for m, _ in moves)
+        if count:
+            measured[direction][leftmost] = sum(t for _, t in moves) / (unit * count)
+        else:
+            measured[direction][leftmost] = model[direction][leftmost]
+    return tuple(measured["left"]), tuple(measured["right"])
+
+
+def audit_case(kernel, n, repeat, left_cost, right_cost, verify=False):
+    """
+    Replay the chain with the strategy optimised for the given costs and
+    compare its moves with the costs, then compute the strategy for the
+    measured costs and its predicted saving
+    """
+    strategy = optimised_strategy(n, left_cost, right_cost)
+    timed_moves = replay(kernel, n, strategy, repeat)
+    unit = unit_time(timed_moves, left_cost, right_cost)
+    nodes = node_errors(timed_moves, left_cost, right_cost, unit)
+    errors = [abs(e) for *_, e in nodes]
+
+    measured_left, measured_right = measured_costs(
+        timed_moves, left_cost, right_cost, unit
+    )
+    retuned_left = tuple(round(c) for c in measured_left)
+    retuned_right = tuple(round(c) for c in measured_right)
+    retuned = optimised_strategy(n, retuned_left, retuned_right)
+
+    # Both strategies priced with the measured costs
+    cost = strategy_cost(strategy, n, measured_left, measured_right)
+    retuned_cost = strategy_cost(retuned, n, measured_left, measured_right)
+
+    result = {
+        "n": n,
+        "model": {"left_cost": list(left_cost), "right_cost": list(right_cost)},
+        "unit_us": unit,
+        "moves_ms": sum(t for _, t in timed_moves) / 1000,
+        "node_error": {
+            "median": statistics.median(errors),
+            "max": max(errors),
+        },
+        "costs": [
+            {
+                "name": name,
+                "model": (left_cost if d == "left" else right_cost)[leftmost],
+                "measured": (measured_left if d == "left" else measured_right)[leftmost],
+            }
+            for name, d, leftmost in MODEL_COSTS
+        ],
+        "nodes": [
+            {
+                "move": list(move),
+                "predicted_us": predicted,
+                "observed_us": observed,
+                "error": error,
+            }
+            for move, predicted, observed, error in nodes
+        ],
+        "retuned": {
+            "left_cost": list(retuned_left),
+            "right_cost": list(retuned_right),
+            "same_strategy": retuned == strategy,
+            "predicted_saving": 1 - retuned_cost / cost,
+            "predicted_saving_ms": (cost - retuned_cost) * unit / 1000,
+        },
+    }
+
+    if verify and retuned != strategy:
+        retuned_moves = replay(kernel, n, retuned, repeat)
+        result["retuned"]["moves_ms"] = sum(t for _, t in retuned_moves) / 1000
+
+    return result
+
+
+# ========= #
+#  Output   #
+# ========= #
+
+
+def print_audit(case, result, print_nodes=False):
+    model = result["model"]
+    print(
+        f"{case} (n = {result['n']}), left_cost = {tuple(model['left_cost'])}, "
+        f"right_cost = {tuple(model['right_cost'])}:"
+    )
+    print(
+        f"  moves took {result['moves_ms']:.3f} ms, "
+        f"one unit of cost is {result['unit_us']:.4f} us"
+    )
+    error = result["node_error"]
+    print(
+        f"  model error per move: median {100 * error['median']:.1f}%, "
+        f"max {100 * error['max']:.1f}%"
+    )
+    if print_nodes:
+        for node in result["nodes"]:
+            direction, k, count, leftmost = node["move"]
+            edge = " (leftmost)" if leftmost else ""
+            print(
+                f"    k = {k:>3} {direction:>5} x{count:<3}{edge:>11}: "
+                f"predicted {node['predicted_us']:10.1f} us, "
+                f"observed {node['observed_us']:10.1f} us "
+                f"({100 * node['error']:+.1f}%)"
+            )
+    for c in result["costs"]:
+        print(
+            f"  {c['name']:>18}: model {c['model']:>6}, measured {c['measured']:8.1f} "
+            f"({100 * (c['measured'] / c['model'] - 1):+.1f}%)"
+        )
+
+    retuned = result["retuned"]
+    print(
+        f"  retuned costs: left_cost = {tuple(retuned['left_cost'])}, "
+        f"right_cost = {tuple(retuned['right_cost'])}"
+    )
+    if retuned["same_strategy"]:
+        print("  the retuned costs give the same strategy")
+        return
+    print(
+        f"  predicted saving of the retuned strategy: "
+        f"{100 * retuned['predicted_saving']:.2f}% "
+        f"({retuned['predicted_saving_ms']:.3f} ms)"
+    )
+    if "moves_ms" in retuned:
+        print(
+            f"  replayed: {result['moves_ms']:.3f} ms -> {retuned['moves_ms']:.3f} ms"
+        )
+
+
+def parse_cost(cost):
+    return tuple(int(c) for c in cost.split(","))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--index",
+        type=int,
+        action="append",
+        help="DIAMONDS index to audit, can be repeated (default: all)",
+    )
+    parser.add_argument("--festa", action="store_true", help="also audit FESTA")
+    parser.add_argument(
+        "--left-cost",
+        type=parse_cost,
+        default=THETA_LEFT_COST,
+        help="costs of a doubling as 'regular,leftmost' (default: THETA_LEFT_COST)",
+    )
+    parser.add_argument(
+        "--right-cost",
+        type=parse_cost,
+        default=THETA_RIGHT_COST,
+        help="costs of an image as 'regular,first' (default: THETA_RIGHT_COST)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of replays of each chain"
+    )
+    parser.add_argument(
+        "--nodes", action="store_true", help="print the timing of every move"
+    )
+    parser.add_argument(
+        "--verify", action="store_true", help="replay the retuned strategy"
+    )
+    parser.add_argument("--output", help="write the audit as JSON to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    speed_up_sagemath()
+
+    indices = args.index if args.index is not None else range(len(DIAMONDS))
+    cases = [(f"diamond_{i}", lambda i=i: diamond_case(i)) for i in indices]
+    if args.festa:
+        cases.append(("festa", festa_case))
+
+    results = {}
+    for name, setup in cases:
+        kernel, n, _ = setup()
+        results[name] = audit_case(
+            kernel, n, args.repeat, args.left_cost, args.right_cost, args.verify
+        )
+        print_audit(name, results[name], args.nodes)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Audit written to {args.output}")
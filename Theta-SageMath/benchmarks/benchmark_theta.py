@@ -2,7 +2,8 @@ import cProfile
 import pstats
 
 from sage.all import ZZ
-from isogeny_diamond import generate_splitting_kernel, DIAMONDS
+from isogeny_diamond import DIAMONDS
+from diamond_fixtures import load_splitting_kernel
 from theta_structures.couple_point import CouplePoint
 from theta_isogenies.product_isogeny import EllipticProductIsogeny
 from utilities.supersingular import torsion_basis
@@ -12,7 +13,7 @@ from utilities.utils import speed_up_sagemath
 speed_up_sagemath()
 
 test_index = -2
-(P1, Q1, P2, Q2), (E0, _) = generate_splitting_kernel(test_index)
+(P1, Q1, P2, Q2), (E0, _) = load_splitting_kernel(test_index)
 
 # Create kernel from CouplePoint data
 ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
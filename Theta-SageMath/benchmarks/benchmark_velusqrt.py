@@ -0,0 +1,135 @@
+"""
+Time Vélu against VéluSqrt for a range of prime degrees ell to find the
+crossover, which should be used to set `VELUSQRT_THRESHOLD` and
+`FACTORED_VELUSQRT_THRESHOLD` in `montgomery_isogenies/kummer_isogeny.py`.
+
+For each ell we pick a prime p = 2^k * ell * f - 1 of roughly the size used
+in the attack, so the starting curve y^2 = x^3 + x over GF(p^2) has a rational
+point of order ell, and time computing the codomain plus evaluating one point.
+
+The prime power steps of `factored_kummer_isogeny` also push the kernel
+points through each isogeny, so they are timed separately, for kernels of
+order ell^POWER with either algorithm.
+
+Run from the root of the project with:
+
+    sage -python benchmarks/benchmark_velusqrt.py
+"""
+
+from sage.all import ZZ, EllipticCurve
+from utilities.utils import speed_up_sagemath
+from utilities.field_backend import fp2_field
+
+from montgomery_isogenies.kummer_line import KummerLine
+from montgomery_isogenies.kummer_isogeny import (
+    KummerLineIsogeny_Velu,
+    KummerLineIsogeny_VeluSqrt,
+    factored_kummer_isogeny,
+    VELUSQRT_THRESHOLD,
+    FACTORED_VELUSQRT_THRESHOLD,
+)
+
+import time
+
+speed_up_sagemath()
+
+# Bit length of the primes p
+P_BITS = 256
+
+# Prime degrees to compare, chosen around the expected crossover
+ELLS = [ZZ(ell) for ell in [11, 19, 31, 41, 53, 61, 71, 83, 101, 211, 401, 809, 1201, 2003, 4001]]
+
+# Exponent of the prime power kernels for `factored_kummer_isogeny`
+POWER = 3
+
+
+def prime_with_ell_torsion(ell, bits=P_BITS, e=1):
+    """
+    Find the smallest f such that p = 2^k * ell^e * f - 1 is prime, with
+    k chosen so that p has roughly `bits` bits
+    """
+    k = bits - ZZ(ell**e).nbits() - 8
+    f = 1
+    while True:
+        p = 2**k * ell**e * f - 1
+        if p.is_prime():
+            return p
+        f += 2
+
+
+def kernel_of_order(ell, bits=P_BITS, e=1):
+    """
+    Return a point of order ell^e on a Kummer line for E : y^2 = x^3 + x
+    """
+    p = prime_with_ell_torsion(ell, bits, e)
+    F = fp2_field(p)
+    E = EllipticCurve(F, [1, 0])
+    L = KummerLine(E)
+
+    cofactor = (p + 1) // ell**e
+    while True:
+        K = cofactor * E.random_point()
+        if not (ell ** (e - 1) * K).is_zero():
+            return L, L(K), L(E.random_point())
+
+
+def time_isogeny(Algorithm, L, K, ell, xP, test_N):
+    """
+    Average time in ms to compute the codomain and evaluate one point
+    """
+    t0 = time.process_time_ns()
+    for _ in range(test_N):
+        phi = Algorithm(L, K, ell, check=False)
+        phi(xP)
+    return (time.process_time_ns() - t0) / (1_000_000 * test_N)
+
+
+def time_factored_isogeny(L, K, ell, e, xP, threshold, test_N):
+    """
+    Average time in ms of `factored_kummer_isogeny` for a kernel of
+    order ell^e, evaluating one point
+    """
+    t0 = time.process_time_ns()
+    for _ in range(test_N):
+        factored_kummer_isogeny(L, K, ell**e, threshold=threshold, points=[xP])
+    return (time.process_time_ns() - t0) / (1_000_000 * test_N)
+
+
+def report_crossover(crossover):
+    if crossover is None:
+        print(f"VéluSqrt was not faster for any ell up to {ELLS[-1]}")
+    else:
+        print(f"VéluSqrt is first faster at ell = {crossover}")
+
+
+if __name__ == "__main__":
+    test_N = 5
+    crossover = None
+
+    print(f"Current thresholds: {VELUSQRT_THRESHOLD} for KummerLineIsogeny,")
+    print(f"{FACTORED_VELUSQRT_THRESHOLD} for factored_kummer_isogeny")
+    print(f"{'ell':>6} {'Vélu (ms)':>12} {'VéluSqrt (ms)':>14}")
+    for ell in ELLS:
+        L, K, xP = kernel_of_order(ell)
+        t_velu = time_isogeny(KummerLineIsogeny_Velu, L, K, ell, xP, test_N)
+        t_sqrt = time_isogeny(KummerLineIsogeny_VeluSqrt, L, K, ell, xP, test_N)
+        print(f"{ell:>6} {t_velu:>12.3f} {t_sqrt:>14.3f}")
+
+        if crossover is None and t_sqrt < t_velu:
+            crossover = ell
+
+    report_crossover(crossover)
+
+    crossover = None
+    print(f"\nKernels of order ell^{POWER} with factored_kummer_isogeny")
+    print(f"{'ell':>6} {'Vélu (ms)':>12} {'VéluSqrt (ms)':>14}")
+    for ell in ELLS[: ELLS.index(401) + 1]:
+        L, K, xP = kernel_of_order(ell, e=POWER)
+        t_velu = time_factored_isogeny(L, K, ell, POWER, xP, ell, test_N)
+        t_sqrt = time_factored_isogeny(L, K, ell, POWER, xP, ell - 1, test_N)
+        print(f"{ell:>6} {t_velu:>12.3f} {t_sqrt:>14.3f}")
+
+        if crossover is None and t_sqrt < t_velu:
+            crossover = ell
+
+    report_crossover(crossover)
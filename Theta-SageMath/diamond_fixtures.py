@@ -0,0 +1,236 @@
+"""
+Persisted fixtures for the parameter sets in `isogeny_diamond.DIAMONDS`.
+
+Generating a splitting kernel with `generate_splitting_kernel()` computes
+torsion bases, Bob's 3^eb isogeny and the auxiliary endomorphism from scratch,
+which for the largest parameter sets takes far longer than the isogeny chains
+we want to measure. Instead, we generate the data once, with a fixed random
+seed, and store it to disk. The fixtures contain:
+
+- Bob's secret and the kernel (P1, Q1, P2, Q2) of the (2^ea, 2^ea)-isogeny
+- The torsion bases E0[3^eb] and EB[3^eb] used to recover the secret
+- The j-invariants of the codomain of the (2^ea, 2^ea)-isogeny
+
+As for `utilities/cache.py`, everything is stored as Python integers so the
+files are compact and independent of the SageMath version. The fixtures are
+written as Python literals and read back with `ast.literal_eval`, never with
+pickle, so loading a fixture cannot run code. Each parameter set is written to
+its own file in `FIXTURE_DIRECTORY`, and can be (re)generated from the root of
+the project with:
+
+    sage -python diamond_fixtures.py [param_index ...]
+
+When a fixture is missing, `load_splitting_kernel()` falls back to generating
+the kernel, so tests and benchmarks work without any fixtures on disk.
+"""
+
+# Python imports
+import os
+
+# Sage imports
+from sage.rings.integer_ring import ZZ
+from sage.misc.randstate import set_random_seed
+from sage.misc.lazy_import import lazy_import
+
+lazy_import("sage.schemes.elliptic_curves.constructor", "EllipticCurve")
+
+# Local imports
+from isogeny_diamond import DIAMONDS, generate_splitting_kernel
+from utilities.cache import fp2_to_ints, ints_to_fp2, read_literal, write_literal_atomic
+from utilities.field_backend import fp2_field
+from utilities.supersingular import torsion_basis
+from utilities.strategy import optimised_strategy
+
+# Fixtures live next to this file
+FIXTURE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Bump when the content of the fixtures changes
+FIXTURE_VERSION = 2
+
+# ======================================= #
+#  Conversion between points and integers #
+# ======================================= #
+
+
+def _point_to_ints(P):
+    """
+    Represent the affine point P = (x, y) as integers
+    """
+    x, y = P.xy()
+    return fp2_to_ints(x), fp2_to_ints(y)
+
+
+def _ints_to_point(E, P):
+    """
+    Inverse of `_point_to_ints()`, the points were checked when
+    the fixture was generated so we skip the check here
+    """
+    F = E.base_ring()
+    x, y = (ints_to_fp2(F, c) for c in P)
+    return E.point([x, y, F.one()], check=False)
+
+
+def _curve_to_ints(E):
+    """
+    Represent E by its a-invariants as integers
+    """
+    return tuple(fp2_to_ints(a) for a in E.a_invariants())
+
+
+def _supersingular_curve(F, ainvs):
+    """
+    The curve with a-invariants ainvs, setting the order of the
+    supersingular curve so SageMath does not compute it
+    """
+    E = EllipticCurve(F, ainvs)
+    p = F.characteristic()
+    E.set_order((p + 1) ** 2, num_checks=0)
+    return E
+
+
+def _ints_to_curve(F, E):
+    """
+    Inverse of `_curve_to_ints()`
+    """
+    return _supersingular_curve(F, [ints_to_fp2(F, a) for a in E])
+
+
+def diamond_field(param_index):
+    """
+    The field GF(p^2) used for the parameter set DIAMONDS[param_index]
+    """
+    f, ea, eb, _, _ = DIAMONDS[param_index]
+    p = f * 4 * ZZ(2**ea) * ZZ(3**eb) - 1
+    return fp2_field(p)
+
+
+# ========================= #
+#  Generate and store data  #
+# ========================= #
+
+
+def generate_diamond_fixture(param_index, seed=0):
+    """
+    Deterministically generate the data for DIAMONDS[param_index]
+    as a dictionary of Python integers
+    """
+    # Import here, as the theta chain is only needed to
+    # find the expected codomain
+    from theta_structures.couple_point import CouplePoint
+    from theta_isogenies.product_isogeny import EllipticProductIsogeny
+
+    _, ea, eb, _, _ = DIAMONDS[param_index]
+    B = ZZ(3**eb)
+
+    set_random_seed(seed)
+    (P1, Q1, P2, Q2), (E0, bob_secret) = generate_splitting_kernel(param_index)
+    EB = P2.curve()
+
+    # Torsion bases used to recover the secret
+    P3, Q3 = torsion_basis(E0, B)
+    PB3, QB3 = torsion_basis(EB, B)
+
+    # Expected codomain of the (2^ea, 2^ea)-isogeny
+    ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+    Phi = EllipticProductIsogeny(ker_Phi, ea, strategy=optimised_strategy(ea))
+    codomain_j = tuple(fp2_to_ints(E.j_invariant()) for E in Phi.codomain())
+
+    return {
+        "version": FIXTURE_VERSION,
+        "param_index": range(len(DIAMONDS))[param_index],
+        "diamond": tuple(int(c) for c in DIAMONDS[param_index]),
+        "seed": seed,
+        "bob_secret": int(bob_secret),
+        "EB": _curve_to_ints(EB),
+        "kernel": tuple(_point_to_ints(P) for P in (P1, Q1, P2, Q2)),
+        "basis_E0": tuple(_point_to_ints(P) for P in (P3, Q3)),
+        "basis_EB": tuple(_point_to_ints(P) for P in (PB3, QB3)),
+        "codomain_j": codomain_j,
+    }
+
+
+def _fixture_path(param_index, directory):
+    """
+    Location on disk of the fixture, allowing negative indices as for DIAMONDS
+    """
+    param_index = range(len(DIAMONDS))[param_index]
+    return os.path.join(directory, f"diamond_{param_index}.txt")
+
+
+def write_diamond_fixture(param_index, directory=FIXTURE_DIRECTORY, seed=0):
+    """
+    Generate the fixture for DIAMONDS[param_index] and write it to
+    the directory. The file is written atomically.
+    """
+    fixture = generate_diamond_fixture(param_index, seed=seed)
+
+    os.makedirs(directory, exist_ok=True)
+    path = _fixture_path(param_index, directory)
+    write_literal_atomic(path, fixture)
+    return path
+
+
+# ===================== #
+#  Load persisted data  #
+# ===================== #
+
+
+def load_diamond_fixture(param_index, directory=FIXTURE_DIRECTORY):
+    """
+    Load the fixture for DIAMONDS[param_index] as SageMath objects, or
+    return None when there is no (up to date) fixture on disk.
+
+    The dictionary contains the curves E0, EB, Bob's secret, the kernel
+    (P1, Q1, P2, Q2), the bases E0[3^eb] and EB[3^eb] and the j-invariants
+    of the expected codomain.
+    """
+    try:
+        data = read_literal(_fixture_path(param_index, directory))
+    except FileNotFoundError:
+        return None
+
+    # Ignore stale fixtures
+    if data["version"] != FIXTURE_VERSION:
+        return None
+    if data["diamond"] != tuple(int(c) for c in DIAMONDS[param_index]):
+        return None
+
+    F = diamond_field(param_index)
+    E0 = _supersingular_curve(F, [1, 0])
+    EB = _ints_to_curve(F, data["EB"])
+
+    P1, Q1 = (_ints_to_point(E0, P) for P in data["kernel"][:2])
+    P2, Q2 = (_ints_to_point(EB, P) for P in data["kernel"][2:])
+
+    return {
+        "E0": E0,
+        "EB": EB,
+        "bob_secret": ZZ(data["bob_secret"]),
+        "kernel": (P1, Q1, P2, Q2),
+        "basis_E0": tuple(_ints_to_point(E0, P) for P in data["basis_E0"]),
+        "basis_EB": tuple(_ints_to_point(EB, P) for P in data["basis_EB"]),
+        "codomain_j": tuple(ints_to_fp2(F, j) for j in data["codomain_j"]),
+    }
+
+
+def load_splitting_kernel(param_index=0, directory=FIXTURE_DIRECTORY):
+    """
+    Drop in replacement for `generate_splitting_kernel()` which loads
+    the kernel from disk when a fixture exists and otherwise generates
+    a fresh one
+    """
+    fixture = load_diamond_fixture(param_index, directory=directory)
+    if fixture is None:
+        return generate_splitting_kernel(param_index)
+    return fixture["kernel"], (fixture["E0"], fixture["bob_secret"])
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    indices = [int(i) for i in sys.argv[1:]] or range(len(DIAMONDS))
+    for param_index in indices:
+        t0 = time.process_time()
+        path = write_diamond_fixture(param_index)
+        print(f"Wrote {path} in {time.process_time() - t0:.2f}s")
@@ -6,20 +6,28 @@ between elliptic products by using that there is an endomorphism of degree
     A - B = X^2 + Y^2
 """
 
-from sage.all import *
-
-from richelot_isogenies.richelot_isogenies import (
-    compute_richelot_chain,
-    evaluate_richelot_chain,
+from sage.rings.integer_ring import ZZ
+from sage.rings.finite_rings.integer_mod import Mod
+from sage.misc.prandom import randint
+from sage.misc.lazy_import import lazy_import
+
+lazy_import("sage.schemes.elliptic_curves.constructor", "EllipticCurve")
+
+# The Richelot chain is only used for the tests below, and the x-only
+# isogenies only when a kernel is generated, so load them when used
+lazy_import(
+    "richelot_isogenies.richelot_isogenies",
+    ["compute_richelot_chain", "evaluate_richelot_chain"],
 )
-from montgomery_isogenies.isogenies_x_only import (
-    isogeny_from_scalar_x_only,
-    evaluate_isogeny_x_only,
+lazy_import(
+    "montgomery_isogenies.isogenies_x_only",
+    ["isogeny_from_scalar_x_only", "evaluate_isogeny_x_only"],
 )
-from utilities.supersingular import torsion_basis, fix_torsion_basis_renes
+from utilities.supersingular import torsion_basis, torsion_basis_2e
+from utilities.field_backend import fp2_field
 from utilities.order import has_order_D
 from utilities.discrete_log import BiDLP
-from utilities.strategy import optimised_strategy_old
+from utilities.strategy import optimised_strategy_richelot
 
 # Some precomputed
 # ea, eb, X, Y
@@ -51,7 +59,7 @@ def generate_splitting_kernel(param_index=0):
     A = ZZ(2**ea)
     B = ZZ(3**eb)
     p = f * 4 * A * B - 1
-    F = GF(p**2, name="i", modulus=[1, 0, 1])
+    F = fp2_field(p)
 
     # Cofactor isogeny is the sum of squares
     C = A - B
@@ -64,9 +72,8 @@ def generate_splitting_kernel(param_index=0):
     # Do Bob's SIDH Key-Exchange
     bob_secret = randint(0, B)
 
-    # Compute torsion basis
-    P2, Q2 = torsion_basis(E0, 4 * A)
-    P2, Q2 = fix_torsion_basis_renes(P2, Q2, ea + 2)
+    # Compute torsion basis, (0,0) is always under Q2
+    P2, Q2 = torsion_basis_2e(E0, ea + 2)
     P3, Q3 = torsion_basis(E0, B)
 
     # Check automorphism
@@ -74,7 +81,7 @@ def generate_splitting_kernel(param_index=0):
     assert iota(iota(Q2)) == -Q2
 
     phiB, _ = isogeny_from_scalar_x_only(E0, B, bob_secret, basis=(P3, Q3))
-    phi_P0, phi_Q0 = evaluate_isogeny_x_only(phiB, P2, Q2, 4 * A, B)
+    phi_P0, phi_Q0 = evaluate_isogeny_x_only(phiB, P2, Q2)
 
     # We pick values such that the aux. is easy to compute
     def aux_endomorphism(P):
@@ -88,6 +95,35 @@ def generate_splitting_kernel(param_index=0):
     return ker_Phi, (E0, bob_secret)
 
 
+def generate_dual_kernel(Phi, ker_Phi):
+    """
+    Given the (2^n, 2^n)-isogeny Phi : E1 x E2 -> E3 x E4 computed from the
+    kernel (P1, Q1, P2, Q2) of `generate_splitting_kernel()`, compute the
+    kernel of a (2^n, 2^n)-isogeny from E3 x E4 back to E1 x E2, which is the
+    dual of Phi up to an automorphism of E3 x E4, as a pair of CouplePoints.
+
+    The dual of Phi has kernel Phi(E1[2^n] x {0}), generated by four times
+    the images of (P1, 0) and (Q1, 0). Images are only known up to the sign
+    of each component, so the signs of the second image are fixed with the
+    image of (P1 + Q1, 0).
+    """
+    from theta_structures.couple_point import CouplePoint
+
+    P1, Q1, P2, _ = ker_Phi
+    O2 = P2.curve()(0)
+    U1, U2 = CouplePoint(P1, O2), CouplePoint(Q1, O2)
+    A, B, C = (Phi(U) for U in (U1, U2, U1 + U2))
+
+    # Choose the signs such that A + B = +-C on each component
+    B = CouplePoint(
+        *(
+            Bi if Ai + Bi in (Ci, -Ci) else -Bi
+            for Ai, Bi, Ci in zip(A.points(), B.points(), C.points())
+        )
+    )
+    return A, B
+
+
 if __name__ == "__main__":
     # Note: Tests use the slower Mumford isogenies as we know they work from
     # previous code.
@@ -100,7 +136,7 @@ if __name__ == "__main__":
         A = ZZ(2**ea)
         B = ZZ(3**eb)
         p = 4 * A * B - 1
-        F = GF(p**2, name="i", modulus=[1, 0, 1])
+        F = fp2_field(p)
 
         # Cofactor isogeny is the sum of squares
         C = A - B
@@ -115,10 +151,8 @@ if __name__ == "__main__":
         bob_secret = randint(0, B)
 
         # Compute torsion basis
-        P2, Q2 = torsion_basis(E0, 4 * A)
-        P2, Q2 = fix_torsion_basis_renes(
-            P2, Q2, ea + 2
-        )  # Ensure (0,0) will not be in the kernel
+        # Ensure (0,0) will not be in the kernel
+        P2, Q2 = torsion_basis_2e(E0, ea + 2)
         P3, Q3 = torsion_basis(E0, B)
 
         # Check automorphism
@@ -129,10 +163,10 @@ if __name__ == "__main__":
         phiA, EA = isogeny_from_scalar_x_only(
             E0, A, alice_secret, basis=(4 * P2, 4 * Q2)
         )
-        PB, QB = evaluate_isogeny_x_only(phiA, P3, Q3, B, A)
+        PB, QB = evaluate_isogeny_x_only(phiA, P3, Q3)
 
         phiB, EB = isogeny_from_scalar_x_only(E0, B, bob_secret, basis=(P3, Q3))
-        PA, QA = evaluate_isogeny_x_only(phiB, P2, Q2, 4 * A, B)
+        PA, QA = evaluate_isogeny_x_only(phiB, P2, Q2)
 
         # Compute the second isogenies
         _, ESA = isogeny_from_scalar_x_only(EB, A, alice_secret, basis=(4 * PA, 4 * QA))
@@ -153,7 +187,7 @@ if __name__ == "__main__":
         N1 = B
         N2 = C
         N_constant = F(N1 + N2) / F(N1 - N2)
-        strategy = optimised_strategy_old(ea - 1, mul_c=0.175)
+        strategy = optimised_strategy_richelot(ea - 1)
 
         # Compute the chain and make sure it splits
         ker_Phi_scaled = (4 * P2c, 4 * Q2c, 4 * PA, 4 * QA)
@@ -9,8 +9,9 @@ represented projectively as x(P) = (X : Z) which we call KummerPoints
 However, for FESTA(+) we always need the full point eventually for either
 additions or the (2,2)-isogeny, so we need a way to recover the full point.
 
-The trick we use is that we always evaluate our isogenies on torsion bases, 
-so we can use the Weil pairing to recover phi(P) up to an overall sign.
+The trick we use is that we always evaluate our isogenies on torsion bases,
+so we can also push x(P - Q) through the isogeny and use it to recover
+phi(P), phi(Q) up to an overall sign with a single square root.
 
 This file takes elliptic curves and points on these curves, maps them to the
 Kummer line, performs fast x-only isogeny computations and then lifts the
@@ -18,14 +19,16 @@ result back to full points on the codomain curves.
 """
 
 # Sage imports
-from sage.all import gcd, randint
+from sage.arith.misc import gcd
+from sage.misc.prandom import randint
 from sage.structure.element import RingElement
 
 # Local Imports
 from montgomery_isogenies.kummer_line import KummerLine
 from montgomery_isogenies.kummer_isogeny import KummerLineIsogeny
+from utilities.batched_inversion import batched_inversion
+from utilities.fast_sqrt import sqrt_Fp2
 from utilities.supersingular import torsion_basis
-from utilities.discrete_log import weil_pairing_pari
 
 # =========================================================== #
 #    Compute an isogeny and codomain using x-only algorithms  #
@@ -133,48 +136,88 @@ def isogeny_from_scalar_x_only(E, D, m, basis=None):
 #    Evaluate an x-only isogeny on a torsion basis  #
 # ================================================= #
 
-def lift_image_to_curve(P, Q, ximP, ximQ, n, d):
+def lift_images_to_curve(ximages):
     """
-    Given the torsion basis <P, Q> = E[n]
-    and the x-coordinates of the images x(phi(P))
-    and x(phi(P)) of a degree d-isogeny compute 
-    the image of the full points up to an overall sign:
+    Given triples of x-coordinates (x(phi(P)), x(phi(Q)), x(phi(P - Q)))
+    on the same Kummer line, compute the images of the full points up
+    to an overall sign for each pair:
         ±phi(P), ±phi(Q)
+
+    y(phi(P)) needs one square root, then y(phi(Q)) is recovered without
+    any square root or pairing in the style of Okeya-Sakurai: writing
+    (x1, y1), (x2, y2) for the images and x3 = x(phi(P) - phi(Q)),
+
+        (y1 + y2)^2 = (x1 - x2)^2 (x3 + A + x1 + x2)
+
+    so 2*y1*y2 is known, and all the divisions by 2*y1 are done with one
+    batched inversion.
     """
-    # Lift the points to the curve
-    imPb = ximP.curve_point()
-    imQb = ximQ.curve_point()
-    
-    # Compute two pairings
-    pair_E0 = weil_pairing_pari(P, Q, n)
-    pair_E1 = weil_pairing_pari(imPb, imQb, n)
-    
-    # Correct the sign
-    if pair_E0**d != pair_E1:
-        imQb = -imQb
+    if not ximages:
+        return []
+
+    L = ximages[0][0].parent()
+    E = L.curve()
+    A = L.a()
+
+    # Normalise all x-coordinates with one inversion
+    xs = L.normalise_many([xT for triple in ximages for xT in triple])
+    xs = [xT.XZ()[0] for xT in xs]
+
+    lifts = []
+    for i in range(0, len(xs), 3):
+        x1, x2, x3 = xs[i : i + 3]
+        y1_sqr = x1 * (x1**2 + A * x1 + 1)
+        y2_sqr = x2 * (x2**2 + A * x2 + 1)
+        y1 = sqrt_Fp2(y1_sqr)
+
+        # 2*y1*y2 from the x-coordinate of the difference
+        t = x1 - x2
+        y1y2 = t * t * (x3 + A + x1 + x2) - y1_sqr - y2_sqr
+        lifts.append((x1, y1, x2, y1y2))
+
+    # Compute y2 = 2*y1*y2 / 2*y1 for all pairs at once
+    inverses = batched_inversion(*(y1 + y1 for _, y1, _, _ in lifts))
+
+    images = []
+    for (x1, y1, x2, y1y2), inv in zip(lifts, inverses):
+        images.append((E(x1, y1), E(x2, y1y2 * inv)))
+    return images
+
+def evaluate_isogeny_x_only_many(phi, bases):
+    """
+    Given an x-only isogeny phi and a list of torsion bases
+    [(P, Q), ...] compute the images of all the bases up to
+    an overall sign for each basis: ±phi(P), ±phi(Q)
+
+    The points P, Q and P - Q of all bases are pushed through
+    phi together, then lifted back to the curve with
+    `lift_images_to_curve`. The points P and Q must have order at
+    least 3, and phi must be injective on <P, Q>
+    """
+    # Domain of isogeny
+    L0 = phi.domain()
 
-    return imPb, imQb
+    # Extract x-coordinates from points and convert to KummerPoints
+    xs = []
+    for P, Q in bases:
+        xs += [L0(P[0]), L0(Q[0]), L0((P - Q)[0])]
 
-def evaluate_isogeny_x_only(phi, P, Q, n, d):
+    # Evaluate the isogeny on all points at once
+    ximages = phi.evaluate_many(xs)
+    ximages = [ximages[i : i + 3] for i in range(0, len(ximages), 3)]
+
+    # Use the image of P - Q to get the y-coordinates back
+    return lift_images_to_curve(ximages)
+
+def evaluate_isogeny_x_only(phi, P, Q):
     """
-    Given an x-only isogeny phi degree d, and the torsion basis
+    Given an x-only isogeny phi, and the torsion basis
     <P,Q> = E[n], compute the image of the torsion basis up to
     and overall sign: ±phi(P), ±phi(Q)
 
     Does this by evaluating KummerPoints with a KummerIsogeny
-    and lifts them back to the curve using the Weil pairing 
-    trick in `lift_image_to_curve`
+    and lifts them back to the curve using the image of P - Q
+    in `lift_images_to_curve`
     """
-    # Domain of isogeny
-    L0 = phi.domain()
-
-    # Extract x-coordinates from points and convert to KummerPoints
-    xP, xQ = L0(P[0]), L0(Q[0])
-    
-    # Evaluate the isogeny
-    ximP, ximQ = phi(xP), phi(xQ)
-    
-    # Use Weil pairing trick to get y-coordinate back
-    imP, imQ = lift_image_to_curve(P, Q, ximP, ximQ, n, d)
-    
-    return imP, imQ
\ No newline at end of file
+    imP, imQ = evaluate_isogeny_x_only_many(phi, [(P, Q)])[0]
+    return imP, imQ
@@ -0,0 +1,87 @@
+"""
+Isomorphisms between elliptic curves in Montgomery form
+
+E1 : y^2 = x^3 + A1*x^2 + x     and     E2 : y^2 = x^3 + A2*x^2 + x
+
+A Montgomery model is fixed by the choice of a 2-torsion point, which is
+sent to (0,0), together with a scaling of x. For a 2-torsion point (r, 0)
+on E1 the change of variables x = s*x' + r, y = u^3*y' with u^2 = s gives
+the curve
+
+    y'^2 = x'^3 + (3r + A1)/s * x'^2 + (3r^2 + 2*A1*r + 1)/s^2 * x'
+
+which is a Montgomery curve exactly when s^2 = 3r^2 + 2*A1*r + 1. Running
+through the three 2-torsion points and the square roots s and u finds every
+isomorphism E1 -> E2 with a handful of square roots in Fp2, rather than the
+generic SageMath `E1.isomorphisms(E2)`.
+
+As for the rest of the package, the square roots assume the base field is
+GF(p^2) with p = 3 mod 4.
+"""
+
+# Sage imports
+from sage.misc.lazy_import import lazy_import
+
+lazy_import(
+    "sage.schemes.elliptic_curves.weierstrass_morphism", "WeierstrassIsomorphism"
+)
+
+# Local imports
+from utilities.fast_sqrt import sqrt_Fp2, is_square_Fp2
+from utilities.supersingular import montgomery_coefficient
+
+# ============================================== #
+#  Isomorphisms between Montgomery curves from   #
+#  their 2-torsion                               #
+# ============================================== #
+
+
+def two_torsion_x_coordinates(A):
+    """
+    The x-coordinates of the rational points of order two on the
+    curve y^2 = x^3 + Ax^2 + x
+    """
+    F = A.parent()
+    xs = [F.zero()]
+
+    # The roots of x^2 + Ax + 1
+    disc = A * A - 4
+    if is_square_Fp2(disc):
+        d = sqrt_Fp2(disc)
+        xs += [(-A + d) / 2, (-A - d) / 2]
+    return xs
+
+
+def montgomery_isomorphisms(E1, E2, up_to_sign=False):
+    """
+    Return the list of isomorphisms E1 -> E2 between the Montgomery
+    curves E1 and E2, which is empty when the curves are not isomorphic.
+
+    When up_to_sign is True, only one isomorphism from each pair ±iso
+    is returned, which is enough when we only care about subgroups or
+    x-coordinates.
+    """
+    A1 = montgomery_coefficient(E1)
+    A2 = montgomery_coefficient(E2)
+
+    isomorphisms = []
+    for r in two_torsion_x_coordinates(A1):
+        # x' = (x - r) / s gives a Montgomery curve for s^2 = f'(r)
+        s_sqr = (3 * r + 2 * A1) * r + 1
+        if not is_square_Fp2(s_sqr):
+            continue
+        s = sqrt_Fp2(s_sqr)
+
+        # The Montgomery coefficient is (3r + A1) / s and
+        # we need u^2 = s for the y-coordinate
+        B = 3 * r + A1
+        for s in (s, -s):
+            if B != A2 * s or not is_square_Fp2(s):
+                continue
+            u = sqrt_Fp2(s)
+
+            us = (u,) if up_to_sign else (u, -u)
+            for u in us:
+                isomorphisms.append(WeierstrassIsomorphism(E1, (u, r, 0, 0), E2))
+
+    return isomorphisms
@@ -19,7 +19,14 @@ Evaluation of the isogeny is done via `phi(xQ)` for some KummerPoint `xQ`.
 NOTE:
 
 Where the degree can be composite, but for efficiency needs to be smooth.
-For a 2-isogeny, the point P = (0,0) cannot be used as a kernel 
+Isogenies of degree 2^e and 3^e are computed as chains of 4-isogenies
+and 3-isogenies. Extra points can be pushed through the chain while it is
+computed with `KummerLineIsogeny(domain, kernel, degree, points=[xP, xQ])`
+and their images are returned by `phi.images()`.
+
+Many points can be evaluated at once with `phi.evaluate_many([xP, xQ, ...])`,
+which runs each factor of the chain over the whole list and normalises the
+images with a single batched inversion at the end.
 
 ========================================================================
 
@@ -45,6 +52,9 @@ Vélu-like algorithms:
     A faster way to the CSIDH
     Michael Meyer and Steffen Reith
 
+    3 and 4-isogenies and optimal strategies from: https://sike.org/files/SIDH-spec.pdf
+    Supersingular Isogeny Key Encapsulation
+
 VéluSqrt for large ell isogenies 
 
     VéluSqrt: https://velusqrt.isogeny.org/
@@ -53,18 +63,23 @@ VéluSqrt for large ell isogenies
 
 Future Work: 
 
-- Optimise VéluSqrt, it seems to be underperforming with a threshold of about 1000
-  rather than 100 
 - Include isomorphisms of Kummer Lines
 - allow composition by defining __mul__ on isogenies to create a composite isogeny
 """
 
+# Python imports
+import functools
+
 # Sage imports
-from sage.all import prod, ZZ, PolynomialRing
-from sage.rings.generic import ProductTree
+from sage.misc.misc_c import prod
+from sage.rings.integer_ring import ZZ
 
 # Local imports
 from montgomery_isogenies.kummer_line import KummerLine, KummerPoint
+from utilities.batched_inversion import batched_inversion
+from utilities.discrete_log import pari
+from utilities.fast_sqrt import sqrt_Fp2
+from utilities.strategy import optimised_strategy_old
 
 # =================================================== #
 # Generic class for creating an isogeny between       #
@@ -126,6 +141,13 @@ class KummerLineIsogeny_Generic:
         """
         return self._degree
 
+    def evaluate_many(self, points):
+        """
+        Evaluate the isogeny on each of the points, the images
+        are returned in projective coordinates without normalising
+        """
+        return [self(P) for P in points]
+
 
 # =================================================== #
 # Computation of isogenies between Kummer lines using #
@@ -138,11 +160,9 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
     Computes prime degree isogenies with Vélu-like formula.
 
     - When ell is odd, we use Costello-Hisil (https://ia.cr/2017/504)
-    - When ell is even, we can use Renes (https://ia.cr/2017/1198) providing
-    that the kernel is not (0,0)
-
-    TODO: use isomorphisms to change the model of the curve if (0,0) is a
-    kernel point
+    - When ell is even, we use Renes (https://ia.cr/2017/1198). When the
+    kernel is (0,0) the codomain needs a square root, see
+    `_compute_codomain_constants_origin()`
     """
 
     def __init__(self, domain, kernel, degree, check=True):
@@ -154,13 +174,6 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
         self._kernel = kernel
         self._domain = domain
 
-        # Compute the codomain, we need different formula for even and
-        # odd degree
-        if self._degree == 2:
-            # We cannot use the point (0 : 0 : 1) as the kernel for
-            # these formula
-            assert self._kernel.XZ()[0]
-
         # Compute the codomain
         self._codomain = self._compute_codomain()
 
@@ -171,6 +184,8 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
         if not isinstance(P, KummerPoint):
             raise ValueError
         if self._degree == 2:
+            if not self._kernel.XZ()[0]:
+                return self._evaluate_isogeny_origin(P)
             return self._evaluate_isogeny_even(P)
         return self._evaluate_isogeny(P)
 
@@ -252,6 +267,22 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
         A = A + A  # A = 2*(ZK^2 - 2*XK^2)
         return A, C
 
+    def _compute_codomain_constants_origin(self):
+        """
+        When the kernel is (0,0), the isogeny x -> (x - 1)^2 / x maps to
+        the curve y^2 = x(x^2 + (A + 6)x + 4(A + 2)) and we rescale x by
+        2*sqrt(A + 2) to get back to a Montgomery curve.
+
+        When all of the 4-torsion is rational, which is the case for our
+        supersingular curves as 4 divides p + 1, 2*sqrt(A + 2) is a square
+        and so this is the codomain and not its quadratic twist.
+        """
+        a = self._domain.a()
+        s = sqrt_Fp2(a + 2)
+        self._origin_scale = s + s
+
+        return a + 6, self._origin_scale
+
     def _compute_codomain(self):
         """
         Wrapper function to compute the codomain L = x^3 + x^2A' + x in
@@ -260,7 +291,9 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
         """
         # Compute the codomain constants, need different formula for
         # odd and even ell
-        if self._degree == 2:
+        if self._degree == 2 and not self._kernel.XZ()[0]:
+            A_codomain, C_codomain = self._compute_codomain_constants_origin()
+        elif self._degree == 2:
             A_codomain, C_codomain = self._compute_codomain_constants_even()
         else:
             A_codomain, C_codomain = self._compute_codomain_constants()
@@ -274,24 +307,42 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
         Costello-Hisil (https://ia.cr/2017/504) formula for
         evaluating an odd degree isogeny on the point P
         """
-        XP, ZP = P.XZ()
-        Psum = XP + ZP
-        Pdiff = XP - ZP
+        return self._evaluate_isogeny_many([P])[0]
+
+    def _evaluate_isogeny_many(self, points):
+        """
+        Costello-Hisil formula for many points at once, the loop
+        through the Edwards multiples of the kernel is shared by
+        all of the points
+        """
+        coords = [P.XZ() for P in points]
+        sum_diff = [(XP + ZP, XP - ZP) for XP, ZP in coords]
 
         # Loop through the d-multiples, these are
         # precomputed from the codomain computation
-        X_new, Z_new = 1, 1
+        X_news = [1] * len(points)
+        Z_news = [1] * len(points)
         for EY, EZ in self._edwards_multiples:
-            diff_EZ = Pdiff * EZ
-            sum_EY = EY * Psum
-            X_new *= diff_EZ + sum_EY
-            Z_new *= diff_EZ - sum_EY
+            for i, (Psum, Pdiff) in enumerate(sum_diff):
+                diff_EZ = Pdiff * EZ
+                sum_EY = EY * Psum
+                X_news[i] *= diff_EZ + sum_EY
+                Z_news[i] *= diff_EZ - sum_EY
 
         # Square and multiple with original
-        X_new = X_new**2 * XP
-        Z_new = Z_new**2 * ZP
+        return [
+            self._codomain((X_new**2 * XP, Z_new**2 * ZP))
+            for X_new, Z_new, (XP, ZP) in zip(X_news, Z_news, coords)
+        ]
 
-        return self._codomain((X_new, Z_new))
+    def evaluate_many(self, points):
+        """
+        Evaluate the isogeny on each of the points, the images
+        are returned in projective coordinates without normalising
+        """
+        if self._degree == 2:
+            return [self(P) for P in points]
+        return self._evaluate_isogeny_many(points)
 
     def _evaluate_isogeny_even(self, P):
         """
@@ -316,6 +367,282 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
 
         return self._codomain((T8, T9))
 
+    def _evaluate_isogeny_origin(self, P):
+        """
+        Evaluate the 2-isogeny with kernel (0,0) on the point P,
+        which is x -> (x - 1)^2 / (2*sqrt(A + 2) * x)
+        """
+        XP, ZP = P.XZ()
+
+        X_new = XP - ZP
+        X_new = X_new * X_new
+        Z_new = self._origin_scale * XP * ZP
+
+        return self._codomain((X_new, Z_new))
+
+
+# =================================================== #
+# Computation of 4-isogenies between Kummer lines     #
+# using x-only formula from SIKE                      #
+# =================================================== #
+
+
+class KummerLineIsogeny_Four(KummerLineIsogeny_Generic):
+    """
+    Computes 4-isogenies with the x-only formula from the SIKE
+    specification (https://sike.org/files/SIDH-spec.pdf)
+
+    These formula cannot be used when [2]K = (0,0), which happens exactly
+    when x(K) = ±1. For these kernels we instead compose the 2-isogeny with
+    kernel (0,0) with the 2-isogeny with kernel (A + 2, 0) on its codomain,
+    which gives the codomain (A' : C') = (2(A + 6C) : 2C - A) for x(K) = 1
+    without any square roots. The case x(K) = -1 follows from the
+    isomorphism x -> -x to the curve with coefficient -A.
+    """
+
+    def __init__(self, domain, kernel, check=True):
+        # Check the input to the isogeny is well-formed
+        self.validate_input(domain, kernel, 4, check=check)
+
+        # Set kernel and degree and domain
+        self._degree = ZZ(4)
+        self._kernel = kernel
+        self._domain = domain
+
+        # Determine whether [2]K = (0,0), in which case x(K) = ±1
+        XK, ZK = self._kernel.XZ()
+        if XK == ZK:
+            self._above_origin = 1
+        elif XK == -ZK:
+            self._above_origin = -1
+        else:
+            self._above_origin = 0
+
+        # Compute the codomain
+        self._codomain = self._compute_codomain()
+
+    def __call__(self, P):
+        """
+        phi(xP) evaluates the Kummer point xP
+        """
+        if not isinstance(P, KummerPoint):
+            raise ValueError
+        if self._above_origin:
+            return self._evaluate_isogeny_origin(P)
+        return self._evaluate_isogeny(P)
+
+    def _compute_codomain_constants(self):
+        """
+        SIKE formula for the codomain (A' + 2C' : 4C') = (4XK^4 : 4ZK^4)
+        which also stores the constants used for evaluation
+        """
+        XK, ZK = self._kernel.XZ()
+
+        K1 = ZK * ZK
+        K1 = K1 + K1  # K1 = 2*ZK^2
+        C24 = K1 * K1  # C24 = 4*ZK^4
+        K1 = K1 + K1  # K1 = 4*ZK^2
+        A24 = XK * XK
+        A24 = A24 + A24  # A24 = 2*XK^2
+        A24 = A24 * A24  # A24 = 4*XK^4
+
+        self._constants = (K1, XK - ZK, XK + ZK)
+
+        # Convert (A' + 2C' : 4C') to (A' : C')
+        A = A24 + A24
+        A = A + A
+        A = A - C24 - C24  # A = 4*A24 - 2*C24
+        return A, C24
+
+    def _compute_codomain_constants_origin(self):
+        """
+        Codomain of the 4-isogeny when x(K) = ±1
+        """
+        A, C = self._domain.extract_constants()
+
+        # We need (A + 2C) and (A - 2C) for evaluation
+        C2 = C + C
+        self._constants = (A + C2, A - C2)
+
+        # For x(K) = -1 we use the codomain of the curve -A
+        if self._above_origin == -1:
+            A = -A
+
+        A_new = C2 + C2
+        A_new = A_new + C2 + A  # A + 6C
+        A_new = A_new + A_new  # 2(A + 6C)
+        C_new = C2 - A  # 2C - A
+        return A_new, C_new
+
+    def _compute_codomain(self):
+        """
+        Wrapper function to compute the codomain L = x^3 + x^2A' + x in
+        projective coordinates: A' = (A' : C')
+        """
+        if self._above_origin:
+            A_codomain, C_codomain = self._compute_codomain_constants_origin()
+        else:
+            A_codomain, C_codomain = self._compute_codomain_constants()
+
+        F = self._domain.base_ring()
+        return KummerLine(F, [A_codomain, C_codomain])
+
+    def _evaluate_isogeny(self, P):
+        """
+        SIKE formula for evaluating a 4-isogeny on the point P
+
+        Cost: 6M + 2S + 6a
+        """
+        K1, K2, K3 = self._constants
+        XP, ZP = P.XZ()
+
+        t0 = XP + ZP
+        t1 = XP - ZP
+        XP = t0 * K2
+        ZP = t1 * K3
+        t0 = t0 * t1
+        t0 = t0 * K1
+        t1 = XP + ZP
+        ZP = XP - ZP
+        t1 = t1 * t1
+        ZP = ZP * ZP
+        XP = t0 + t1
+        t0 = ZP - t0
+        X_new = XP * t1
+        Z_new = ZP * t0
+
+        return self._codomain((X_new, Z_new))
+
+    def _evaluate_isogeny_origin(self, P):
+        """
+        Evaluate the 4-isogeny when x(K) = ±1, for x(K) = 1 this is
+
+        x -> (x + 1)^2 (x^2 + Ax + 1) / ((A - 2) x (x - 1)^2)
+
+        Cost: 5M + 2S + 4a
+        """
+        A_plus, A_minus = self._constants
+        XP, ZP = P.XZ()
+
+        t0 = XP + ZP
+        t0 = t0 * t0  # (X + Z)^2
+        t1 = XP - ZP
+        t1 = t1 * t1  # (X - Z)^2
+        t2 = t0 - t1  # 4XZ
+        t3 = A_plus * t0 - A_minus * t1  # 4(C(X^2 + Z^2) + AXZ)
+
+        if self._above_origin == 1:
+            X_new = t0 * t3
+            Z_new = A_minus * t2 * t1
+        else:
+            X_new = t1 * t3
+            Z_new = A_plus * t2 * t0
+
+        return self._codomain((X_new, Z_new))
+
+
+# =================================================== #
+# Computation of 3-isogenies between Kummer lines     #
+# using x-only formula from SIKE                      #
+# =================================================== #
+
+
+class KummerLineIsogeny_Three(KummerLineIsogeny_Generic):
+    """
+    Computes 3-isogenies with the x-only formula from the SIKE
+    specification (https://sike.org/files/SIDH-spec.pdf)
+
+    These only need x(K) and are cheaper than the generic Costello-Hisil
+    formula for ell = 3, which also computes the twisted Edwards codomain
+    """
+
+    def __init__(self, domain, kernel, check=True):
+        # Check the input to the isogeny is well-formed
+        self.validate_input(domain, kernel, 3, check=check)
+
+        # Set kernel and degree and domain
+        self._degree = ZZ(3)
+        self._kernel = kernel
+        self._domain = domain
+
+        # Compute the codomain
+        self._codomain = self._compute_codomain()
+
+    def __call__(self, P):
+        """
+        phi(xP) evaluates the Kummer point xP
+        """
+        if not isinstance(P, KummerPoint):
+            raise ValueError
+        return self._evaluate_isogeny(P)
+
+    def _compute_codomain_constants(self):
+        """
+        SIKE formula for the codomain (A' - 2C' : A' + 2C') which
+        also stores the constants used for evaluation
+
+        Cost: 2M + 3S + 13a
+        """
+        XK, ZK = self._kernel.XZ()
+
+        K1 = XK - ZK
+        t0 = K1 * K1
+        K2 = XK + ZK
+        t1 = K2 * K2
+        t2 = t0 + t1
+        t3 = K1 + K2
+        t3 = t3 * t3
+        t3 = t3 - t2
+        t2 = t1 + t3
+        t3 = t3 + t0
+        t4 = t3 + t0
+        t4 = t4 + t4
+        t4 = t1 + t4
+        A24m = t2 * t4  # A' - 2C'
+        t4 = t1 + t2
+        t4 = t4 + t4
+        t4 = t0 + t4
+        A24p = t3 * t4  # A' + 2C'
+
+        self._constants = (K1, K2)
+
+        # Convert (A' - 2C' : A' + 2C') to (A' : C')
+        A = A24p + A24m
+        A = A + A
+        C = A24p - A24m
+        return A, C
+
+    def _compute_codomain(self):
+        """
+        Wrapper function to compute the codomain L = x^3 + x^2A' + x in
+        projective coordinates: A' = (A' : C')
+        """
+        A_codomain, C_codomain = self._compute_codomain_constants()
+        F = self._domain.base_ring()
+        return KummerLine(F, [A_codomain, C_codomain])
+
+    def _evaluate_isogeny(self, P):
+        """
+        SIKE formula for evaluating a 3-isogeny on the point P
+
+        Cost: 4M + 2S + 4a
+        """
+        K1, K2 = self._constants
+        XP, ZP = P.XZ()
+
+        t0 = XP + ZP
+        t1 = XP - ZP
+        t0 = K1 * t0
+        t1 = K2 * t1
+        t2 = t0 + t1
+        t0 = t1 - t0
+        t2 = t2 * t2
+        t0 = t0 * t0
+        X_new = XP * t2
+        Z_new = ZP * t0
+
+        return self._codomain((X_new, Z_new))
+
 
 # ==================================================== #
 # Computation of isogenies between Kummer lines using  #
@@ -324,19 +651,71 @@ class KummerLineIsogeny_Velu(KummerLineIsogeny_Generic):
 # ==================================================== #
 
 
-def product_tree_resultant(hI_tree, poly):
-    r"""
-    Helper function to evaluate a resultant with `h_I` quickly,
-    using the product tree, taken from FastEllipticPolynomial
+class PariProductTree:
+    """
+    Product tree for h = prod (x - a_i), stored as pari polynomials over
+    the base field so that building the tree, computing remainders and
+    evaluating at the leaves never leaves pari.
+
+    The tree is built once, and then used for every resultant
+
+    Res(h, f) = prod f(a_i)
+
+    The remainders of many polynomials are computed in one pass down the
+    tree with `values()`, which is how many points are evaluated at once.
+
+    Inspired by the ProductTree and FastEllipticPolynomial classes in
     sage/src/sage/schemes/elliptic_curves/hom_velusqrt.py
 
     Original author: Lorenz Panny (2022)
     """
-    rems = hI_tree.remainders(poly)
-    r = prod(rems)
-    s = -1 if len(hI_tree) % 2 == 1 == poly.degree() else 1
-    assert r.is_constant()
-    return s * r[0]
+
+    def __init__(self, roots):
+        self._x = pari("x")
+        self.roots = list(roots)
+
+        # layers[0] are the leaves (x - a_i) and layers[-1] is the root
+        layer = [self._x - a for a in self.roots]
+        self.layers = [layer]
+        while len(layer) > 1:
+            next_layer = [layer[i] * layer[i + 1] for i in range(0, len(layer) - 1, 2)]
+            if len(layer) % 2:
+                next_layer.append(layer[-1])
+            layer = next_layer
+            self.layers.append(layer)
+
+    def __len__(self):
+        return len(self.roots)
+
+    def root(self):
+        """
+        Return the polynomial h = prod (x - a_i)
+        """
+        return self.layers[-1][0]
+
+    def values(self, polys):
+        """
+        For each polynomial f in polys, compute [f(a_1), ..., f(a_n)] by
+        reducing f modulo every node of the tree, working through all the
+        polynomials at each layer
+        """
+        # The node j of a layer has the node j // 2 of the layer above
+        # as its parent
+        rems = [[f % self.root()] for f in polys]
+        for layer in reversed(self.layers[1:-1]):
+            rems = [[R[j // 2] % node for j, node in enumerate(layer)] for R in rems]
+
+        # The remainder modulo (x - a) is the evaluation at a
+        return [
+            [pari.subst(R[j // 2], self._x, a) for j, a in enumerate(self.roots)]
+            for R in rems
+        ]
+
+    def resultants(self, polys):
+        """
+        Compute Res(h, f) for each polynomial f in polys
+        """
+        return [prod(vals) for vals in self.values(polys)]
 
 
 class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
@@ -347,11 +726,12 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
     Faster computation of isogenies of large prime degree
     Daniel J. Bernstein, Luca De Feo, Antonin Leroux, Benjamin Smith
 
-    TODO: currently seems to be under-performing. I think there are
-    further optimisations which can be made. The main issue seems to
-    be the polynomial rings, and the heavy costs of taking some element
-    in pari and representing this as an NTL polynomial. Fixing this means
-    rehauling SageMath polynomials, which *is* a TODO, but not for this code!
+    All polynomials are pari polynomials with coefficients in the base
+    field, elements are only converted to pari when they enter the
+    polynomial arithmetic and back to SageMath for the outputs. The product
+    tree for hI is computed once and reused for the codomain and all
+    evaluations, and `evaluate_many()` computes the resultants for many
+    points with one pass through the tree.
     """
 
     def __init__(self, domain, kernel, degree, check=True):
@@ -365,13 +745,10 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
 
         # We need the domain coefficient for the elliptic
         # resultants.
-        self.a = self._domain.a()
+        self.a = pari(self._domain.a())
 
-        # We need a polynomial ring, so we create it once
-        # and store it to self
-        k = self._domain.base_ring()
-        self.R = PolynomialRing(k, names="Z", implementation="NTL")
-        self.Z = self.R.gen()
+        # All polynomials are in pari in the variable x
+        self.Z = pari("x")
 
         # baby step and giant step params
         b = (self._degree - 1).isqrt() // 2
@@ -384,7 +761,7 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         self.hI_tree = self._hI_precomputation(kernel, b, c)
         self.EJ_parts = self._EJ_precomputation(kernel, b)
         self.hK = self._hK_precomputation(kernel, degree, b, c)
-        self.hK_reverse = self.hK.reverse()
+        self.hK_reverse = pari.polrecip(self.hK)
 
         # Compute the codomain
         self._codomain = self._compute_codomain()
@@ -398,12 +775,15 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
             raise ValueError
         return self._evaluate_isogeny(P)
 
-    def _hI_resultant(self, poly):
+    def _hI_resultants(self, polys):
         """
-        Compute the resultant Res(hI, poly) where
-        hI has been computed and stored as a product tree
+        Compute the resultants Res(hI, poly) for all polys, where
+        hI has been computed and stored as a product tree.
+
+        NOTE: these agree with the resultants up to sign, which does
+        not matter as every resultant we use is squared
         """
-        return product_tree_resultant(self.hI_tree, poly)
+        return self.hI_tree.resultants(polys)
 
     def _hI_precomputation(self, ker, b, c):
         r"""
@@ -417,15 +797,15 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         """
         Q = (2 * b) * ker
         step, diff = Q.double(), Q
-        leaves = []
+        roots = []
         # This uses x-only point addition to generate all points
         # in the set I = {2b(2i + 1) | 0 <= i < c}
         for i in range(c):
-            leaves.append(self.Z - Q.x())
+            roots.append(pari(Q.x()))
             if i < c - 1:
                 Q, diff = Q.add(step, diff), Q
 
-        return ProductTree(leaves)
+        return PariProductTree(roots)
 
     def _Fs(self, X1, X2):
         """
@@ -456,7 +836,7 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         # This uses x-only point addition to generate all points
         # in the set J = {1, 3, 5, ..., 2b - 1}
         for i in range(b):
-            polys = self._Fs(self.Z, Q.x())
+            polys = self._Fs(self.Z, pari(Q.x()))
             EJ_parts.append(polys)
             if i < b - 1:
                 Q, diff = Q.add(step, diff), Q
@@ -478,11 +858,12 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         # in the set K = {4bc+1, ..., ell-2, ell}
         for i in range(2, stop, 2):
             QX, QZ = Q.XZ()
-            hK.append(QZ * self.Z - QX)
+            hK.append(pari(QZ) * self.Z - pari(QX))
             if i < stop - 1:
                 Q, next_point = next_point, next_point.add(step, Q)
 
-        return self.R(prod(hK))
+        # Start from the constant polynomial so hK is always a polynomial
+        return prod(hK, pari.Pol(1))
 
     def _compute_codomain_constants(self):
         """
@@ -490,16 +871,16 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         (A : C) using the VéluSqrt adaptation of the Meyers-Reith
         Twisted Edwards curve trick
         """
+        F = self._domain.base_ring()
+
         # These are the polynomials for alpha = 1 and alpha = -1
         E0J = prod(F0 + F1 + F2 for F0, F1, F2 in self.EJ_parts)
         E1J = prod(F0 - F1 + F2 for F0, F1, F2 in self.EJ_parts)
 
         # Compute resultants and evaluate hK at 1 and -1
-        R0 = self._hI_resultant(E0J)
-        R1 = self._hI_resultant(E1J)
-        M0 = self.hK(1)
-        M1 = self.hK(-1)
-        # M0, M1 = self._hK_codomain()
+        R0, R1 = self._hI_resultants([E0J, E1J])
+        M0 = pari.subst(self.hK, self.Z, 1)
+        M1 = pari.subst(self.hK, self.Z, -1)
 
         # We have that
         # d = [(A - 2C)(A + 2C)]^ell * (hS(1) / hS(-1))^8
@@ -507,8 +888,8 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         # d = [(A - 2C)(A + 2C)]^ell * (hK R(1) / hK R(-1))^8
 
         # First compute (hS(1) / hS(-1))^8
-        num = R0 * M0
-        den = R1 * M1
+        num = F(R0 * M0)
+        den = F(R1 * M1)
 
         # num^8, den^8 with three squares
         num, den = num**2, den**2
@@ -516,8 +897,9 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         num, den = num**2, den**2
 
         # [(A - 2)(A + 2)]^ell
-        num = (self.a - 2) ** self._degree * num
-        den = (self.a + 2) ** self._degree * den
+        a = self._domain.a()
+        num = (a - 2) ** self._degree * num
+        den = (a + 2) ** self._degree * den
 
         # Compute the new curve y^2 = x^3 + (A:C)x^2 + x
         A_new = num + den
@@ -556,35 +938,48 @@ class KummerLineIsogeny_VeluSqrt(KummerLineIsogeny_Generic):
         Res(hI, reverse(EJ0(alpha))) * reverse(hK(alpha))
         -------------------------------------------------- * alpha
                Res(hI, EJ0(alpha)) * hK(alpha)
+        """
+        return self.evaluate_many([P])[0]
 
-
-        This is about 10-15% faster for SageMath, because the
-        reverse is a little slow with the conversion to and from
-        NTL for the Polynomial Ring elements, but should be much
-        faster in other languages.
+    def evaluate_many(self, points):
+        """
+        Evaluate the isogeny phi at all the points, computing all
+        resultants with a single pass through the product tree of hI.
+        The x-coordinates are normalised with one batched inversion
         """
+        F = self._domain.base_ring()
+        images = [self._codomain.zero() for _ in points]
 
-        if P.is_zero():
-            return self._codomain((1, 0))
+        # The identity is sent to the identity
+        finite = [i for i, P in enumerate(points) if not P.is_zero()]
+        if not finite:
+            return images
 
-        # x-coordinate of point to evaluate
-        alpha = P.x()
+        # x-coordinates of points to evaluate
+        Z_invs = batched_inversion(*(points[i].XZ()[1] for i in finite))
+        alphas = [pari(points[i].XZ()[0] * Z_inv) for i, Z_inv in zip(finite, Z_invs)]
 
-        # Compute two polynomials from giant steps
-        EJ1 = prod((F0 * alpha + F1) * alpha + F2 for F0, F1, F2 in self.EJ_parts)
-        EJ0 = EJ1.reverse()
+        # Compute two polynomials from giant steps for each point
+        polys = []
+        for alpha in alphas:
+            EJ1 = prod((F0 * alpha + F1) * alpha + F2 for F0, F1, F2 in self.EJ_parts)
+            EJ0 = pari.polrecip(EJ1)
+            polys += [EJ0, EJ1]
 
-        # Resultants and evaluations
-        R0 = self._hI_resultant(EJ0)
-        R1 = self._hI_resultant(EJ1)
-        M0 = self.hK_reverse(alpha)
-        M1 = self.hK(alpha)
+        # Resultants for all points at once
+        resultants = self._hI_resultants(polys)
 
-        # Make new point
-        X_new = (R0 * M0) ** 2 * alpha
-        Z_new = (R1 * M1) ** 2
+        for n, (i, alpha) in enumerate(zip(finite, alphas)):
+            R0, R1 = resultants[2 * n], resultants[2 * n + 1]
+            M0 = pari.subst(self.hK_reverse, self.Z, alpha)
+            M1 = pari.subst(self.hK, self.Z, alpha)
 
-        return self._codomain((X_new, Z_new))
+            # Make new point
+            X_new = (R0 * M0) ** 2 * alpha
+            Z_new = (R1 * M1) ** 2
+            images[i] = self._codomain((F(X_new), F(Z_new)))
+
+        return images
 
 
 # =============================================== #
@@ -606,16 +1001,176 @@ def evaluate_factored_kummer_isogeny(phi_list, P):
     return P
 
 
-def factored_kummer_isogeny(K, P, order, threshold=1000):
+def evaluate_factored_kummer_isogeny_many(phi_list, points):
+    """
+    Given a list of isogenies, evaluates all the points
+    for each isogeny in the list, without normalising
+    """
+    points = list(points)
+    for phi in phi_list:
+        if not points:
+            break
+        points = phi.evaluate_many(points)
+    return points
+
+
+# Relative cost of multiplying a point by ell against evaluating an
+# ell-isogeny, used for the optimal strategies. These come from the
+# operation counts of the formula:
+#   ell = 3: xTPL (7M + 5S) against a 3-isogeny (4M + 2S)
+#   ell = 4: two xDBL (8M + 4S) against a 4-isogeny (6M + 2S)
+STRATEGY_MUL_COST = {3: 2.0, 4: 1.5}
+
+# Prime degrees above these use VéluSqrt rather than Vélu, for a single
+# KummerLineIsogeny and for the prime power steps of factored_kummer_isogeny.
+# Measured with benchmarks/benchmark_velusqrt.py for 256-bit primes: for
+# a single isogeny (codomain and one image) Vélu takes 0.72ms against
+# 0.74ms for VéluSqrt at ell = 61, 0.96ms against 0.87ms at ell = 83 and
+# 1.18ms against 0.90ms at ell = 101. For kernels of order ell^3, which
+# push the kernel points through every step, Vélu takes 2.83ms against
+# 2.93ms at ell = 53, 3.10ms against 3.09ms at ell = 61 and 3.83ms against
+# 3.51ms at ell = 71. With the previous thresholds of 1500 and 1000, Vélu
+# was used up to ell = 1201, where it takes 13.0ms against 4.7ms.
+VELUSQRT_THRESHOLD = 80
+FACTORED_VELUSQRT_THRESHOLD = 64
+
+
+@functools.lru_cache(maxsize=32)
+def kummer_isogeny_strategy(n, ell):
+    """
+    Optimal strategy for a chain of n ell-isogenies, cached as the
+    same chain lengths are used over and over
+    """
+    return tuple(optimised_strategy_old(n, mul_c=STRATEGY_MUL_COST[ell]))
+
+
+def optimal_kummer_isogeny_chain(ker, n, strategy, multiply, isogeny, points=()):
+    """
+    Compute a chain of n isogenies of degree ell from a kernel point of
+    order ell^n, walking through the tree of multiples of ker with an
+    optimal strategy
+
+    - multiply(T, k) computes [ell^k] T
+    - isogeny(T) computes the ell-isogeny with kernel <T>
+
+    The points are pushed through every step of the chain, and the list
+    of isogenies is returned together with the images of the points
+    """
+    # Bookkeeping for optimal strategy
+    phis = []
+    strat_idx = 0
+    level = [0]
+    kernel_elements = [ker]
+    points = list(points)
+
+    for k in range(n):
+        prev = sum(level)
+        ker = kernel_elements[-1]
+
+        while prev != (n - 1 - k):
+            level.append(strategy[strat_idx])
+
+            # Perform the multiplications
+            ker = multiply(ker, strategy[strat_idx])
+
+            # Update kernel elements and bookkeeping variables
+            kernel_elements.append(ker)
+            prev += strategy[strat_idx]
+            strat_idx += 1
+
+        # Compute the isogeny with kernel of order ell
+        phi = isogeny(ker)
+        phis.append(phi)
+
+        # Remove elements from list
+        kernel_elements.pop()
+        level.pop()
+
+        # Push through points for the next step
+        n_kernel = len(kernel_elements)
+        images = phi.evaluate_many(kernel_elements + points)
+        kernel_elements, points = images[:n_kernel], images[n_kernel:]
+
+    return phis, points
+
+
+def two_power_kummer_isogeny(P, e, strategy=None, points=()):
+    """
+    Compute chain of isogenies quotienting out a point P of order 2^e
+    as a chain of e // 2 isogenies of degree 4 with an optimal strategy,
+    pushing the points through the chain
+
+    When e is odd, the last step is a 2-isogeny with the kernel given
+    by the image of P through the chain of 4-isogenies
+    """
+    n = e // 2
+    if strategy is None and n:
+        strategy = kummer_isogeny_strategy(n, 4)
+
+    # When e is odd, compute the 4-isogenies from [2]P and
+    # push P through the chain for the last 2-isogeny
+    if e % 2:
+        ker = P.double()
+        points = [P] + list(points)
+    else:
+        ker = P
+
+    phis, points = optimal_kummer_isogeny_chain(
+        ker,
+        n,
+        strategy,
+        lambda T, k: T.double_iter(2 * k),
+        lambda T: KummerLineIsogeny_Four(T.parent(), T, check=False),
+        points=points,
+    )
+
+    # Final 2-isogeny, which handles the kernel (0,0)
+    if e % 2:
+        ker, *points = points
+        phi = KummerLineIsogeny_Velu(ker.parent(), ker, 2, check=False)
+        phis.append(phi)
+        points = phi.evaluate_many(points)
+
+    return phis, points
+
+
+def three_power_kummer_isogeny(P, e, strategy=None, points=()):
+    """
+    Compute chain of isogenies quotienting out a point P of order 3^e
+    as a chain of 3-isogenies with an optimal strategy, pushing the
+    points through the chain
+    """
+    if strategy is None:
+        strategy = kummer_isogeny_strategy(e, 3)
+
+    return optimal_kummer_isogeny_chain(
+        P,
+        e,
+        strategy,
+        lambda T, k: T.triple_iter(k),
+        lambda T: KummerLineIsogeny_Three(T.parent(), T, check=False),
+        points=points,
+    )
+
+
+def factored_kummer_isogeny(
+    K, P, order, threshold=FACTORED_VELUSQRT_THRESHOLD, points=()
+):
     """
     Computes a composite degree isogeny using x-only formula
 
+    - Uses chains of 4-isogenies and 3-isogenies with an optimal strategy
+      for the powers of two and three
     - Uses the sparse strategy from the SIDH paper for computing
-      prime power degree isogenies
+      other prime power degree isogenies
     - Uses VéluSqrt when the prime order isogeny has degree > threshold
+
+    Returns the list of isogenies and the images of the points
     """
 
-    def sparse_isogeny_prime_power(P, l, e, split=0.8, threshold=1000):
+    def sparse_isogeny_prime_power(
+        P, l, e, split=0.8, threshold=FACTORED_VELUSQRT_THRESHOLD
+    ):
         """
         Compute chain of isogenies quotienting
         out a point P of order l**e
@@ -650,7 +1205,7 @@ def factored_kummer_isogeny(K, P, order, threshold=1000):
         raise ValueError(f"The supplied kernel must be a point on the line {K}")
 
     # For computing points
-    cofactor = order
+    cofactor = ZZ(order)
     assert (P * order).is_zero()
 
     # TODO: Deal with isomorphisms
@@ -663,24 +1218,35 @@ def factored_kummer_isogeny(K, P, order, threshold=1000):
             "Isomorphisms between Kummer Lines are not yet implemented"
         )
 
-    psi_list = []
     phi_list = []
+    points = list(points)
     for l, e in cofactor.factor():
-        # Map P through chain length e of l-isogenies
-        P = evaluate_factored_kummer_isogeny(psi_list, P)
-        psi_list = []
-
         # Compute point Q of order l^e
         D = ZZ(l**e)
         cofactor //= D
 
         # Use Q as kernel of degree l^e isogeny
         Q = cofactor * P
-        psi_list = sparse_isogeny_prime_power(Q, l, e, threshold=threshold)
+
+        # P is only needed while there are more factors to compute
+        # so we push it through the chain together with the points
+        if cofactor != 1:
+            points = [P] + points
+
+        if l == 2:
+            psi_list, points = two_power_kummer_isogeny(Q, e, points=points)
+        elif l == 3:
+            psi_list, points = three_power_kummer_isogeny(Q, e, points=points)
+        else:
+            psi_list = sparse_isogeny_prime_power(Q, l, e, threshold=threshold)
+            points = evaluate_factored_kummer_isogeny_many(psi_list, points)
+
+        if cofactor != 1:
+            P, *points = points
 
         phi_list += psi_list
 
-    return phi_list
+    return phi_list, points
 
 
 class KummerLineIsogeny(KummerLineIsogeny_Generic):
@@ -690,14 +1256,18 @@ class KummerLineIsogeny(KummerLineIsogeny_Generic):
     EllipticCurveHom_composite but using x-only formula
     """
 
-    def __init__(self, domain, kernel, degree, check=True, threshold=1500):
+    def __init__(
+        self, domain, kernel, degree, check=True, threshold=VELUSQRT_THRESHOLD, points=()
+    ):
         # Check the input to the isogeny is well-formed
         self.validate_input(domain, kernel, degree, check=check)
 
-        # Compute factored isogeny
-        self._phis = factored_kummer_isogeny(
-            domain, kernel, degree, threshold=threshold
+        # Compute factored isogeny, and push the points through
+        # each factor as it is computed
+        self._phis, images = factored_kummer_isogeny(
+            domain, kernel, degree, threshold=threshold, points=points
         )
+        self._images = tuple(images)
 
         # Make immutable
         self._phis = tuple(self._phis)
@@ -713,6 +1283,26 @@ class KummerLineIsogeny(KummerLineIsogeny_Generic):
         """
         return evaluate_factored_kummer_isogeny(self._phis, P)
 
+    def evaluate_many(self, points, normalise=True):
+        """
+        Evaluate the composite isogeny on all of the points, running
+        each factor over the whole list.
+
+        When normalise is True, the images are returned as (x : 1)
+        with one batched inversion at the end of the chain.
+        """
+        images = evaluate_factored_kummer_isogeny_many(self._phis, points)
+        if not normalise:
+            return images
+        return self._codomain.normalise_many(images)
+
+    def images(self):
+        """
+        Return the images of the points which were pushed through
+        the isogeny chain while it was computed
+        """
+        return self._images
+
     @classmethod
     def from_factors(cls, maps):
         """
@@ -737,6 +1327,7 @@ class KummerLineIsogeny(KummerLineIsogeny_Generic):
 
         # Make immutable
         result._phis = maps
+        result._images = ()
 
         # Compute degree, domain and codomain
         result._degree = prod(phi.degree() for phi in result._phis)
@@ -52,19 +52,27 @@ Additionally, one can call `xP.double()` to perform x-only point addition
 and xP.add(xQ, xPQ) to perform differential addition to recover xP + xQ
 where xPQ = x(P - Q).
 
+Repeated doublings and triplings [2^n]xP and [3^n]xP are computed with
+`xP.double_iter(n)` and `xP.triple_iter(n)`.
+
 The 3 point ladder `xQ.ladder_3_pt(xP, xPQ, m) computes xP + [m]xQ
 
 xP.multiples() generates values [l]xP by repeated differential addition. This
 is used for isogeny computations where we want to collect the the first d points
 for an isogeny of degree ell = 2d+1. 
 """
-from sage.all import cached_method, Integer, EllipticCurve
+from sage.misc.cachefunc import cached_method
+from sage.rings.integer import Integer
+from sage.misc.lazy_import import lazy_import
 
 from sage.structure.element import RingElement
 from sage.schemes.elliptic_curves.ell_generic import EllipticCurve_generic
 from sage.schemes.elliptic_curves.ell_point import EllipticCurvePoint_field
 
 from utilities.fast_sqrt import sqrt_Fp2
+from utilities.batched_inversion import batched_inversion
+
+lazy_import("sage.schemes.elliptic_curves.constructor", "EllipticCurve")
 
 # =================================================== #
 #     Class for the Kummer Line x(x^2 + Ax + 1)       #
@@ -208,6 +216,91 @@ class KummerLine:
         """
         return self._A / self._C
 
+    @cached_method
+    def ladder_constants(self):
+        """
+        Compute the projective constants (A24 : C24) = (A + 2C : 4C)
+        used in the doubling step of the Montgomery ladder
+        """
+        A, C = self.extract_constants()
+        A24 = C + C
+        C24 = A24 + A24
+        A24 = A24 + A
+        return A24, C24
+
+    def multiply_many(self, points, m, normalise=False):
+        """
+        Compute [m]P for every P in points with a single Montgomery
+        ladder, processing all (X : Z) pairs for each bit of m.
+
+        The curve constants and the bits of m are only computed once,
+        which removes most of the per-point overhead when many points
+        are multiplied by the same scalar, e.g. when clearing cofactors.
+
+        When normalise is True, the outputs are returned as (x : 1)
+        using a single inversion for the whole batch. Points which
+        are sent to the identity are returned as (1 : 0).
+        """
+        if not isinstance(m, (int, Integer)):
+            try:
+                m = Integer(m)
+            except:
+                raise TypeError(f"Cannot coerce input scalar {m = } to an integer")
+
+        for P in points:
+            if P.parent() != self:
+                raise ValueError("All points must lie on this Kummer Line")
+
+        # If m is zero, everything is sent to the identity
+        if not m:
+            return [self.zero() for _ in points]
+
+        # [m]P = [-m]P for x-only
+        m = abs(m)
+
+        R = self.base_ring()
+        A24, C24 = self.ladder_constants()
+        xDBLADD = KummerPoint.xDBLADD
+
+        # Ladder state for each point, the input coordinates
+        # are kept separately as the fixed difference
+        bases = [P.XZ() for P in points]
+        R0 = [(R.one(), R.zero()) for _ in points]
+        R1 = list(bases)
+
+        # Montgomery-ladder
+        for bit in bin(m)[2:]:
+            for i, (XP, ZP) in enumerate(bases):
+                X0, Z0 = R0[i]
+                X1, Z1 = R1[i]
+                if bit == "0":
+                    X0, Z0, X1, Z1 = xDBLADD(X0, Z0, X1, Z1, XP, ZP, A24, C24)
+                else:
+                    X1, Z1, X0, Z0 = xDBLADD(X1, Z1, X0, Z0, XP, ZP, A24, C24)
+                R0[i] = (X0, Z0)
+                R1[i] = (X1, Z1)
+
+        points = [self(c) for c in R0]
+        if not normalise:
+            return points
+        return self.normalise_many(points)
+
+    def normalise_many(self, points):
+        """
+        Return the points as (x : 1) using a single inversion for
+        the whole batch. Points at infinity are returned as (1 : 0).
+        """
+        R = self.base_ring()
+        coords = [P.XZ() for P in points]
+
+        # Normalise all non-identity points with one inversion
+        finite = [i for i, (_, Z) in enumerate(coords) if Z]
+        if finite:
+            Z_invs = batched_inversion(*(coords[i][1] for i in finite))
+            for i, Z_inv in zip(finite, Z_invs):
+                coords[i] = (coords[i][0] * Z_inv, R.one())
+        return [self(c) if c[1] else self.zero() for c in coords]
+
 # ====================================================== #
 #  Class for points on the Kummer Line x(x^2 + Ax + 1)   #
 # ====================================================== #
@@ -356,6 +449,42 @@ class KummerPoint:
         
         return X2, Z2
 
+    @staticmethod
+    def xTPL(X, Z, A24m, A24p):
+        """
+        function for Montgomery tripling with projective curve constant
+
+        Input:  projective point P = (X:Z), curve constants
+                (A24m : A24p) = (A - 2C : A + 2C)
+        Output: projective point [3]P = (X3:Z3)
+
+        Cost: 7M + 5S + 10a
+        """
+        t0 = X - Z
+        t2 = t0**2
+        t1 = X + Z
+        t3 = t1**2
+        t4 = t1 + t0
+        t0 = t1 - t0
+        t1 = t4**2
+        t1 = t1 - t3
+        t1 = t1 - t2
+        t5 = t3 * A24p
+        t3 = t5 * t3
+        t6 = t2 * A24m
+        t2 = t2 * t6
+        t3 = t2 - t3
+        t2 = t5 - t6
+        t1 = t2 * t1
+        t2 = t3 + t1
+        t2 = t2**2
+        X3 = t2 * t4
+        t1 = t3 - t1
+        t1 = t1**2
+        Z3 = t1 * t0
+
+        return X3, Z3
+
     @staticmethod
     def xADD(XP, ZP, XQ, ZQ, xPQ, zPQ):
         """
@@ -444,7 +573,37 @@ class KummerPoint:
         if not self._Z:
             return self
         return self._double()
-    
+
+    def double_iter(self, n):
+        """
+        Compute [2^n] * self with n repeated x-only doublings,
+        which is cheaper than the Montgomery ladder for the
+        scalar 2^n
+        """
+        X, Z = self.XZ()
+        A, C = self._parent.extract_constants()
+        for _ in range(n):
+            X, Z = self.xDBL(X, Z, A, C)
+        return self._parent((X, Z))
+
+    def triple_iter(self, n):
+        """
+        Compute [3^n] * self with n repeated x-only triplings
+        """
+        X, Z = self.XZ()
+        A, C = self._parent.extract_constants()
+        C2 = C + C
+        A24m, A24p = A - C2, A + C2
+        for _ in range(n):
+            X, Z = self.xTPL(X, Z, A24m, A24p)
+        return self._parent((X, Z))
+
+    def triple(self):
+        """
+        Returns [3] * self
+        """
+        return self.triple_iter(1)
+
     def _add(self, Q, PQ):
         """
         Performs differential addition assuming 
@@ -508,11 +667,8 @@ class KummerPoint:
         X0, Z0 = R.one(), R.zero()
         X1, Z1 = XP, ZP
                 
-        # Converting parameters for projective DBLADD -> (A24:C24)=(A+2C:4C)
-        A, C = self.parent().extract_constants()
-        A24 = C + C                     
-        C24 = A24 + A24
-        A24 = A24 + A
+        # Parameters for projective DBLADD -> (A24:C24)=(A+2C:4C)
+        A24, C24 = self.parent().ladder_constants()
 
         # Montgomery-ladder
         for bit in bin(m)[2:]:
@@ -550,11 +706,8 @@ class KummerPoint:
         # [m]P = [-m]P for x-only
         m = abs(m)
 
-        # Converting parameters for projective DBLADD -> (A24:C24)=(A+2C:4C)
-        A, C = self.parent().extract_constants()
-        A24 = C + C                     
-        C24 = A24 + A24
-        A24 = A24 + A
+        # Parameters for projective DBLADD -> (A24:C24)=(A+2C:4C)
+        A24, C24 = self.parent().ladder_constants()
 
         # Extract out coordinates
         XQ, ZQ = self.XZ()
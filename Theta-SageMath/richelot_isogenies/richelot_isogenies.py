@@ -30,16 +30,104 @@ attack, as well as the variant of the attack described by Oudompheng. See:
 """
 
 # Sage imports
-from sage.all import (
-    PolynomialRing,
-    EllipticCurve,
-    Matrix,
-)
+from sage.misc.lazy_import import lazy_import
+
+lazy_import("sage.schemes.elliptic_curves.constructor", "EllipticCurve")
 
 # local imports
-from richelot_isogenies.divisor_arithmetic import affine_dbl_iter, affine_add
-from utilities.supersingular import weil_pairing_pari
-from utilities.polynomial_inversion import invert_mod_polynomial_quadratic, invert_mod_polynomial_quartic
+from richelot_isogenies.divisor_arithmetic import (
+    affine_add,
+    affine_dbl_iter_many,
+    projective_dbl_iter_many,
+)
+from utilities.batched_inversion import batched_inversion
+from utilities.discrete_log import weil_pairing_pari
+from utilities.polynomial_inversion import invert_mod_quartic_coefficients_many
+
+# ========================================================= #
+#  Helper functions for polynomials as coefficient lists    #
+#  [c0, c1, ..., cn], which avoid the overhead of SageMath  #
+#  polynomial objects                                       #
+# ========================================================= #
+
+def _poly_mul(f, g):
+    """
+    Schoolbook product of the polynomials f and g
+
+    Cost: deg(f)*deg(g)M
+    """
+    fg = [0] * (len(f) + len(g) - 1)
+    for i, fi in enumerate(f):
+        for j, gj in enumerate(g):
+            fg[i + j] += fi * gj
+    return fg
+
+def _poly_rem_monic(f, g):
+    """
+    Compute f mod g for the monic polynomial g, where
+    g is given by its coefficients without the leading one
+
+    Cost: (deg(f) - deg(g) + 1)*deg(g)M
+    """
+    n = len(g)
+    f = list(f)
+    for k in range(len(f) - 1, n - 1, -1):
+        fk = f[k]
+        for i, gi in enumerate(g):
+            f[k - n + i] -= fk * gi
+    return f[:n]
+
+def _kernel_quadratics(D1, D2):
+    """
+    The monic quadratics G1 = u(D1), G2 = u(D2) as 
+    coefficient lists
+    """
+    u11, u10, _, _ = D1
+    u21, u20, _, _ = D2
+    one = u11.parent().one()
+    return [u10, u11, one], [u20, u21, one]
+
+def _third_quadratic(h, G1, G2):
+    """
+    Given the sextic h and monic quadratics G1, G2 which
+    divide h, compute G3 = h / (G1 * G2)
+
+    Cost: 16M, of which 9M check the remainder
+    """
+    # 4M, as G1 and G2 are monic
+    g0, g1, g2, g3, _ = _poly_mul(G1, G2)
+
+    # Quotient by the monic quartic G1*G2
+    q2 = h[6]
+    q1 = h[5] - q2*g3
+    q0 = h[4] - q2*g2 - q1*g3
+
+    # Ensure the remainder is zero
+    assert h[3] == q2*g1 + q1*g2 + q0*g3
+    assert h[2] == q2*g0 + q1*g1 + q0*g2
+    assert h[1] == q1*g0 + q0*g1
+    assert h[0] == q0*g0
+
+    return [q0, q1, q2]
+
+def _delta_cofactors(G1, G2, G3):
+    """
+    For the matrix delta with rows the coefficients of 
+    G1, G2, G3 compute the cofactors of each row and the 
+    determinant of delta
+
+    Cost: 21M
+    """
+    rows = (G1, G2, G3)
+    cofactors = []
+    for j in range(3):
+        m0, m1, m2 = rows[(j + 1) % 3]
+        n0, n1, n2 = rows[(j + 2) % 3]
+        cofactors.append((m1*n2 - m2*n1, m2*n0 - m0*n2, m0*n1 - m1*n0))
+
+    C0, C1, C2 = cofactors[0]
+    det = G1[0]*C0 + G1[1]*C1 + G1[2]*C2
+    return cofactors, det
 
 def FromProdToJac(P2, Q2, R2, S2):
     """
@@ -47,12 +135,7 @@ def FromProdToJac(P2, Q2, R2, S2):
     https://ia.cr/2022/1283
     """
     Fp2 = R2.curve().base()
-
-    # NOTE: we use a generic implementation of the PolynomialRing
-    # as this is faster than NTL in this scenario due to the slowness
-    # of coefficient extraction and polynomial construction!
-    R = PolynomialRing(Fp2, name="x", implementation="generic")
-    x = R.gens()[0]
+    zero = Fp2.zero()
 
     # Extract roots.
     ai = (P2[0], Q2[0], (P2 + Q2)[0])
@@ -99,8 +182,7 @@ def FromProdToJac(P2, Q2, R2, S2):
     h4 = -s1*(alpha_1 + alpha_2 + alpha_3)
     h6 = s1
 
-    h_coeffs = [h0,h1,h2,h3,h4,h5,h6]
-    h = R(h_coeffs)
+    h = [h0,h1,h2,h3,h4,h5,h6]
 
     # We need the image of (P1, P2) and (Q1, Q2) in J
     # The image of (P1, P2) is the image of P1 as a divisor on H
@@ -114,10 +196,9 @@ def FromProdToJac(P2, Q2, R2, S2):
         # so we compute Mumford coordinates of the divisor f^-1(P_c): a(x), y-b(x)
         if P1:
             xP1, yP1 = P1.xy()
-            uP1 = x**2 + (s2 - xP1) * s1_inv
-            vP1 = R(yP1 * s1_inv)
-
-            DP1 = (uP1, vP1)
+            # uP1 = x^2 + (s2 - xP1) / s1
+            # vP1 = yP1 / s1
+            DP1 = (zero, (s2 - xP1) * s1_inv, zero, yP1 * s1_inv)
 
         # Same for E
         # H->E: (xE = s2 x² + s1, yE = s2 y/x^3)
@@ -125,14 +206,11 @@ def FromProdToJac(P2, Q2, R2, S2):
             xP2, yP2 = P2.xy()
             shift_inv = 1 / (xP2 - s1)
             
-            uP2 =  x**2 - s2 * shift_inv
-        
+            # uP2 = x^2 - s2 / (xP2 - s1)
             # mod uP2 we have that
             # x^2 = s2 / (xP2 - s1)
-            # vP2 = yP2 * x**3 * s2_inv
-            vP2 = x * yP2 * shift_inv
-
-            DP2 = (uP2, vP2)
+            # vP2 = yP2 * x**3 * s2_inv = x * yP2 / (xP2 - s1)
+            DP2 = (zero, -s2 * shift_inv, yP2 * shift_inv, zero)
 
         # Now we perform addition of the two divisors
         if P1 and P2:
@@ -180,31 +258,97 @@ class RichelotCorr:
     * 1 has coefficient Gred1(xa) Gred1(xb) h1(x)^2 (x-xa)(x-xb)
                       = Gred1(xa) Gred1(xb) h1(x)^2 U(x)
       (x-degree 4)
+
+    All polynomials are given as lists of coefficients [c0, c1, ...]
+    and divisors as tuples D = (u1, u0, v1, v0) with U monic.
     """
     def __init__(self, G1, G2, H1, H2, hnew):
         self.G1 = G1
         self.G2 = G2
         self.H1 = H1
-        self.H11 = H1*H1
-        self.H12 = H1*H2
-        self.H22 = H2*H2
+        self.H11 = _poly_mul(H1, H1)
+        self.H12 = _poly_mul(H1, H2)
+        self.H22 = _poly_mul(H2, H2)
         self.hnew = hnew
-        self.x = hnew.parent().gen()
+
+    def __call__(self, D):
+        return self.map(D)
 
     def map(self, D):
-        "Computes (non-monic) Mumford coordinates for the image of D"
-        U, V = D
-        U = U.monic()
-        V = V % U
-        
+        "Computes Mumford coordinates for the image of D"
+        return self.map_many([D])[0]
+
+    def map_many(self, divisors):
+        """
+        Computes Mumford coordinates for the images of all divisors,
+        where every inversion is shared between the divisors with
+        Montgomery's trick
+        """
+        if not divisors:
+            return []
+
+        hnew = self.hnew
+        numerators = [self._map_numerators(D) for D in divisors]
+
+        # Make Px monic, this only scales Dx below
+        lc_invs = batched_inversion(*(Px[4] for Px, _, _ in numerators))
+
+        Pxs, Py1s, Py_nums = [], [], []
+        for (Px, Py1, Py_num), lc_inv in zip(numerators, lc_invs):
+            Px = [Pxi * lc_inv for Pxi in Px[:4]]
+            Pxs.append(Px)
+            Py1s.append(Py1)
+            Py_nums.append(_poly_rem_monic(Py_num, Px))
+
+        # Now reduce the divisor, and compute Cantor reduction.
+        # Py2 * y^2 + Py1 * y + Py0 = 0
+        # y = - (Py2 * hnew + Py0) / Py1
+        Py1invs = invert_mod_quartic_coefficients_many(Py1s, Pxs)
+
+        Pys, Dxs = [], []
+        for Px, Py1inv, Py_num in zip(Pxs, Py1invs, Py_nums):
+            Py = _poly_mul(Py1inv, Py_num)
+            y0, y1, y2, y3 = [-yi for yi in _poly_rem_monic(Py, Px)]
+            Pys.append((y0, y1, y2, y3))
+
+            # Dx = (hnew - Py^2) // Px, only the top three
+            # coefficients of hnew - Py^2 are needed
+            c6 = hnew[6] - y3 * y3
+            c5 = hnew[5] - 2 * y2 * y3
+            c4 = hnew[4] - y2 * y2 - 2 * y1 * y3
+            q1 = c5 - c6 * Px[3]
+            q0 = c4 - c6 * Px[2] - q1 * Px[3]
+            Dxs.append((c6, q1, q0))
+
+        # Make Dx monic with one inversion
+        lc_invs = batched_inversion(*(Dx[0] for Dx in Dxs))
+
+        images = []
+        for (_, q1, q0), (y0, y1, y2, y3), lc_inv in zip(Dxs, Pys, lc_invs):
+            d1, d0 = q1 * lc_inv, q0 * lc_inv
+
+            # Dy = -Py mod Dx using
+            # x^2 = -d1*x - d0 and x^3 = (d1^2 - d0)*x + d1*d0
+            Dy1 = y2 * d1 - y1 - y3 * (d1 * d1 - d0)
+            Dy0 = y2 * d0 - y0 - y3 * d1 * d0
+            images.append((d1, d0, Dy1, Dy0))
+        return images
+
+    def _map_numerators(self, D):
+        """
+        Compute the non-reduced image of the divisor D = (u1, u0, v1, v0)
+        as the polynomials Px and Py1, Py_num such that the image is
+        Py1 * y + Py_num = 0 mod Px
+        """
+        u1, u0, v1, v0 = D
+        H1, H11, H12, H22 = self.H1, self.H11, self.H12, self.H22
+
         # Sum and product of (xa, xb)
-        s, p = -U[1], U[0]
+        s, p = -u1, u0
         
         # Compute X coordinates (non reduced, degree 4)
-        g1red = self.G1 - U
-        g2red = self.G2 - U
-        g11, g10 = g1red[1], g1red[0]
-        g21, g20 = g2red[1], g2red[0]
+        g11, g10 = self.G1[1] - u1, self.G1[0] - u0
+        g21, g20 = self.G2[1] - u1, self.G2[0] - u0
 
         # Precompute and reuse some multiplications
         tt = g11*p
@@ -213,12 +357,11 @@ class RichelotCorr:
         t2 = g10*g20
 
         # see above
-        Px = t0 * self.H11 \
-           + (t1 + t1 + (g11*g20 + g21*g10)*s + t2 + t2) * self.H12 \
-           + (g21*(g21*p + g20*s) + g20*g20) * self.H22
+        c12 = t1 + t1 + (g11*g20 + g21*g10)*s + t2 + t2
+        c22 = g21*(g21*p + g20*s) + g20*g20
+        Px = [t0*H11[i] + c12*H12[i] + c22*H22[i] for i in range(5)]
 
         # Compute Y coordinates (non reduced, degree 3)
-        v1, v0 = V[1], V[0]
         # coefficient of y^2 is V(xa)V(xb)
         Py2 = v1*v1*p + v1*v0*s + v0*v0
         
@@ -236,51 +379,49 @@ class RichelotCorr:
         z2 = v0*g11
         z3 = v0*g10
 
-        Py1 = (z0 + z0 + z3 + z3 + s*(z1 + z2))*self.x \
-            - (p*(z1 + z1 - z2 - z2) + s*(z0 + s*z2 + z3))
-        Py1 *= self.H1
-        # coefficient of 1 is Gred1(xa) Gred1(xb) h1(x)^2 U(x)
-        Py0 = self.H11 * U * t0
+        # Py1 = (e1*x - e0) * h1(x)
+        e1 = z0 + z0 + z3 + z3 + s*(z1 + z2)
+        e0 = p*(z1 + z1 - z2 - z2) + s*(z0 + s*z2 + z3)
+        Py1 = [
+            -e0*H1[0],
+            e1*H1[0] - e0*H1[1],
+            e1*H1[1] - e0*H1[2],
+            e1*H1[2],
+        ]
 
-        # Now reduce the divisor, and compute Cantor reduction.
-        # Py2 * y^2 + Py1 * y + Py0 = 0
-        # y = - (Py2 * hnew + Py0) / Py1
-        Py1inv = invert_mod_polynomial_quartic(Py1, Px)
-        Py = (- Py1inv * (Py2 * self.hnew + Py0)) % Px
+        # coefficient of 1 is Gred1(xa) Gred1(xb) h1(x)^2 U(x)
+        Py0 = _poly_mul(H11, [t0*u0, t0*u1, t0])
+        Py_num = [Py2*hi + Py0i for hi, Py0i in zip(self.hnew, Py0)]
 
-        Dx = ((self.hnew - Py*Py) // Px)
-        Dy = (-Py) % Dx
-        return (Dx, Dy)
+        return Px, Py1, Py_num
 
 def FromJacToJac(h, D1, D2):
     """
-    Isogeny between J(H) -> J(H') with kernel ((D11, D12), (D21, D22))
-    where D1, D2 are divisors on J(H) and Dij are the Mumford coordinates
-    of the divisors Di
+    Isogeny between J(H) -> J(H') with kernel (D1, D2) where 
+    D1, D2 are divisors on J(H) in Mumford coordinates 
+    (u1, u0, v1, v0)
     """
-    x = h.parent().gen()
-
-    G1, G2 = D1[0].monic(), D2[0].monic()
-    G3, r3 = h.quo_rem(G1 * G2)
-    assert r3 == 0
+    G1, G2 = _kernel_quadratics(D1, D2)
+    G3 = _third_quadratic(h, G1, G2)
 
     # H1 = 1/det (G2[1]*G3[0] - G2[0]*G3[1])
     #        +2x (G2[2]*G3[0] - G3[2]*G2[0])
     #        +x^2(G2[1]*G3[2] - G3[1]*G2[2])
     # The coefficients correspond to the inverse matrix of delta.
+    cofactors, det = _delta_cofactors(G1, G2, G3)
+    det_inv = 1 / det
 
-    delta = Matrix(G.padded_list(3) for G in (G1,G2,G3))
-    delta = delta.inverse()
-    H1 = -delta[0][0]*x**2 + 2*delta[1][0]*x - delta[2][0]
-    H2 = -delta[0][1]*x**2 + 2*delta[1][1]*x - delta[2][1]
-    H3 = -delta[0][2]*x**2 + 2*delta[1][2]*x - delta[2][2]
+    H1, H2, H3 = [
+        [-C2 * det_inv, 2 * C1 * det_inv, -C0 * det_inv]
+        for C0, C1, C2 in cofactors
+    ]
 
     # New hyperelliptic curve H'
-    hnew = H1*H2*H3
+    hnew = _poly_mul(_poly_mul(H1, H2), H3)
 
     # Class to compute the evaluation of the isogeny
     R = RichelotCorr(G1, G2, H1, H2, hnew)
-    return hnew, R.map
+    return hnew, R
 
 def FromJacToProd(G1, G2, G3, N_constant=None):
     """
@@ -290,15 +431,14 @@ def FromJacToProd(G1, G2, G3, N_constant=None):
     This computation is the same as Benjamin Smith
     see 8.3 in http://iml.univ-mrs.fr/~kohel/phd/thesis_smith.pdf
 
+    The quadratics Gi are given as lists of coefficients [bi, ai, gi]
+
     Cost: 42M 1S 1I + 1 sqrt
     """
-    R = G1.parent()
-    x = R.gen()
-
     # make monic for SL2 transform
-    b1, a1, g1 = G1.list()
-    b2, a2, g2 = G2.list()
-    b3, a3, g3 = G3.list()
+    b1, a1, g1 = G1
+    b2, a2, g2 = G2
+    b3, a3, g3 = G3
 
     # Montgomery trick to compute
     # inverse of gi 
@@ -334,12 +474,15 @@ def FromJacToProd(G1, G2, G3, N_constant=None):
         DD = D * D
 
     # Mapping to remove linear terms
-    u1 = q + D
-    u2 = q - D
-    v1 = r
-    v2 = r
-    u_map = R([-u1, u2])
-    v_map = R([v1, -v2])
+    # u_map = m2*x - m1
+    # v_map = r*(1 - x)
+    m1 = q + D
+    m2 = q - D
+    m12 = m1 + m2
+    m1m1 = m1 * m1
+    m2m2 = m2 * m2
+    m1m2 = m1 * m2
+    r2 = r * r
 
     # Compute coefficients of 
     # Fi = beta_i x^2 + gamma_i
@@ -382,12 +525,13 @@ def FromJacToProd(G1, G2, G3, N_constant=None):
 
     # Applying the projection to the above, we get two 
     # cubics
-    E1_poly = R([c0,c1,c2,c3])
-    E2_poly = E1_poly.reverse()
+    # E1_poly = c3*x^3 + c2*x^2 + c1*x + c0
+    # E2_poly = c0*x^3 + c1*x^2 + c2*x + c3
 
     # For SageMath, we need this cubic to be monic
     # we work with the scaled coefficients and then
-    # map to the curves with `morphE1` and `morphE2`
+    # map to the curves with the scalings beta123
+    # and gamma123
     # Cost: 4M
     e12 = c2
     e11 = beta123*c1
@@ -400,64 +544,92 @@ def FromJacToProd(G1, G2, G3, N_constant=None):
     E1 = EllipticCurve([0, e12, 0, e11, e10])
     E2 = EllipticCurve([0, e22, 0, e21, e20])
 
-    def morphE1(x, y):
-        # from y^2=p1 to y^2=p1norm
-        return (beta123*x, beta123*y)
-    
-    def morphE2(x, y):
-        # from y^2=p2 to y^2=p2norm
-        return (gamma123*x, gamma123*y)
-
     def isogeny(D):
         # To map a divisor, perform the change of coordinates
         # on Mumford coordinates
-        U_input, V_input = D
+        u1, u0, v1, v0 = D
         
         # apply homography
+        # U = u0 * v_map^2 + u1 * u_map * v_map + u_map^2
+        u0r2 = u0 * r2
+        u1r  = u1 * r
+        U0 = u0r2 - u1r * m1 + m1m1
+        U1 = u1r * m12 - (u0r2 + u0r2) - (m1m2 + m1m2)
+        U2 = u0r2 - u1r * m2 + m2m2
+
         # y = v1 x + v0 =>
-        U = U_input[0] * v_map**2 + U_input[1]*u_map*v_map + U_input[2]*u_map**2
-        V = V_input[0] * v_map**3 + V_input[1]*u_map*v_map**2
-        V = V % U
+        # V = v0 * v_map^3 + v1 * u_map * v_map^2
+        #   = r^2 (1 - x)^2 (w1*x + w0)
+        w0 = v0 * r - v1 * m1
+        w1 = v1 * m2 - v0 * r
+        V0 = r2 * w0
+        V1 = r2 * (w1 - w0 - w0)
+        V2 = r2 * (w0 - w1 - w1)
+        V3 = r2 * w1
 
-        # Extract coefficents from V
-        v1, v0 = V[1], V[0]
-        
         # Prepare symmetric functions
-        s = - U[1] / U[2]
-        p = U[0] / U[2]
+        U2_inv = 1 / U2
+        s = -U1 * U2_inv
+        p = U0 * U2_inv
+
+        # V mod U using x^2 = s*x - p and x^3 = (s^2 - p)*x - s*p
+        ss = s * s
+        v1 = V1 + V2 * s + V3 * (ss - p)
+        v0 = V0 - V2 * p - V3 * s * p
+
+        # Points x1, x2 map to x1^2, x2^2 on E1 and
+        # to 1/x1^2, 1/x2^2 on E2
+        ap = ss - p - p
+        pp = p * p
+        k  = v1 * ap + v0 * s
+
+        # Inversions for both curves
+        inv_2v0, inv_k, p_inv = batched_inversion(v0 + v0, k, p)
 
         # Compute Mumford coordinates on E1
-        # Points x1, x2 map to x1^2, x2^2
-        U1 = x**2 - (s*s - 2*p)*x + p**2
+        # U1 = x^2 - ap*x + pp
         # y = v1 x + v0 becomes (y - v0)^2 = v1^2 x^2
         # so 2v0 y-v0^2 = p1 - v1^2 xH^2 = p1 - v1^2 xE1
-        V1 = (E1_poly - v1**2 * x + v0**2) / (2*v0)
+        # V1 = (E1_poly - v1^2 * x + v0^2) / (2*v0) mod U1
+        # with x^2 = ap*x - pp and x^3 = (ap^2 - pp)*x - ap*pp
+        y1 = c1 + c2 * ap + c3 * (ap * ap - pp) - v1 * v1
+        y0 = c0 - (c2 + c3 * ap) * pp + v0 * v0
+        y1 *= inv_2v0
+        y0 *= inv_2v0
+
         # Reduce Mumford coordinates to get a E1 point
-        V1 = V1 % U1
-        U1red = (E1_poly - V1**2) // U1
-        xP1 = -U1red[0] / U1red[1]
-        yP1 = V1(xP1)
+        # (E1_poly - V1^2) // U1 = c3*x + q0 and xP1 = -q0 / c3
+        # As c3 = beta123 the scaling to E1 is free
+        q0 = c2 - y1 * y1 + c3 * ap
+        xP1 = -q0
+        yP1 = y1 * xP1 + c3 * y0
 
         # Same for E2
-        # Points x1, x2 map to 1/x1^2, 1/x2^2
-        U2 = x**2 - (s*s-2*p)/p**2*x + 1/p**2
+        # U2 = x^2 - ap/p^2*x + 1/p^2
         # yE = y1/x1^3, xE = 1/x1^2
         # means yE = y1 x1 xE^2
         # (yE - y1 x1 xE^2)(yE - y2 x2 xE^2) = 0
         # p2 - yE (x1 y1 + x2 y2) xE^2 + (x1 y1 x2 y2 xE^4) = 0
-        V21 = x**2 * (v1 * (s*s-2*p) + v0*s)
-        V20 = E2_poly + x**4 * (p*(v1**2*p + v1*v0*s + v0**2))
-        # V21 * y = V20
-        V21 = V21 % U2
-        V21inv = invert_mod_polynomial_quadratic(V21, U2)
-        V2 = (V21inv * V20) % U2
+        # so V2 = (E2_poly + m * x^4) / (k * x^2) mod U2 where
+        # m = p*(v1^2*p + v1*v0*s + v0^2), and mod U2 we have
+        # x^2 = (ap*x - 1)/p^2, 1/x = ap - p^2*x and
+        # 1/x^2 = ap^2 - pp - ap*pp*x
+        mp = (v1 * v1 * p + v1 * v0 * s + v0 * v0) * p_inv
+        c2pp = c2 * pp
+        c3ap = c3 * ap
+        y1 = mp * ap + c0 - c2pp - c3ap * pp
+        y0 = c1 + c2 * ap + c3ap * ap - c3 * pp - mp
+        y1 *= inv_k
+        y0 *= inv_k
 
         # Reduce coordinates
-        U2red = (E2_poly - V2**2) // U2
-        xP2 = -U2red[0] / U2red[1]
-        yP2 = V2(xP2)
+        # (E2_poly - V2^2) // U2 = c0*x + q0 and xP2 = -q0 / c0
+        # As c0 = gamma123 the scaling to E2 is free
+        q0 = c1 - y1 * y1 + c0 * ap * p_inv * p_inv
+        xP2 = -q0
+        yP2 = y1 * xP2 + c0 * y0
 
-        return E1(morphE1(xP1, yP1)), E2(morphE2(xP2, yP2))
+        return E1(xP1, yP1), E2(xP2, yP2)
 
     return (E1, E2), isogeny
 
@@ -505,7 +677,7 @@ def _check_maximally_isotropic(P, Q, R, S, a):
 
     return True, two_torsion
 
-def split_richelot_chain(P, Q, R, S, a, N_constant, strategy):
+def split_richelot_chain(P, Q, R, S, a, N_constant, strategy, projective=False):
     r"""
     Given curves C, E and points (P, Q) \in E
                                  (R, S) \in E'
@@ -518,6 +690,10 @@ def split_richelot_chain(P, Q, R, S, a, N_constant, strategy):
     and None otherwise
 
     We expect this to fail only on malformed ciphertexts!
+
+    When projective is True, the kernel divisors are doubled in
+    projective Mumford coordinates, which is slower for every field
+    size we have measured (see `divisor_arithmetic.py`)
     """
     # We will output the final codomain as well as the isogeny
     # Phi : (E1, E2) -> J -> J -> ... -> J -> J -> (E3, E4)
@@ -553,6 +729,7 @@ def split_richelot_chain(P, Q, R, S, a, N_constant, strategy):
     # and `kernel_elements`
     ker = (D1, D2)
     kernel_elements = [ker]
+    dbl_iter_many = projective_dbl_iter_many if projective else affine_dbl_iter_many
 
     # ======================================= #
     #  Middle Steps                           #
@@ -564,11 +741,9 @@ def split_richelot_chain(P, Q, R, S, a, N_constant, strategy):
         while prev != (a - 1 - i):
             level.append(strategy[strat_idx])
             # Perform repeated doublings to compute
-            # D_new = 2^strategy[strat_idx] D
-            D1, D2 = ker
-            D1 = affine_dbl_iter(h, D1[0], D1[1], strategy[strat_idx])
-            D2 = affine_dbl_iter(h, D2[0], D2[1], strategy[strat_idx])
-            ker = (D1, D2)
+            # D_new = 2^strategy[strat_idx] D, sharing
+            # the inversions between D1 and D2
+            ker = tuple(dbl_iter_many(h, ker, strategy[strat_idx]))
 
             # Update kernel elements and bookkeeping variables
             kernel_elements.append(ker)
@@ -587,16 +762,17 @@ def split_richelot_chain(P, Q, R, S, a, N_constant, strategy):
         level.pop()
 
         # Push the kernel elements through the last step in the isogeny chain
-        kernel_elements = [(f(D1), f(D2)) for D1, D2 in kernel_elements]
+        # with all the inversions shared between the divisors
+        images = f.map_many([D for Ds in kernel_elements for D in Ds])
+        kernel_elements = list(zip(images[::2], images[1::2]))
 
     # Now we are left with a quadratic splitting: is it singular?
     D1, D2 = kernel_elements[-1]
-    G1, G2 = D1[0], D2[0]
-    G3, r3 = h.quo_rem(G1 * G2)
-    assert r3 == 0
+    G1, G2 = _kernel_quadratics(D1, D2)
+    G3 = _third_quadratic(h, G1, G2)
 
-    delta = Matrix(G.padded_list(3) for G in (G1,G2,G3))
-    if delta.determinant():
+    _, det = _delta_cofactors(G1, G2, G3)
+    if det:
         # Determinant is non-zero, no splitting
         return None, None
 
@@ -608,7 +784,7 @@ def split_richelot_chain(P, Q, R, S, a, N_constant, strategy):
     richelot_chain.append(f)
     return richelot_chain, h
 
-def compute_richelot_chain(ker_Phi, b, N_constant, strategy):
+def compute_richelot_chain(ker_Phi, b, N_constant, strategy, projective=False):
     """
     Helper function which takes as input a kernel for
     a (2^b,2^b)-isogeny and returns the isogeny which
@@ -618,7 +794,8 @@ def compute_richelot_chain(ker_Phi, b, N_constant, strategy):
     glue_P1, glue_Q1, glue_P2, glue_Q2 = ker_Phi
 
     chain, domain = split_richelot_chain(
-        glue_P1, glue_Q1, glue_P2, glue_Q2, b, N_constant, strategy
+        glue_P1, glue_Q1, glue_P2, glue_Q2, b, N_constant, strategy,
+        projective=projective,
     )
     if chain is None:
         raise ValueError("No splitting, ciphertext must be malformed")
@@ -1,12 +1,82 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+from sage.all import Matrix, PolynomialRing, identity_matrix, set_random_seed
+
 from theta_structures.dimension_one import *
 from theta_structures.dimension_two import *
 from theta_structures.product_structure import ProductThetaStructure
 from theta_structures.couple_point import *
 from isogeny_diamond import *
+from utilities.supersingular import (
+    montgomery_coefficient,
+    torsion_basis_2e,
+    torsion_basis_with_pairing,
+)
+from utilities.cache import (
+    LRUCache,
+    TORSION_BASIS_CACHE,
+    read_literal,
+    write_literal_atomic,
+)
+from montgomery_isogenies.kummer_line import KummerLine
+from montgomery_isogenies.kummer_isogeny import KummerLineIsogeny
+from montgomery_isogenies.isogenies_x_only import (
+    isogeny_from_scalar_x_only,
+    evaluate_isogeny_x_only,
+)
+from montgomery_isogenies.isomorphisms import montgomery_isomorphisms
+from theta_isogenies.product_isogeny import EllipticProductIsogeny
+from theta_isogenies.product_isogeny_sqrt import EllipticProductIsogenySqrt
+from theta_isogenies.composed_isogeny import ComposedProductIsogeny
+from theta_isogenies.prefix_cache import ChainPrefixCache
+from theta_isogenies.checkpoint import read_checkpoint, write_checkpoint
+from utilities.tracing import StatsTracer
+from utilities.strategy import (
+    optimised_strategy,
+    optimised_strategy_old,
+    optimised_strategy_richelot,
+    strategy_cost,
+    RICHELOT_LEFT_COST,
+    RICHELOT_RIGHT_COST,
+)
+from diamond_fixtures import (
+    load_diamond_fixture,
+    load_splitting_kernel,
+    write_diamond_fixture,
+)
+from utilities.polynomial_inversion import invert_mod_quartic_coefficients_many
+
+from richelot_isogenies.richelot_isogenies import (
+    FromJacToJac,
+    FromJacToProd,
+    _delta_cofactors,
+    _poly_mul,
+    _poly_rem_monic,
+    _third_quadratic,
+    compute_richelot_chain,
+)
 
-from tests.test_utils import random_supersingular_curve, random_supersingular_curves
+from richelot_isogenies.divisor_arithmetic import (
+    affine_add,
+    affine_dbl_iter,
+    affine_dbl_iter_many,
+    projective_add,
+    projective_dbl_iter,
+    projective_from_mumford,
+    projective_to_mumford_many,
+)
+
+from tests.test_utils import (
+    random_supersingular_curve,
+    random_supersingular_curves,
+    random_sextic_and_divisor,
+    random_divisor,
+    richelot_image_polynomial,
+    _random_field,
+)
 
 
 class DimensionOne(unittest.TestCase):
@@ -33,6 +103,253 @@ class DimensionOne(unittest.TestCase):
                 self.assertEqual(P[0], X / Z)
 
 
+class TorsionBasis(unittest.TestCase):
+    def test_torsion_basis_2e(self):
+        # The starting curve y^2 = x^3 + x has alpha = i, which is
+        # where the tables are most likely to run dry
+        curves = [EllipticCurve(_random_field(2**16), [1, 0])]
+        curves += [random_supersingular_curve(B=2**16) for _ in range(10)]
+        for E in curves:
+            p = E.base_ring().characteristic()
+            n = ZZ(p + 1).valuation(2)
+
+            P, Q = torsion_basis_2e(E, n)
+
+            # Both points have order exactly 2^n, and (0,0) lies under Q
+            self.assertTrue(has_order_D(P, 2**n))
+            self.assertTrue(has_order_D(Q, 2**n))
+            self.assertEqual((2 ** (n - 1) * Q)[0], 0)
+
+            # The points are linearly independent
+            self.assertTrue(
+                has_order_D(P.weil_pairing(Q, 2**n), 2**n, multiplicative=True)
+            )
+
+    def test_torsion_basis_elligator(self):
+        # The basis is sampled with Elligator 2 only when A != 0
+        for _ in range(10):
+            E = random_supersingular_curve(B=2**16)
+            while montgomery_coefficient(E).is_zero():
+                E = random_supersingular_curve(B=2**16)
+            p = E.base_ring().characteristic()
+            D = 2 ** ZZ(p + 1).valuation(2)
+
+            # Make sure the basis is computed rather than read from the cache
+            TORSION_BASIS_CACHE.clear()
+            P, Q, ePQ = torsion_basis_with_pairing(E, D)
+
+            # Both points have full order and are linearly independent
+            self.assertTrue(has_order_D(P, D))
+            self.assertTrue(has_order_D(Q, D))
+            self.assertEqual(ePQ, P.weil_pairing(Q, D))
+            self.assertTrue(has_order_D(ePQ, D, multiplicative=True))
+
+
+class Cache(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LRUCache("test", directory=directory)
+            cache.set((7, "key"), ((1, 2), (3, 4)))
+
+            # A new cache, as in another process, reads the entry from disk
+            other = LRUCache("test", directory=directory)
+            self.assertEqual(other.get((7, "key")), ((1, 2), (3, 4)))
+            self.assertEqual(len(other), 1)
+
+            # Entries survive clearing the memory
+            cache.clear()
+            self.assertEqual(cache.get((7, "key")), ((1, 2), (3, 4)))
+
+    def test_key_invalidation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LRUCache("test", directory=directory)
+            cache.set((7, "key"), 1)
+            self.assertIsNone(cache.get((8, "key")))
+
+            # A file stored for another key, as for a hash collision, is a miss
+            shutil.copy(cache._path((7, "key")), cache._path((8, "key")))
+            cache.clear()
+            self.assertIsNone(cache.get((8, "key")))
+            self.assertEqual(cache.get((7, "key")), 1)
+
+            # Unreadable files are a miss
+            with open(cache._path((7, "key")), "wb") as f:
+                f.write(b"not a pickle")
+            cache.clear()
+            self.assertIsNone(cache.get((7, "key")))
+
+    def test_literal_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.txt")
+            data = {"version": 1, "points": ((1, 2), (3, 4)), "level": [0, 2]}
+            write_literal_atomic(path, data)
+            self.assertEqual(read_literal(path), data)
+
+            # Anything but a literal is refused rather than evaluated
+            with open(path, "w") as f:
+                f.write("__import__('os').getcwd()")
+            with self.assertRaises(ValueError):
+                read_literal(path)
+
+    def test_diamond_fixture(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(load_diamond_fixture(0, directory=directory))
+
+            # The fixture is generated with a fixed seed, so the
+            # kernel read back is the one generated from that seed
+            write_diamond_fixture(0, directory=directory, seed=1)
+            fixture = load_diamond_fixture(0, directory=directory)
+            set_random_seed(1)
+            kernel, (E0, bob_secret) = generate_splitting_kernel(0)
+            self.assertEqual(fixture["kernel"], kernel)
+            self.assertEqual(fixture["bob_secret"], bob_secret)
+            self.assertEqual(fixture["E0"], E0)
+
+    def test_eviction(self):
+        cache = LRUCache("test", maxsize=3)
+        for k in range(3):
+            cache.set(k, k)
+
+        # Reading 0 makes 1 the least recently used entry
+        self.assertEqual(cache.get(0), 0)
+        cache.set(3, 3)
+        cache.set(4, 4)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get(1))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual([cache.get(k) for k in (0, 3, 4)], [0, 3, 4])
+
+
+class KummerArithmetic(unittest.TestCase):
+    def test_multiply_many(self):
+        for _ in range(10):
+            E = random_supersingular_curve()
+            L = KummerLine(E)
+            xs = [L(E.random_point()) for _ in range(5)]
+            m = randint(1, 2**64)
+
+            # The batched ladder agrees with the ladder for each point
+            expected = [m * xP for xP in xs]
+            self.assertEqual(L.multiply_many(xs, m), expected)
+
+            # Normalised outputs are still the same points
+            normalised = L.multiply_many(xs + [L.zero()], m, normalise=True)
+            self.assertEqual(normalised, expected + [L.zero()])
+            for xP in normalised:
+                # m may be a multiple of the order of a point on these
+                # small curves
+                if not xP.is_zero():
+                    self.assertTrue(xP.XZ()[1].is_one())
+
+    def test_two_power_isogeny(self):
+        for _ in range(10):
+            E = random_supersingular_curve(B=2**16)
+            p = E.base_ring().characteristic()
+            n = ZZ(p + 1).valuation(2)
+            L = KummerLine(E)
+
+            # Q lies above (0,0), so both kinds of 4-isogeny kernels appear
+            P, Q = torsion_basis_2e(E, n)
+            for K in [P, Q, P + Q]:
+                e = randint(1, n)
+                K = 2 ** (n - e) * K
+                phi = KummerLineIsogeny(L, L(K), 2**e)
+
+                # Compare the codomain to the one computed by SageMath
+                psi = E.isogeny(K, algorithm="factored")
+                self.assertEqual(
+                    phi.codomain().j_invariant(), psi.codomain().j_invariant()
+                )
+
+                # The kernel is sent to the identity
+                self.assertTrue(phi(L(K)).is_zero())
+
+    def test_three_power_isogeny(self):
+        tested = 0
+        while tested < 10:
+            E = random_supersingular_curve(B=2**16)
+            p = E.base_ring().characteristic()
+            e = ZZ(p + 1).valuation(3)
+            if e == 0:
+                continue
+            tested += 1
+
+            L = KummerLine(E)
+            P, Q = torsion_basis(E, 3**e)
+            xP, xQ = L(P), L(Q)
+
+            # Push the basis through the chain while it is computed
+            phi = KummerLineIsogeny(L, xP, 3**e, points=[xP, xQ])
+            self.assertEqual(phi.images(), (phi(xP), phi(xQ)))
+            self.assertTrue(phi.images()[0].is_zero())
+            self.assertFalse(phi.images()[1].is_zero())
+
+            # Compare the codomain to the one computed by SageMath
+            psi = E.isogeny(P, algorithm="factored")
+            self.assertEqual(phi.codomain().j_invariant(), psi.codomain().j_invariant())
+
+    def test_evaluate_many(self):
+        tested = 0
+        while tested < 10:
+            E = random_supersingular_curve()
+            K = E.random_point()
+            D = K.order()
+            if D == 1:
+                continue
+            tested += 1
+
+            L = KummerLine(E)
+            phi = KummerLineIsogeny(L, L(K), D)
+            xs = [L(E.random_point()) for _ in range(5)] + [L(K), L.zero()]
+
+            # Evaluating all points at once agrees with evaluating each point
+            images = phi.evaluate_many(xs)
+            self.assertEqual(images, [phi(xP) for xP in xs])
+
+            # The images are normalised, except for the identity
+            for xP in images:
+                if not xP.is_zero():
+                    self.assertTrue(xP.XZ()[1].is_one())
+
+    def test_evaluate_isogeny_x_only(self):
+        tested = 0
+        while tested < 10:
+            E = random_supersingular_curve(B=2**16)
+            p = E.base_ring().characteristic()
+            n = ZZ(p + 1).valuation(2)
+            D = ZZ(p + 1) // 2**n
+            if D == 1:
+                continue
+            tested += 1
+
+            # Push a 2^n-torsion basis through an isogeny of odd degree
+            P, Q = torsion_basis_2e(E, n)
+            phi, _ = isogeny_from_scalar_x_only(E, D, randint(0, D))
+            imP, imQ = evaluate_isogeny_x_only(phi, P, Q)
+
+            # The lifted images have the correct Weil pairing
+            self.assertEqual(
+                imP.weil_pairing(imQ, 2**n), P.weil_pairing(Q, 2**n) ** D
+            )
+
+    def test_montgomery_isomorphisms(self):
+        for _ in range(10):
+            E = random_supersingular_curve()
+            A = E.a2()
+
+            # Every Montgomery model of E sends a 2-torsion point to (0,0)
+            for r in E.two_division_polynomial().roots(multiplicities=False):
+                for u in (3 * r**2 + 2 * A * r + 1).nth_root(4, all=True):
+                    E2 = E.change_weierstrass_model(u, r, 0, 0)
+
+                    # We find the same isomorphisms as SageMath
+                    isos = montgomery_isomorphisms(E, E2)
+                    self.assertEqual(
+                        set(iso.tuple() for iso in isos),
+                        set(iso.tuple() for iso in E.isomorphisms(E2)),
+                    )
+
+
 class DimensionTwo(unittest.TestCase):
     def test_double_iter(self):
         for _ in range(10):
@@ -92,5 +409,296 @@ class DimensionTwo(unittest.TestCase):
                 self.assertEqual(k * O1, O2)
 
 
+class MumfordArithmetic(unittest.TestCase):
+    def test_projective_doubling(self):
+        for _ in range(10):
+            F = _random_field(2**16)
+            f, D = random_sextic_and_divisor(F)
+            n = randint(1, 5)
+
+            # Normalising the projective doubling gives the affine one
+            D_proj = projective_dbl_iter(f, projective_from_mumford(D), n)
+            self.assertEqual(
+                projective_to_mumford_many([D_proj])[0], affine_dbl_iter(f, D, n)
+            )
+
+    def test_projective_addition(self):
+        for _ in range(10):
+            F = _random_field(2**16)
+            f, D = random_sextic_and_divisor(F)
+            D2 = affine_dbl_iter(f, D, randint(1, 5))
+
+            # Normalising the projective addition gives the affine one
+            self.assertEqual(projective_add(f, D, D2), affine_add(f, D, D2))
+
+    def test_affine_doubling_many(self):
+        for _ in range(10):
+            F = _random_field(2**16)
+            f, D = random_sextic_and_divisor(F)
+            D2 = affine_dbl_iter(f, D, 1)
+            divisors = [D, D2, affine_add(f, D, D2)]
+            n = randint(1, 5)
+
+            # Sharing the inversions gives the same doublings
+            self.assertEqual(
+                affine_dbl_iter_many(f, divisors, n),
+                [affine_dbl_iter(f, D, n) for D in divisors],
+            )
+
+    def test_invert_mod_quartic_many(self):
+        for _ in range(10):
+            F = _random_field(2**16)
+            R = PolynomialRing(F, "x")
+            fs = [R.random_element(degree=3) for _ in range(3)]
+            gs = [R([F.random_element() for _ in range(4)] + [1]) for _ in range(3)]
+
+            hs = invert_mod_quartic_coefficients_many(
+                [f.padded_list(4) for f in fs], [g.list()[:4] for g in gs]
+            )
+            for f, g, h in zip(fs, gs, hs):
+                self.assertEqual(R(h), f.inverse_mod(g))
+
+
+class RichelotIsogeny(unittest.TestCase):
+    @staticmethod
+    def random_quadratics(F):
+        """
+        Monic quadratics G1, G2 and a quadratic G3 as coefficient lists
+        """
+        G1, G2 = ([F.random_element(), F.random_element(), F.one()] for _ in range(2))
+        G3 = [F.random_element() for _ in range(3)]
+        return G1, G2, G3
+
+    def test_coefficient_lists(self):
+        for _ in range(10):
+            F = _random_field(2**16)
+            R = PolynomialRing(F, "x")
+            f = [F.random_element() for _ in range(7)]
+            g = [F.random_element() for _ in range(4)]
+
+            self.assertEqual(R(_poly_mul(f, g)), R(f) * R(g))
+            self.assertEqual(R(_poly_rem_monic(f, g)), R(f) % R(g + [1]))
+
+            G1, G2, G3 = self.random_quadratics(F)
+            h = (R(G1) * R(G2) * R(G3)).padded_list(7)
+            self.assertEqual(_third_quadratic(h, G1, G2), G3)
+
+            # The cofactors are the columns of the adjugate of delta
+            delta = Matrix(F, [G1, G2, G3])
+            cofactors, det = _delta_cofactors(G1, G2, G3)
+            self.assertEqual(det, delta.det())
+            self.assertEqual(
+                delta * Matrix(F, cofactors).transpose(), det * identity_matrix(F, 3)
+            )
+
+    def test_richelot_map_many(self):
+        for _ in range(10):
+            F = _random_field(2**16)
+            R = PolynomialRing(F, "x")
+            x = R.gen()
+
+            G1, G2, G3 = self.random_quadratics(F)
+            h = (R(G1) * R(G2) * R(G3)).padded_list(7)
+            D1 = (G1[1], G1[0], F.zero(), F.zero())
+            D2 = (G2[1], G2[0], F.zero(), F.zero())
+            hnew, corr = FromJacToJac(h, D1, D2)
+
+            # The codomain computed with the inverse of delta
+            delta = Matrix(F, [G1, G2, G3]).inverse()
+            H1, H2, H3 = (
+                -delta[0][i] * x**2 + 2 * delta[1][i] * x - delta[2][i] for i in range(3)
+            )
+            self.assertEqual(R(hnew), H1 * H2 * H3)
+
+            # The images agree with the evaluation with polynomials
+            divisors = [random_divisor(F, h) for _ in range(3)]
+            for D, image in zip(divisors, corr.map_many(divisors)):
+                Dx, Dy = richelot_image_polynomial(R, corr, D)
+                self.assertEqual(image, (Dx[1], Dx[0], Dy[1], Dy[0]))
+                self.assertEqual(corr.map(D), image)
+
+    def test_split_isogeny(self):
+        for _ in range(10):
+            F = _random_field(2**16)
+            R = PolynomialRing(F, "x")
+
+            # The Jacobian of y^2 = G1*G2*G3 splits when the
+            # quadratics are linearly dependent
+            G1, G2, _ = self.random_quadratics(F)
+            a, b = F.random_element(), F.random_element()
+            G3 = [a * c1 + b * c2 for c1, c2 in zip(G1, G2)]
+            h = (R(G1) * R(G2) * R(G3)).padded_list(7)
+
+            # D^2 is the resultant of G1 and G2
+            r, q = G1[1] - G2[1], G1[0] - G2[0]
+            DD = r * (G1[1] * G2[0] - G1[0] * G2[1]) + q**2
+            if not DD.is_square():
+                continue
+            _, phi = FromJacToProd(G1, G2, G3, N_constant=DD.sqrt() / q)
+
+            # The splitting is a group homomorphism
+            D, D_prime = random_divisor(F, h), random_divisor(F, h)
+            P1, P2 = phi(D)
+            Q1, Q2 = phi(D_prime)
+            self.assertEqual(phi(affine_add(h, D, D_prime)), (P1 + Q1, P2 + Q2))
+
+    def test_richelot_chain(self):
+        _, ea, eb, _, _ = DIAMONDS[0]
+        (P1, Q1, P2, Q2), _ = load_splitting_kernel(0)
+        F = P1.curve().base_ring()
+        B = ZZ(3**eb)
+        C = ZZ(2**ea) - B
+        N_constant = F(B + C) / F(B - C)
+
+        # The chain in the Mumford model splits into the same elliptic
+        # curves as the chain in the theta model
+        ker_Phi = tuple(4 * X for X in (P1, Q1, P2, Q2))
+        strategy = optimised_strategy_richelot(ea - 1)
+        Phi = EllipticProductIsogeny((CouplePoint(P1, P2), CouplePoint(Q1, Q2)), ea)
+        for projective in [False, True]:
+            _, codomain = compute_richelot_chain(
+                ker_Phi, ea, N_constant, strategy, projective=projective
+            )
+            self.assertEqual(
+                sorted(E.j_invariant() for E in codomain),
+                sorted(E.j_invariant() for E in Phi.codomain()),
+            )
+
+
+class Strategy(unittest.TestCase):
+    def test_strategy_cost(self):
+        for n in [2, 3, 10, 126]:
+            for costs in [(), (RICHELOT_LEFT_COST, RICHELOT_RIGHT_COST)]:
+                strategy, cost = optimised_strategy(n, *costs, with_cost=True)
+
+                # Replaying the strategy gives the cost it was optimised for,
+                # which is at most the cost of the strategy with equal costs
+                self.assertEqual(strategy_cost(strategy, n, *costs), cost)
+                self.assertLessEqual(
+                    cost, strategy_cost(optimised_strategy_old(n), n, *costs)
+                )
+
+
+class ProductIsogeny(unittest.TestCase):
+    def test_stats(self):
+        _, ea, _, _, _ = DIAMONDS[0]
+        (P1, Q1, P2, Q2), _ = load_splitting_kernel(0)
+        ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+
+        for isogeny, n, kernel in [
+            (EllipticProductIsogeny, ea, ker_Phi),
+            (EllipticProductIsogenySqrt, ea, [4 * T for T in ker_Phi]),
+        ]:
+            Phi = isogeny(kernel, n, tracer=StatsTracer())
+            stats = Phi.stats()
+
+            # One doubling per entry of the strategy and one trace per
+            # (2,2)-isogeny, where the sqrt variant does not push the
+            # kernel through the last two
+            kinds = {kind: s["calls"] for kind, s in stats["kinds"].items()}
+            pushes = ea if isogeny is EllipticProductIsogeny else ea - 2
+            self.assertEqual(kinds["doubling"], len(Phi.strategy))
+            self.assertEqual(kinds["gluing"], 1)
+            self.assertEqual(kinds["isogeny"], ea - 1)
+            self.assertEqual(kinds["push"], pushes)
+            self.assertEqual(kinds["splitting"], 1)
+            self.assertEqual(len(stats["steps"]), ea + 1)
+
+        # Without a tracer there is nothing to report
+        Phi = EllipticProductIsogeny(ker_Phi, ea)
+        with self.assertRaises(ValueError):
+            Phi.stats()
+
+    def test_composed_isogeny(self):
+        _, ea, _, _, _ = DIAMONDS[0]
+        (P1, Q1, P2, Q2), _ = load_splitting_kernel(0)
+        ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+        E1, E2 = ker_Phi[0].curves()
+
+        # A second chain from the codomain of the first, back to E1 x E2
+        Phi1 = EllipticProductIsogeny(ker_Phi, ea)
+        Phi2 = EllipticProductIsogeny(generate_dual_kernel(Phi1, (P1, Q1, P2, Q2)), ea)
+        Phi = ComposedProductIsogeny(Phi1, Phi2)
+        self.assertEqual(Phi.codomain(), Phi2.codomain())
+
+        for _ in range(5):
+            R = CouplePoint(E1.random_point(), E2.random_point())
+            self.assertEqual(Phi(R), Phi2(Phi1(R)))
+
+        # The image of 2^ea (P1, 0) has a component at infinity, where the
+        # translation by T is undefined and SplitGluing falls back to
+        # splitting and gluing
+        R = CouplePoint(P1, E2(0)).double_iter(ea)
+        self.assertTrue(any(X.is_zero() for X in Phi1(R).points()))
+        self.assertEqual(Phi(R), Phi2(Phi1(R)))
+
+    def test_prefix_cache(self):
+        _, ea, _, _, _ = DIAMONDS[0]
+        (P1, Q1, P2, Q2), _ = load_splitting_kernel(0)
+        ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+        ker_Phi_sqrt = [4 * T for T in ker_Phi]
+        cache = ChainPrefixCache()
+
+        Phi = EllipticProductIsogeny(ker_Phi, ea, prefix_cache=cache)
+        self.assertEqual(Phi.prefix_length, 0)
+        self.assertEqual(len(cache), ea - 2)
+
+        # Four times the kernel has the same points of order 2^(k+2), so the
+        # sqrt chain resumes after the first ea - 2 steps
+        expected = EllipticProductIsogenySqrt(ker_Phi_sqrt, ea)
+        Phi_sqrt = EllipticProductIsogenySqrt(ker_Phi_sqrt, ea, prefix_cache=cache)
+        self.assertEqual(Phi_sqrt.prefix_length, ea - 2)
+        for E, E_expected in zip(Phi_sqrt.codomain(), expected.codomain()):
+            self.assertEqual(E.j_invariant(), E_expected.j_invariant())
+
+        # Resuming gives the same codomain
+        Phi_again = EllipticProductIsogeny(ker_Phi, ea, prefix_cache=cache)
+        self.assertEqual(Phi_again.prefix_length, ea - 2)
+        for E, E_expected in zip(Phi_again.codomain(), Phi.codomain()):
+            self.assertEqual(E.j_invariant(), E_expected.j_invariant())
+
+    def test_checkpoint(self):
+        _, ea, _, _, _ = DIAMONDS[0]
+        (P1, Q1, P2, Q2), _ = load_splitting_kernel(0)
+        ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
+        E1, E2 = ker_Phi[0].curves()
+        R = CouplePoint(E1.random_point(), E2.random_point())
+
+        # Checkpoints are taken after the steps of the strategy walk, before
+        # the last step, or before the last two steps for the sqrt variant
+        for isogeny, kernel, steps in [
+            (EllipticProductIsogeny, ker_Phi, ea - 1),
+            (EllipticProductIsogenySqrt, [4 * T for T in ker_Phi], ea - 2),
+        ]:
+            checkpoints = []
+            Phi = isogeny(kernel, ea, checkpoint_every=3, on_checkpoint=checkpoints.append)
+            self.assertEqual(len(checkpoints), steps // 3)
+
+            # Resuming from a checkpoint read back from disk gives the same
+            # isogeny, and the same following checkpoints
+            with tempfile.TemporaryDirectory() as directory:
+                filename = os.path.join(directory, "chain.txt")
+                write_checkpoint(filename, checkpoints[0])
+                checkpoint = read_checkpoint(filename)
+
+            resumed = []
+            Phi_resumed = isogeny(
+                kernel,
+                ea,
+                resume_from=checkpoint,
+                checkpoint_every=3,
+                on_checkpoint=resumed.append,
+            )
+            self.assertEqual(resumed, checkpoints[1:])
+            self.assertEqual(Phi_resumed.codomain(), Phi.codomain())
+            self.assertEqual(Phi_resumed(R), Phi(R))
+
+        # A checkpoint only resumes the chain it was taken from
+        with self.assertRaises(ValueError):
+            EllipticProductIsogenySqrt(ker_Phi, ea, resume_from=checkpoints[0])
+        with self.assertRaises(ValueError):
+            EllipticProductIsogeny(ker_Phi, ea, resume_from=checkpoints[0])
+
+
 if __name__ == "__main__" and "__file__" in globals():
     unittest.main()
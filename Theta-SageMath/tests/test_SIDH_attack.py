@@ -1,4 +1,4 @@
-from sage.all import ZZ, Mod, gcd
+from sage.all import ZZ, Mod
 
 # Python imports
 import time
@@ -8,29 +8,43 @@ from theta_structures.couple_point import CouplePoint
 from theta_isogenies.product_isogeny import EllipticProductIsogeny
 from theta_isogenies.product_isogeny_sqrt import EllipticProductIsogenySqrt
 from montgomery_isogenies.isogenies_x_only import isogeny_from_scalar_x_only
+from montgomery_isogenies.isomorphisms import montgomery_isomorphisms
 from utilities.order import has_order_D
 from utilities.discrete_log import BiDLP
 from utilities.supersingular import torsion_basis
 from utilities.strategy import optimised_strategy
 from utilities.utils import speed_up_sagemath, verbose_print
-from isogeny_diamond import generate_splitting_kernel, DIAMONDS
+from isogeny_diamond import DIAMONDS
+from diamond_fixtures import load_splitting_kernel
 
 
-def check_result(E0, EA, EB, B, Phi):
+def check_result(E0, EA, EB, B, Phi, X, Y):
     # Push the torsion basis of EB through the (2,2) isogeny
     P3, Q3 = torsion_basis(E0, B)
     PB3, QB3 = torsion_basis(EB, B)
 
     E3, E4 = Phi.codomain()
 
-    # Find which of the two codomain curves is our starting curve
-    if E3.is_isomorphic(E0):
-        E_start = E3
-        index = 0
-    else:
-        assert E4.is_isomorphic(E0)
-        E_start = E4
+    # Find which of the two codomain curves is our starting curve, together
+    # with the isomorphisms back to E0. Up to sign, there are only two of
+    # these, which differ by the automorphism iota of E0
+    index = 0
+    isomorphisms = montgomery_isomorphisms(E3, E0, up_to_sign=True)
+    if not isomorphisms:
         index = 1
+        isomorphisms = montgomery_isomorphisms(E4, E0, up_to_sign=True)
+    assert isomorphisms
+
+    # On E0 x {0}, Phi is the dual of the auxiliary endomorphism
+    # gamma = X + Y*iota of `generate_splitting_kernel()`, up to sign. Only
+    # the right isomorphism sends the image of (P3, 0) to +-(X - Y*iota)(P3),
+    # the other one gives +-(X + Y*iota)(P3)
+    iota = E0.automorphisms()[2]
+    gamma_dual_P3 = X * P3 - Y * iota(P3)
+    R_img = Phi(CouplePoint(P3, EB(0)))[index]
+    isomorphisms = [iso for iso in isomorphisms if iso(R_img)[0] == gamma_dual_P3[0]]
+    assert len(isomorphisms) == 1
+    iso = isomorphisms[0]
 
     # One of these points will have full order, which we can
     # recover the secret from
@@ -48,40 +62,25 @@ def check_result(E0, EA, EB, B, Phi):
         K_img = Phi(L2)[index]
     assert has_order_D(K_img, B)
 
-    # Isomorphisms back to original curve E0
-    isomorphisms = E_start.isomorphisms(E0)
-    for iso in isomorphisms:
-        K = iso(K_img)
+    # The kernel is <P3 + [secret]Q3>
+    a, b = BiDLP(iso(K_img), P3, Q3, B)
+    secret = (Mod(ZZ(b), B) / a).lift()
 
-        # Recover secret by solving dlogs
-        a, b = BiDLP(K, P3, Q3, B)
-
-        # fix due to the fact we use E1728 as a starting curve
-        if gcd(a, B) != 1:
-            iota = E0.automorphisms()[2]
-            K = iota(K)
-            a, b = BiDLP(K, P3, Q3, B)
-
-        # Recover secret from the BiDLP
-        secret = (Mod(ZZ(b), B) / a).lift()
-
-        # Ensure the collected secret is correct
-        _, EB_test = isogeny_from_scalar_x_only(E0, B, secret, basis=(P3, Q3))
-
-        if EB == EB_test:
-            break
+    # Check the secret by recomputing Bob's isogeny
+    _, EB_test = isogeny_from_scalar_x_only(E0, B, secret, basis=(P3, Q3))
+    assert EB == EB_test, "The secret does not give Bob's public curve"
 
     return secret
 
 
 def test_SIDH_attack(test_index=-1, verbose=False):
-    (P1, Q1, P2, Q2), (E0, bob_secret) = generate_splitting_kernel(test_index)
+    (P1, Q1, P2, Q2), (E0, bob_secret) = load_splitting_kernel(test_index)
 
     # Create kernel from CouplePoint data
     ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
     EA, EB = ker_Phi[0].curves()
 
-    _, ea, eb, _, _ = DIAMONDS[test_index]
+    _, ea, eb, X, Y = DIAMONDS[test_index]
     B = ZZ(3**eb)
 
     t0 = time.process_time()
@@ -99,10 +98,10 @@ def test_SIDH_attack(test_index=-1, verbose=False):
 
     verbose_print(f"Original secret: {bob_secret}", verbose=verbose)
     verbose_print("Recovering secret via isogeny chain:", verbose=verbose)
-    secret = check_result(E0, EA, EB, B, Phi)
+    secret = check_result(E0, EA, EB, B, Phi, X, Y)
     verbose_print(f"Recovered secret: {secret}", verbose=verbose)
     verbose_print("Recovering secret via sqrt isogeny chain:", verbose=verbose)
-    secret2 = check_result(E0, EA, EB, B, Phi2)
+    secret2 = check_result(E0, EA, EB, B, Phi2, X, Y)
     verbose_print(f"Recovered secret via sqrt chain: {secret2}", verbose=verbose)
 
     assert secret == bob_secret, "Secrets do not match!"
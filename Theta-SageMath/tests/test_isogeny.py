@@ -7,7 +7,20 @@ from utilities.strategy import optimised_strategy
 from theta_structures.couple_point import CouplePoint
 from theta_isogenies.product_isogeny import EllipticProductIsogeny
 from theta_isogenies.product_isogeny_sqrt import EllipticProductIsogenySqrt
-from isogeny_diamond import generate_splitting_kernel, DIAMONDS
+from isogeny_diamond import DIAMONDS
+from diamond_fixtures import load_diamond_fixture, load_splitting_kernel
+from utilities.cache import fp2_to_ints
+
+
+def check_codomain(Phi):
+    """
+    When the kernel comes from a fixture, the codomain must have the
+    j-invariants stored with it
+    """
+    if codomain_j is None:
+        return
+    j_invariants = sorted(fp2_to_ints(E.j_invariant()) for E in Phi.codomain())
+    assert j_invariants == sorted(fp2_to_ints(j) for j in codomain_j)
 
 
 def test_isogeny_chain():
@@ -17,6 +30,7 @@ def test_isogeny_chain():
     t0 = time.process_time()
     Phi = EllipticProductIsogeny(ker_Phi, ea, strategy=strategy)
     print(f"Theta Model isogeny took: {time.process_time() - t0:.5f} seconds")
+    check_codomain(Phi)
 
     # Compute the time to push a point through the isogeny
     L1 = CouplePoint(EA(0), PB3)
@@ -34,6 +48,7 @@ def test_isogeny_chain_sqrt(ker_Phi):
     t0 = time.process_time()
     Phi = EllipticProductIsogenySqrt(ker_Phi_scaled, ea, strategy=strategy)
     print(f"Theta Model Sqrt isogeny took: {time.process_time() - t0:.5f} seconds")
+    check_codomain(Phi)
 
     # Compute the time to push a point through the isogeny
     L1 = CouplePoint(EA(0), PB3)
@@ -50,8 +65,15 @@ if __name__ == "__main__":
             _, ea, eb, _, _ = DIAMONDS[test_index]
             B = ZZ(3**eb)
 
+            # The fixture stores the torsion bases and the expected codomain
             t0 = time.process_time()
-            (P1, Q1, P2, Q2), (E0, _) = generate_splitting_kernel(test_index)
+            fixture = load_diamond_fixture(test_index)
+            if fixture is None:
+                (P1, Q1, P2, Q2), (E0, _) = load_splitting_kernel(test_index)
+                codomain_j = None
+            else:
+                (P1, Q1, P2, Q2), E0 = fixture["kernel"], fixture["E0"]
+                codomain_j = fixture["codomain_j"]
             ker_Phi = (CouplePoint(P1, P2), CouplePoint(Q1, Q2))
             print(
                 f"Generating splitting kernel with parameters 'ea={ea} eb={eb}' took: {time.process_time() - t0:.5f} seconds"
@@ -59,8 +81,12 @@ if __name__ == "__main__":
             EA, EB = ker_Phi[0].curves()
 
             t0 = time.process_time()
-            P3, Q3 = torsion_basis(E0, B)
-            PB3, QB3 = torsion_basis(EB, B)
+            if fixture is None:
+                P3, Q3 = torsion_basis(E0, B)
+                PB3, QB3 = torsion_basis(EB, B)
+            else:
+                P3, Q3 = fixture["basis_E0"]
+                PB3, QB3 = fixture["basis_EB"]
             print(
                 f"Generating 3^{eb}-torsion basis on the two elliptic curves took: {time.process_time() - t0:.5f} seconds"
             )
@@ -1,4 +1,4 @@
-from sage.all import EllipticCurve, random_prime, GF
+from sage.all import EllipticCurve, PolynomialRing, random_prime, GF
 
 def _random_prime(B):
     while True:
@@ -26,4 +26,68 @@ def random_supersingular_curves(B=1000):
     E1 = _random_supersingular_curve(F)
     E2 = _random_supersingular_curve(F)
 
-    return E1, E2
\ No newline at end of file
+    return E1, E2
+
+def random_sextic_and_divisor(F):
+    """
+    A sextic f, as its list of coefficients, and a divisor D = (u1, u0, v1, v0)
+    on the Jacobian of y^2 = f(x), with f = v^2 + u*w for a random quartic w
+    """
+    R = PolynomialRing(F, "x")
+    u1, u0, v1, v0 = (F.random_element() for _ in range(4))
+    u, v = R([u0, u1, 1]), R([v0, v1])
+    w = R([F.random_element() for _ in range(5)])
+    f = v**2 + u * w
+    return f.padded_list(7), (u1, u0, v1, v0)
+
+def random_divisor(F, h):
+    """
+    A random divisor D = (u1, u0, v1, v0) on the Jacobian of y^2 = h(x),
+    where h is a sextic given by its list of coefficients, as the sum of
+    two random points of the curve
+    """
+    h = PolynomialRing(F, "x")(h)
+    points = []
+    while len(points) < 2:
+        x = F.random_element()
+        y2 = h(x)
+        if y2.is_square():
+            points.append((x, y2.sqrt()))
+
+    (x1, y1), (x2, y2) = points
+    v1 = (y2 - y1) / (x2 - x1)
+    return (-(x1 + x2), x1 * x2, v1, y1 - v1 * x1)
+
+def richelot_image_polynomial(R, corr, D):
+    """
+    The image (Dx, Dy) of the divisor D = (u1, u0, v1, v0) under the
+    Richelot correspondence corr, computed with the polynomials of R
+    as `RichelotCorr.map` did before it used coefficient lists
+    """
+    x = R.gen()
+    G1, G2, H1, H11, H12, H22, hnew = (
+        R(c) for c in (corr.G1, corr.G2, corr.H1, corr.H11, corr.H12, corr.H22, corr.hnew)
+    )
+    u1, u0, v1, v0 = D
+    U = R([u0, u1, 1])
+    s, p = -u1, u0
+
+    g1red, g2red = G1 - U, G2 - U
+    g11, g10 = g1red[1], g1red[0]
+    g21, g20 = g2red[1], g2red[0]
+
+    t0 = g11*g11*p + g11*g10*s + g10*g10
+    Px = t0 * H11 \
+       + (2*g11*g21*p + (g11*g20 + g21*g10)*s + 2*g10*g20) * H12 \
+       + (g21*(g21*p + g20*s) + g20*g20) * H22
+
+    Py2 = v1*v1*p + v1*v0*s + v0*v0
+    z0, z1, z2, z3 = v1*g11*p, v1*g10, v0*g11, v0*g10
+    Py1 = (2*z0 + 2*z3 + s*(z1 + z2))*x - (p*(2*z1 - 2*z2) + s*(z0 + s*z2 + z3))
+    Py1 *= H1
+    Py0 = H11 * U * t0
+
+    Py = (-Py1.inverse_mod(Px) * (Py2*hnew + Py0)) % Px
+    Dx = ((hnew - Py*Py) // Px).monic()
+    Dy = (-Py) % Dx
+    return Dx, Dy
@@ -0,0 +1,142 @@
+"""
+Checkpoints of the (2,2)-chains computed by `EllipticProductIsogeny` and
+`EllipticProductIsogenySqrt`, so that a long chain can be resumed after its
+process is stopped, or continued by another process.
+
+The state of a chain after `step` isogenies is a `ChainState`: the isogenies
+computed so far, whose last codomain is the current theta structure, and the
+bookkeeping of the strategy walk, which is the index in the strategy, the
+`level` list and the stack of kernel elements pushed through the chain.
+
+A checkpoint is a dictionary of Python integers and tuples, so it is written
+to disk as a Python literal, which is read back without running any code, and
+does not depend on the SageMath parents it was computed from:
+
+- kernel elements are stored by their theta coordinates
+- each isogeny is stored by the points above its kernel it was computed from,
+  as affine points on E1 x E2 for the gluing and theta points for the other
+  steps. When resuming, the isogenies are computed again from these points,
+  which costs one codomain computation per step but no doubling or image, and
+  gives the same isogenies, theta structures and kernel elements as the chain
+  which was stopped.
+
+Chains are resumed by passing the checkpoint and the same kernel to
+`EllipticProductIsogeny(kernel, n, resume_from=checkpoint)`.
+"""
+
+# Python imports
+import os
+
+# Local imports
+from theta_structures.couple_point import CouplePoint
+from utilities.cache import fp2_to_ints, ints_to_fp2, read_literal, write_literal_atomic
+
+# Version of the format of checkpoints, to refuse checkpoints written by an
+# incompatible version of the code
+CHECKPOINT_VERSION = 2
+
+
+class ChainState:
+    """
+    The state of the strategy walk of a (2,2)-chain after `step` isogenies,
+    where `isogenies` are the isogenies computed so far
+    """
+
+    def __init__(self, step, strat_idx, level, kernel_elements, isogenies):
+        self.step = step
+        self.strat_idx = strat_idx
+        self.level = level
+        self.kernel_elements = kernel_elements
+        self.isogenies = isogenies
+
+    def __repr__(self):
+        return f"State of a (2,2)-chain after {self.step} steps with {len(self.kernel_elements)} kernel elements"
+
+    def theta_structure(self):
+        """
+        The current theta structure, which is None before the gluing
+        """
+        if not self.isogenies:
+            return None
+        return self.isogenies[-1].codomain()
+
+
+# ================================= #
+#  Encoding points for checkpoints  #
+# ================================= #
+
+
+def encode_coords(coords):
+    return tuple(fp2_to_ints(x) for x in coords)
+
+
+def decode_coords(F, data):
+    return tuple(ints_to_fp2(F, x) for x in data)
+
+
+def encode_curves(E1, E2):
+    """
+    The characteristic and a-invariants of E1 and E2, to check that a
+    checkpoint belongs to a chain
+    """
+    p = E1.base_field().characteristic()
+    return (int(p),) + tuple(encode_coords(E.a_invariants()) for E in (E1, E2))
+
+
+def encode_couple_point(P):
+    return tuple(encode_coords(Q.xy()) for Q in P.points())
+
+
+def decode_couple_point(curves, data):
+    return CouplePoint(
+        *(E(*decode_coords(E.base_field(), xy)) for E, xy in zip(curves, data))
+    )
+
+
+def encode_theta_point(P):
+    return encode_coords(P.coords())
+
+
+def decode_theta_point(Th, data):
+    return Th(decode_coords(Th.base_ring(), data))
+
+
+# ==================================== #
+#  Reading and writing to checkpoints  #
+# ==================================== #
+
+
+def write_checkpoint(filename, checkpoint):
+    """
+    Write a checkpoint to filename with `write_literal_atomic()`, so a
+    process stopped while writing leaves the previous checkpoint intact.
+    """
+    write_literal_atomic(filename, checkpoint)
+
+
+def read_checkpoint(filename):
+    """
+    Read a checkpoint written by `write_checkpoint()`, returns None when
+    there is no checkpoint
+    """
+    if not os.path.exists(filename):
+        return None
+    return read_literal(filename)
+
+
+class FileCheckpointer:
+    """
+    Callable for the `on_checkpoint` argument of `EllipticProductIsogeny`
+    which writes each checkpoint to filename, replacing the previous one
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.count = 0
+
+    def __call__(self, checkpoint):
+        write_checkpoint(self.filename, checkpoint)
+        self.count += 1
+
+    def read(self):
+        return read_checkpoint(self.filename)
@@ -1,4 +1,6 @@
-from sage.all import Matrix
+from sage.misc.lazy_import import lazy_import
+
+lazy_import("sage.matrix.constructor", "Matrix")
 
 from theta_structures.couple_point import CouplePoint
 from theta_structures.dimension_two import ThetaStructure, ThetaPoint
@@ -33,6 +35,7 @@ class GluingThetaIsogeny(ThetaIsogeny):
         self._base_change_matrix = M
         self.T_shift = K1_4
         self._precomputation = None
+        self._kernel_points = (K1_8, K2_8)
         self._zero_idx = 0
 
         # Map points from elliptic product onto the product theta structure
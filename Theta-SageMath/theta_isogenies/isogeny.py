@@ -1,4 +1,4 @@
-from sage.all import ZZ
+from sage.rings.integer_ring import ZZ
 
 from theta_structures.dimension_two import ThetaStructure, ThetaPoint
 from theta_isogenies.morphism import Morphism
@@ -69,8 +69,15 @@ class ThetaIsogeny(Morphism):
 
         self._hadamard = hadamard
         self._precomputation = None
+        self._kernel_points = (T1_8, T2_8)
         self._codomain = self._compute_codomain(T1_8, T2_8)
 
+    def kernel_points(self):
+        """
+        The points above the kernel which the isogeny was computed from
+        """
+        return self._kernel_points
+
     def _compute_codomain(self, T1, T2):
         """
         Given two isotropic points of 8-torsion T1 and T2, compatible with
@@ -1,4 +1,4 @@
-from sage.all import ZZ
+from sage.rings.integer_ring import ZZ
 
 from theta_structures.dimension_two import ThetaStructure, ThetaPoint
 from theta_isogenies.isogeny import ThetaIsogeny
@@ -1,4 +1,7 @@
-from sage.all import Matrix
+from sage.misc.lazy_import import lazy_import
+
+lazy_import("sage.matrix.constructor", "Matrix")
+
 from theta_structures.dimension_two import ThetaStructure
 from theta_structures.dimension_two import ThetaPoint
 from theta_structures.couple_point import CouplePoint
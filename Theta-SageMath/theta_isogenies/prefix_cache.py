@@ -0,0 +1,101 @@
+"""
+A cache of the prefixes of (2,2)-chains, shared between the chains computed by
+`EllipticProductIsogeny` and `EllipticProductIsogenySqrt`.
+
+The first k steps of the chain with kernel <T1, T2> only depend on the points
+of order 2^(k+2) in the kernel: the j-th (2,2)-isogeny is computed from the
+images of the multiples of T1, T2 of order 2^(j+2), which are of order 8 after
+the j - 1 previous steps. So two kernels with the same multiples R1, R2 of
+order 2^(k+2) share the gluing and the k - 1 following isogenies. This is the
+case for kernels of points of order 2^e which only differ by points of order
+dividing 2^(e-k-2), or between the kernel of `EllipticProductIsogeny` and four
+times this kernel for `EllipticProductIsogenySqrt`.
+
+Prefixes are keyed by the affine coordinates of R1, R2, as integers, so keys
+do not depend on how the points were computed. The values are the isogenies
+themselves, so unlike the caches of `utilities/cache.py` the prefix cache is
+only kept in memory. A chain looks up the longest cached prefix of its
+kernel, pushes the kernel through it and computes the remaining steps with
+`optimised_suffix_strategy()`, then stores each of its prefixes.
+
+The last two steps of a chain are not cached, as they depend on the length of
+the chain, so prefixes have at most n - 2 steps.
+"""
+
+# Local imports
+from utilities.cache import LRUCache, fp2_to_ints
+
+
+class ChainPrefixCache:
+    """
+    Least recently used cache of the prefixes of (2,2)-chains, with at most
+    `maxsize` prefixes. Each chain of length n stores n - 2 prefixes.
+    """
+
+    def __init__(self, maxsize=1024):
+        self._cache = LRUCache("chain_prefix", maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __repr__(self):
+        return f"ChainPrefixCache with {len(self)}/{self._cache.maxsize} prefixes, {self.hits} hits and {self.misses} misses"
+
+    @staticmethod
+    def _point_key(P):
+        return tuple(c for x in P.xy() for c in fp2_to_ints(x))
+
+    def keys(self, kernel, e, depth):
+        """
+        Given a kernel of points of order 2^e, the keys of its prefixes of
+        length k = 1, ..., depth, computed from the points of order 2^(k+2)
+
+        Cost: (e - 3) doublings of each point of the kernel
+        """
+        if depth < 1:
+            return []
+
+        E1, E2 = kernel[0].curves()
+        p = E1.base_field().characteristic()
+        curves = (int(p),) + tuple(
+            fp2_to_ints(E.a_invariants()[1]) for E in (E1, E2)
+        )
+
+        # The points of order 2^(depth + 2), and then 2^(depth + 1), ..., 8
+        Ts = [T.double_iter(e - depth - 2) for T in kernel]
+        keys = []
+        for k in range(depth, 0, -1):
+            points = tuple(self._point_key(P) for T in Ts for P in T.points())
+            keys.append((k, curves, points))
+            Ts = [T.double() for T in Ts]
+
+        keys.reverse()
+        return keys
+
+    def lookup(self, keys):
+        """
+        The longest prefix cached for the keys, as a tuple of isogenies which
+        is empty when no prefix is cached
+        """
+        for key in reversed(keys):
+            prefix = self._cache.get(key)
+            if prefix is not None:
+                self.hits += 1
+                return prefix
+        self.misses += 1
+        return ()
+
+    def store(self, keys, isogenies):
+        """
+        Store the prefixes of length k = 1, ..., len(keys) of the chain
+        """
+        isogenies = tuple(isogenies)
+        for k, key in enumerate(keys, start=1):
+            self._cache.set(key, isogenies[:k])
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
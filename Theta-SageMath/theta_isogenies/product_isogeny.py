@@ -4,7 +4,17 @@ from theta_isogenies.morphism import Morphism
 from theta_isogenies.gluing_isogeny import GluingThetaIsogeny
 from theta_isogenies.isomorphism import SplittingIsomorphism
 from theta_isogenies.isogeny import ThetaIsogeny
-from utilities.strategy import optimised_strategy
+from theta_isogenies.checkpoint import (
+    CHECKPOINT_VERSION,
+    ChainState,
+    encode_curves,
+    encode_couple_point,
+    decode_couple_point,
+    encode_theta_point,
+    decode_theta_point,
+)
+from utilities.strategy import optimised_strategy, optimised_suffix_strategy
+from utilities.tracing import StepTimer
 
 
 class EllipticProductIsogeny(Morphism):
@@ -22,6 +32,19 @@ class EllipticProductIsogeny(Morphism):
     - strategy: the optimises strategy to compute a walk through the graph of
       images and doublings with a quasli-linear number of steps
     - zeta (optional): a second root of unity
+    - tracer (optional): a callable tracer(index, kind, elapsed, depth) called
+      after each doubling, isogeny, push of the kernel elements, the gluing
+      and the splitting, see `utilities/tracing.py`
+    - prefix_cache (optional): a `ChainPrefixCache` shared between chains, the
+      chain resumes from the longest prefix cached for its kernel and stores
+      its own prefixes, see `theta_isogenies/prefix_cache.py`. When resuming,
+      the given strategy is replaced by one for the remaining steps
+    - checkpoint_every, on_checkpoint (optional): call on_checkpoint(checkpoint)
+      every checkpoint_every (2,2)-isogenies, with a checkpoint of the chain
+      from `checkpoint()`
+    - resume_from (optional): a checkpoint of the chain with this kernel, the
+      chain resumes from it with the strategy of the checkpoint, see
+      `theta_isogenies/checkpoint.py`
 
     NOTE: if only the 2^n torsion is known, the isogeny should be computed with
     `EllipticProductIsogenySqrt()` which computes the last two steps without the
@@ -29,10 +52,33 @@ class EllipticProductIsogeny(Morphism):
     is slower)
     """
 
-    def __init__(self, kernel, n, strategy=None, zeta=None):
+    # The kernel has order 2^(n + _torsion_above)
+    _torsion_above = 2
+
+    def __init__(
+        self,
+        kernel,
+        n,
+        strategy=None,
+        zeta=None,
+        tracer=None,
+        prefix_cache=None,
+        checkpoint_every=None,
+        on_checkpoint=None,
+        resume_from=None,
+    ):
         self.n = n
         self.E1, self.E2 = kernel[0].curves()
         self._zeta = zeta
+        self._tracer = tracer
+        self._prefix_cache = prefix_cache
+        self.prefix_length = 0
+        if checkpoint_every is not None and on_checkpoint is None:
+            raise ValueError("checkpoint_every requires a callable on_checkpoint")
+        self._checkpoint_every = checkpoint_every
+        self._on_checkpoint = on_checkpoint
+        self._resume_from = resume_from
+        self._kernel = kernel
         assert kernel[1].curves() == (self.E1, self.E2)
 
         self._domain = (self.E1, self.E2)
@@ -41,33 +87,220 @@ class EllipticProductIsogeny(Morphism):
             strategy = self.get_strategy()
         self.strategy = strategy
 
+        # Also sets self._splitting, see split()
         self._phis = self.isogeny_chain(kernel)
-        T_last = self._phis[-1].codomain()
-        self._splitting = SplitThetaStructure(T_last)
 
         self._codomain = self._splitting.curves()
 
-    def get_strategy(self):
+    def get_strategy(self, start=0):
+        if start:
+            return optimised_suffix_strategy(self.n - start)
         return optimised_strategy(self.n)
 
+    def stats(self):
+        """
+        The time spent in each kind of step of the chain, as aggregated by
+        the tracer given on construction, which should be a `StatsTracer`
+        """
+        if not hasattr(self._tracer, "stats"):
+            raise ValueError(
+                "stats() requires the isogeny to be computed with tracer=StatsTracer()"
+            )
+        return self._tracer.stats()
+
+    def trace(self, index, kind, depth=0):
+        """
+        Context manager timing a step of the chain for the tracer
+        """
+        return StepTimer(self._tracer, index, kind, depth)
+
+    def split(self, Th, zeta=None):
+        """
+        Compute the isomorphism from Th to a theta structure compatible with
+        the product E3 x E4 and set the split theta structure used to map
+        images to E3 x E4
+        """
+        with self.trace(self.n, "splitting"):
+            splitting_iso = SplittingIsomorphism(Th, zeta=zeta)
+            self._splitting = SplitThetaStructure(splitting_iso.codomain())
+        return splitting_iso
+
+    def cached_prefix(self, kernel):
+        """
+        Look up the longest prefix of the chain in the prefix cache. Returns
+        the keys of the prefixes of the chain and the cached isogenies, which
+        the kernel is pushed through. Without a cache, or on a miss, the
+        kernel is returned unchanged.
+        """
+        if self._prefix_cache is None:
+            return None, [], kernel
+
+        e = self.n + self._torsion_above
+        keys = self._prefix_cache.keys(kernel, e, self.n - 2)
+        prefix = list(self._prefix_cache.lookup(keys))
+        if not prefix:
+            return keys, prefix, kernel
+
+        self.prefix_length = len(prefix)
+        self.strategy = self.get_strategy(start=self.prefix_length)
+
+        Tp1, Tp2 = kernel
+        with self.trace(self.prefix_length - 1, "prefix"):
+            for phi in prefix:
+                Tp1, Tp2 = phi(Tp1), phi(Tp2)
+        return keys, prefix, (Tp1, Tp2)
+
+    def store_prefix(self, keys, isogeny_chain):
+        """
+        Store the prefixes of the chain in the prefix cache, unless the chain
+        was resumed from a checkpoint
+        """
+        if keys is not None:
+            self._prefix_cache.store(keys, isogeny_chain[: len(keys)])
+
+    def initial_state(self, kernel):
+        """
+        The state the chain starts from: the checkpoint given as resume_from,
+        else the longest cached prefix of the chain, else the kernel. Also
+        returns the keys of the prefixes of the chain for the prefix cache,
+        which are None when resuming from a checkpoint.
+        """
+        if self._resume_from is not None:
+            return self.restore(self._resume_from), None
+
+        keys, prefix, kernel = self.cached_prefix(kernel)
+        return ChainState(len(prefix), 0, [0], [tuple(kernel)], prefix), keys
+
+    def step_isogeny(self, k, Th, Tp1, Tp2):
+        """
+        Compute the k-th (2,2)-isogeny of the chain from the 8-torsion points
+        above its kernel
+        """
+        if k == 0:
+            return GluingThetaIsogeny(Tp1, Tp2)
+        elif k == self.n - 2:
+            # The next isogeny will be a splitting isogeny, so we know we
+            # will have one of a,b,c,d = 0. So at this point switch to
+            # dual theta coordinate
+            return ThetaIsogeny(Th, Tp1, Tp2, hadamard=(False, False))
+        elif k == self.n - 1:
+            # Compute the dual isogeny, remembering that we switched to
+            # dual theta coordinates at the previous step.
+            # We output dual theta coordinates on the product, change
+            # to hadamard=(True, True) to output standard coordinates;
+            # this does not change the conversion back to Montgomery
+            # coordinates so we might as well save an Hadamard
+            # transform anyway
+            return ThetaIsogeny(Th, Tp1, Tp2, hadamard=(True, False))
+        return ThetaIsogeny(Th, Tp1, Tp2)
+
+    def checkpoint(self, state):
+        """
+        A checkpoint of the chain in the given state, made of Python integers
+        and tuples, from which `restore()` recomputes the state
+        """
+        kernels = []
+        for k, phi in enumerate(state.isogenies):
+            encode = encode_couple_point if k == 0 else encode_theta_point
+            kernels.append(tuple(encode(T) for T in phi.kernel_points()))
+
+        return {
+            "version": CHECKPOINT_VERSION,
+            "isogeny": type(self).__name__,
+            "n": self.n,
+            "curves": encode_curves(self.E1, self.E2),
+            "kernel": tuple(encode_couple_point(T) for T in self._kernel),
+            "strategy": tuple(self.strategy),
+            "prefix_length": self.prefix_length,
+            "step": state.step,
+            "strat_idx": state.strat_idx,
+            "level": tuple(state.level),
+            "kernel_elements": tuple(
+                tuple(encode_theta_point(T) for T in ker)
+                for ker in state.kernel_elements
+            ),
+            "kernels": tuple(kernels),
+            "null_point": encode_theta_point(state.theta_structure().null_point()),
+        }
+
+    def restore(self, checkpoint):
+        """
+        The state of the chain saved in a checkpoint from `checkpoint()`. The
+        isogenies are computed again from the points above their kernels, and
+        the strategy of the checkpoint replaces the strategy of the chain.
+        """
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise ValueError("The checkpoint was written by an incompatible version")
+        if (
+            checkpoint["isogeny"] != type(self).__name__
+            or checkpoint["n"] != self.n
+            or checkpoint["curves"] != encode_curves(self.E1, self.E2)
+            or checkpoint["kernel"] != tuple(encode_couple_point(T) for T in self._kernel)
+        ):
+            raise ValueError("The checkpoint does not belong to this isogeny chain")
+
+        self.strategy = list(checkpoint["strategy"])
+        self.prefix_length = checkpoint["prefix_length"]
+
+        isogenies = []
+        with self.trace(checkpoint["step"] - 1, "checkpoint"):
+            Th = None
+            for k, points in enumerate(checkpoint["kernels"]):
+                if k == 0:
+                    Tp1, Tp2 = (decode_couple_point(self._domain, T) for T in points)
+                else:
+                    Tp1, Tp2 = (decode_theta_point(Th, T) for T in points)
+                phi = self.step_isogeny(k, Th, Tp1, Tp2)
+                Th = phi.codomain()
+                isogenies.append(phi)
+
+            if encode_theta_point(Th.null_point()) != checkpoint["null_point"]:
+                raise ValueError("The checkpoint is corrupted")
+
+            kernel_elements = [
+                tuple(decode_theta_point(Th, T) for T in ker)
+                for ker in checkpoint["kernel_elements"]
+            ]
+
+        return ChainState(
+            checkpoint["step"],
+            checkpoint["strat_idx"],
+            list(checkpoint["level"]),
+            kernel_elements,
+            isogenies,
+        )
+
+    def save_checkpoint(self, state):
+        """
+        Pass a checkpoint of the state to on_checkpoint, every
+        checkpoint_every steps before the last one
+        """
+        every = self._checkpoint_every
+        if every and state.step % every == 0 and state.step < self.n:
+            with self.trace(state.step - 1, "checkpoint"):
+                checkpoint = self.checkpoint(state)
+            self._on_checkpoint(checkpoint)
+
     def isogeny_chain(self, kernel):
         """
         Compute the codomain of the isogeny chain and store intermediate
         isogenies for evaluation
         """
-        # Extract the CouplePoints from the Kernel
-        Tp1, Tp2 = kernel
+        # Resume from a checkpoint or from the longest cached prefix of the
+        # chain, if any
+        state, keys = self.initial_state(kernel)
+        start = state.step
+        Th = state.theta_structure()
 
         # Store chain of (2,2)-isogenies
-        isogeny_chain = []
+        isogeny_chain = state.isogenies
 
         # Bookkeeping for optimal strategy
-        strat_idx = 0
-        level = [0]
-        ker = (Tp1, Tp2)
-        kernel_elements = [ker]
+        strat_idx = state.strat_idx
+        level = state.level
+        kernel_elements = state.kernel_elements
 
-        for k in range(self.n):
+        for k in range(start, self.n):
             prev = sum(level)
             ker = kernel_elements[-1]
 
@@ -75,8 +308,9 @@ class EllipticProductIsogeny(Morphism):
                 level.append(self.strategy[strat_idx])
 
                 # Perform the doublings
-                Tp1 = ker[0].double_iter(self.strategy[strat_idx])
-                Tp2 = ker[1].double_iter(self.strategy[strat_idx])
+                with self.trace(k, "doubling", len(kernel_elements)):
+                    Tp1 = ker[0].double_iter(self.strategy[strat_idx])
+                    Tp2 = ker[1].double_iter(self.strategy[strat_idx])
 
                 ker = (Tp1, Tp2)
 
@@ -87,24 +321,9 @@ class EllipticProductIsogeny(Morphism):
 
             # Compute the codomain from the 8-torsion
             Tp1, Tp2 = ker
-            if k == 0:
-                phi = GluingThetaIsogeny(Tp1, Tp2)
-            elif k == self.n - 2:
-                # The next isogeny will be a splitting isogeny, so we know we
-                # will have one of a,b,c,d = 0. So at this point switch to
-                # dual theta coordinate
-                phi = ThetaIsogeny(Th, Tp1, Tp2, hadamard=(False, False))
-            elif k == self.n - 1:
-                # Compute the dual isogeny, remembering that we switched to
-                # dual theta coordinates at the previous step.
-                # We output dual theta coordinates on the product, change
-                # to hadamard=(True, True) to output standard coordinates;
-                # this does not change the conversion back to Montgomery
-                # coordinates so we might as well save an Hadamard
-                # transform anyway
-                phi = ThetaIsogeny(Th, Tp1, Tp2, hadamard=(True, False))
-            else:
-                phi = ThetaIsogeny(Th, Tp1, Tp2)
+            kind = "gluing" if k == 0 else "isogeny"
+            with self.trace(k, kind, len(kernel_elements)):
+                phi = self.step_isogeny(k, Th, Tp1, Tp2)
 
             # Update the chain of isogenies
             Th = phi.codomain()
@@ -115,9 +334,16 @@ class EllipticProductIsogeny(Morphism):
             level.pop()
 
             # Push through points for the next step
-            kernel_elements = [(phi(T1), phi(T2)) for T1, T2 in kernel_elements]
+            with self.trace(k, "push", len(kernel_elements)):
+                kernel_elements = [(phi(T1), phi(T2)) for T1, T2 in kernel_elements]
+
+            self.save_checkpoint(
+                ChainState(k + 1, strat_idx, level, kernel_elements, isogeny_chain)
+            )
+
+        self.store_prefix(keys, isogeny_chain)
 
-        splitting_iso = SplittingIsomorphism(Th, zeta=self._zeta)
+        splitting_iso = self.split(Th, zeta=self._zeta)
         isogeny_chain.append(splitting_iso)
 
         return isogeny_chain
@@ -1,9 +1,9 @@
 from theta_isogenies.gluing_isogeny import GluingThetaIsogeny
-from theta_isogenies.isomorphism import SplittingIsomorphism
 from theta_isogenies.isogeny import ThetaIsogeny
 from theta_isogenies.product_isogeny import EllipticProductIsogeny
 from theta_isogenies.isogeny_sqrt import ThetaIsogeny4, ThetaIsogeny2
-from utilities.strategy import optimised_strategy
+from theta_isogenies.checkpoint import ChainState
+from utilities.strategy import optimised_strategy, optimised_suffix_strategy
 
 
 class EllipticProductIsogenySqrt(EllipticProductIsogeny):
@@ -16,27 +16,39 @@ class EllipticProductIsogenySqrt(EllipticProductIsogeny):
     compute the necessary data using sqrts
     """
 
-    def __init__(self, kernel, n, strategy=None, zeta=None):
-        super().__init__(kernel, n, strategy=strategy, zeta=zeta)
+    _torsion_above = 0
 
-    def get_strategy(self):
+    def get_strategy(self, start=0):
+        if start:
+            return optimised_suffix_strategy(self.n - 2 - start)
         return optimised_strategy(self.n - 2)
 
+    def step_isogeny(self, k, Th, Tp1, Tp2):
+        """
+        Compute the k-th (2,2)-isogeny of the chain, for k < n - 2, from the
+        8-torsion points above its kernel
+        """
+        if k == 0:
+            return GluingThetaIsogeny(Tp1, Tp2)
+        return ThetaIsogeny(Th, Tp1, Tp2)
+
     def isogeny_chain(self, kernel):
         """ """
-        # Extract CouplePoints from kernel
-        Tp1, Tp2 = kernel
+        # Resume from a checkpoint or from the longest cached prefix of the
+        # chain, if any
+        state, keys = self.initial_state(kernel)
+        start = state.step
+        Th = state.theta_structure()
 
         # Store chain of (2,2)-isogenies
-        isogeny_chain = []
+        isogeny_chain = state.isogenies
 
         # Bookkeeping for optimal strategy
-        strat_idx = 0
-        level = [0]
-        ker = (Tp1, Tp2)
-        kernel_elements = [ker]
+        strat_idx = state.strat_idx
+        level = state.level
+        kernel_elements = state.kernel_elements
 
-        for k in range(self.n - 2):
+        for k in range(start, self.n - 2):
             prev = sum(level)
             ker = kernel_elements[-1]
 
@@ -44,8 +56,9 @@ class EllipticProductIsogenySqrt(EllipticProductIsogeny):
                 level.append(self.strategy[strat_idx])
 
                 # Perform the doublings
-                Tp1 = ker[0].double_iter(self.strategy[strat_idx])
-                Tp2 = ker[1].double_iter(self.strategy[strat_idx])
+                with self.trace(k, "doubling", len(kernel_elements)):
+                    Tp1 = ker[0].double_iter(self.strategy[strat_idx])
+                    Tp2 = ker[1].double_iter(self.strategy[strat_idx])
 
                 ker = (Tp1, Tp2)
 
@@ -56,10 +69,9 @@ class EllipticProductIsogenySqrt(EllipticProductIsogeny):
 
             # Compute the codomain from the 8-torsion
             Tp1, Tp2 = ker
-            if k == 0:
-                phi = GluingThetaIsogeny(Tp1, Tp2)
-            else:
-                phi = ThetaIsogeny(Th, Tp1, Tp2)
+            kind = "gluing" if k == 0 else "isogeny"
+            with self.trace(k, kind, len(kernel_elements)):
+                phi = self.step_isogeny(k, Th, Tp1, Tp2)
             Th = phi.codomain()
 
             # Update the chain of isogenies
@@ -71,18 +83,27 @@ class EllipticProductIsogenySqrt(EllipticProductIsogeny):
             level.pop()
 
             # Push through points for the next step
-            kernel_elements = [(phi(T1), phi(T2)) for T1, T2 in kernel_elements]
+            with self.trace(k, "push", len(kernel_elements)):
+                kernel_elements = [(phi(T1), phi(T2)) for T1, T2 in kernel_elements]
+
+            self.save_checkpoint(
+                ChainState(k + 1, strat_idx, level, kernel_elements, isogeny_chain)
+            )
+
+        self.store_prefix(keys, isogeny_chain)
 
         # last 2 isogenies
         Tp1, Tp2 = kernel_elements[0]
-        phi = ThetaIsogeny4(Th, Tp1, Tp2, hadamard=(False, False))
+        with self.trace(self.n - 2, "isogeny", len(kernel_elements)):
+            phi = ThetaIsogeny4(Th, Tp1, Tp2, hadamard=(False, False))
         isogeny_chain.append(phi)
         Th = phi.codomain()
-        phi = ThetaIsogeny2(Th, hadamard=(True, False))
+        with self.trace(self.n - 1, "isogeny"):
+            phi = ThetaIsogeny2(Th, hadamard=(True, False))
         isogeny_chain.append(phi)
         Th = phi.codomain()
 
-        splitting_iso = SplittingIsomorphism(Th)
+        splitting_iso = self.split(Th)
         isogeny_chain.append(splitting_iso)
 
         return isogeny_chain
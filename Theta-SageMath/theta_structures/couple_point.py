@@ -1,4 +1,4 @@
-from sage.all import ZZ
+from sage.rings.integer_ring import ZZ
 from utilities.discrete_log import weil_pairing_pari
 
 
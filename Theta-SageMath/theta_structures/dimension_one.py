@@ -1,7 +1,10 @@
-from sage.all import EllipticCurve
 from collections import namedtuple
+from sage.misc.lazy_import import lazy_import
 from utilities.supersingular import montgomery_coefficient
 from utilities.fast_sqrt import sqrt_Fp2
+from utilities.cache import THETA_NULL_POINT_CACHE, fp2_to_ints, ints_to_fp2
+
+lazy_import("sage.schemes.elliptic_curves.constructor", "EllipticCurve")
 
 ThetaNullPoint = namedtuple("ThetaNullPoint_dim_1", "a b")
 
@@ -41,12 +44,21 @@ def montgomery_curve_to_theta_null_point(E):
     and T2 such that (T1,T2) forms a symplectic basis of E[4].
     There are 4 choices of T2, giving 4 different theta null points.
 
+    The two square roots only depend on A, so the result is stored in
+    THETA_NULL_POINT_CACHE keyed by (p, A).
+
     Algorithm from:
         Models of Kummer lines and Galois representation,
         Razvan Barbulescu, Damien Robert and Nicolas Sarkis
     """
     # Extract A from curve equation
     A = montgomery_coefficient(E)
+    F = A.parent()
+
+    key = (int(F.characteristic()), fp2_to_ints(A))
+    cached = THETA_NULL_POINT_CACHE.get(key)
+    if cached is not None:
+        return ThetaNullPoint(*(ints_to_fp2(F, c) for c in cached))
 
     # alpha is a root of
     # x^2 + Ax + 1
@@ -68,6 +80,7 @@ def montgomery_curve_to_theta_null_point(E):
     # (a/b) is rational so we use
     # (ab : b^2) as the theta null point
     O0 = ThetaNullPoint(ab, bb)
+    THETA_NULL_POINT_CACHE.set(key, (fp2_to_ints(ab), fp2_to_ints(bb)))
     return O0
 
 
@@ -1,13 +1,14 @@
 # Sage Imports
-from sage.all import (
-    cached_method,
-    Integer,
-    HyperellipticCurve,
-    PolynomialRing,
-)
+from sage.misc.cachefunc import cached_method
+from sage.rings.integer import Integer
+from sage.misc.lazy_import import lazy_import
 from sage.structure.element import get_coercion_model, RingElement
 from utilities.batched_inversion import batched_inversion
 
+# Only needed for debugging conversions to hyperelliptic curves
+lazy_import("sage.schemes.hyperelliptic_curves.constructor", "HyperellipticCurve")
+lazy_import("sage.rings.polynomial.polynomial_ring_constructor", "PolynomialRing")
+
 cm = get_coercion_model()
 
 
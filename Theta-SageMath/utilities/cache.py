@@ -0,0 +1,229 @@
+"""
+Bounded caches for data which only depends on a curve and is expensive to
+recompute, such as torsion bases and theta null points.
+
+Entries are stored as tuples of Python integers, so they are cheap to keep in
+memory, independent of the SageMath parent they were computed from and can be
+pickled to disk. Persistence is opt-in with `set_cache_directory()`, files are
+written atomically so many processes can share one directory.
+
+Entries on disk are read with pickle, which can run arbitrary code, so the
+cache directory must be trusted: it is created readable by its owner only, and
+files which are not owned by the current user are ignored.
+"""
+
+# Python imports
+import ast
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+# ================================= #
+#  Helpers for compact Fp2 storage  #
+# ================================= #
+
+
+def fp2_to_ints(x):
+    """
+    Represent an element x = x0 + i*x1 of Fp2 as the pair of integers
+    (x0, x1)
+    """
+    x0, x1 = x.list()
+    return int(x0), int(x1)
+
+
+def ints_to_fp2(F, x):
+    """
+    Inverse of `fp2_to_ints()` for the field F = GF(p^2)
+    """
+    return F(list(x))
+
+
+# ================================= #
+#  Atomic writes of data to disk    #
+# ================================= #
+
+
+def write_atomic(path, data):
+    """
+    Write the bytes data to path. We write to a temporary file in the same
+    directory and then rename it, so other processes never see a partial
+    file and a process stopped while writing leaves the previous file intact.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_pickle_atomic(path, obj):
+    """
+    Pickle obj to path with `write_atomic()`
+    """
+    write_atomic(path, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def write_literal_atomic(path, obj):
+    """
+    Write obj, made of Python integers, strings, tuples and dictionaries,
+    to path as a Python literal with `write_atomic()`
+    """
+    write_atomic(path, repr(obj).encode())
+
+
+def read_literal(path):
+    """
+    Read a file written by `write_literal_atomic()`. Unlike pickle, only
+    literals are evaluated, so files from untrusted directories are safe
+    to read. Raises ValueError when the file is not a literal.
+    """
+    with open(path) as f:
+        data = f.read()
+    try:
+        return ast.literal_eval(data)
+    except (SyntaxError, ValueError):
+        raise ValueError(f"{path} does not contain a Python literal")
+
+
+# ================================= #
+#  LRU cache with optional storage  #
+# ================================= #
+
+
+class LRUCache:
+    """
+    A least recently used cache with at most `maxsize` entries in memory.
+
+    When a directory is set, every entry is also written to disk, and a
+    miss in memory will first check the disk before reporting a miss. Keys
+    and values must be picklable and should only contain Python types.
+    """
+
+    def __init__(self, name, maxsize=128, directory=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.directory = directory
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"LRUCache '{self.name}' with {len(self)}/{self.maxsize} entries in memory"
+
+    def _path(self, key):
+        """
+        Location on disk of the entry for a given key
+        """
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        return os.path.join(self.directory, self.name, f"{digest}.pkl")
+
+    def _load(self, key):
+        """
+        Read an entry from disk, returns None for missing or unreadable files
+        and for files of other users
+        """
+        path = self._path(key)
+        try:
+            if hasattr(os, "getuid") and os.stat(path).st_uid != os.getuid():
+                return None
+            with open(path, "rb") as f:
+                stored_key, value = pickle.load(f)
+        except Exception:
+            return None
+
+        # Protect against the (very unlikely) hash collision
+        if stored_key != key:
+            return None
+        return value
+
+    def _store(self, key, value):
+        """
+        Write an entry to disk with `write_pickle_atomic()`, so other
+        processes never see a partial file.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        write_pickle_atomic(path, (key, value))
+
+    def _insert(self, key, value):
+        """
+        Add an entry to memory, evicting the least recently used
+        entries when the cache is full. Assumes the lock is held.
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return the value stored for key, or None on a miss
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+
+        if self.directory is None:
+            return None
+
+        value = self._load(key)
+        if value is not None:
+            with self._lock:
+                self._insert(key, value)
+        return value
+
+    def set(self, key, value):
+        """
+        Store value for key in memory, and on disk if a directory is set
+        """
+        with self._lock:
+            self._insert(key, value)
+
+        if self.directory is not None:
+            self._store(key, value)
+
+    def clear(self):
+        """
+        Empty the in-memory cache, entries on disk are kept
+        """
+        with self._lock:
+            self._data.clear()
+
+
+# Torsion bases with their Weil pairing, keyed by (p, A, D)
+TORSION_BASIS_CACHE = LRUCache("torsion_basis", maxsize=64)
+
+# Dimension one theta null points, keyed by (p, A)
+THETA_NULL_POINT_CACHE = LRUCache("theta_null_point", maxsize=256)
+
+# Implementation of GF(p^2) chosen by `select_fp2_implementation()` with its
+# timings, keyed by p, the implementations available and the weights of the
+# operations
+FIELD_IMPLEMENTATION_CACHE = LRUCache("field_implementation", maxsize=16)
+
+
+def set_cache_directory(directory):
+    """
+    Persist all caches to the given directory, or keep them in memory
+    only when directory is None. The directory must be trusted, as entries
+    are unpickled from it.
+    """
+    for cache in (
+        TORSION_BASIS_CACHE,
+        THETA_NULL_POINT_CACHE,
+        FIELD_IMPLEMENTATION_CACHE,
+    ):
+        cache.directory = directory
@@ -1,5 +1,8 @@
+# Python imports
+import functools
+
 # Sage imports
-from sage.all import ZZ
+from sage.rings.integer_ring import ZZ
 
 # import pari for fast dlog
 import cypari2
@@ -12,6 +15,32 @@ import cypari2
 pari = cypari2.Pari()
 
 
+# ===================================== #
+#  Cached conversions of Sage to pari   #
+# ===================================== #
+
+
+@functools.lru_cache(maxsize=128)
+def pari_curve(E):
+    """
+    Return the pari ellinit structure of the elliptic curve E.
+
+    Converting a Sage curve to pari is done once per curve and the
+    result is kept in a bounded cache, so repeated pairings on the
+    same curve skip the conversion entirely.
+    """
+    return pari(E)
+
+
+def pari_point(P):
+    """
+    Convert a Sage point P to a pari point [x, y] (or [0] for the
+    identity). The result can be reused for many pairings with the
+    `*_pari_points` functions below.
+    """
+    return pari(P)
+
+
 def discrete_log_pari(a, base, order):
     """
     Wrapper around pari discrete log. Works like a.log(b),
@@ -33,7 +62,17 @@ def weil_pairing_pari(P, Q, D, check=False):
         if nP.is_zero() or nQ.is_zero():
             raise ValueError("points must both be n-torsion")
 
-    return pari.ellweilpairing(P.curve(), P, Q, D)
+    E = pari_curve(P.curve())
+    return pari.ellweilpairing(E, pari_point(P), pari_point(Q), D)
+
+
+def weil_pairing_pari_points(E, P, Q, D):
+    """
+    Same as weil_pairing_pari, but all inputs have already been
+    converted to pari, with E = pari_curve(E) and P, Q from
+    pari_point(). Used when many pairings share a curve or point.
+    """
+    return pari.ellweilpairing(E, P, Q, D)
 
 
 def tate_pairing_pari(P, Q, D):
@@ -44,7 +83,16 @@ def tate_pairing_pari(P, Q, D):
 
     P.tate_pairing(Q, D, k) == pari.elltatepairing(E, P, Q, D)**((p^k - 1) / D)
     """
-    E = P.curve()
+    E = pari_curve(P.curve())
+    return pari.elltatepairing(E, pari_point(P), pari_point(Q), D)
+
+
+def tate_pairing_pari_points(E, P, Q, D):
+    """
+    Same as tate_pairing_pari, but all inputs have already been
+    converted to pari, with E = pari_curve(E) and P, Q from
+    pari_point().
+    """
     return pari.elltatepairing(E, P, Q, D)
 
 
@@ -169,18 +217,22 @@ def BiDLP(R, P, Q, D, ePQ=None):
     which is helpful when running multiple BiDLP problems with P,Q
     as input. This happens, for example, during compression.
     """
+    # Convert everything to pari once
+    E = pari_curve(P.curve())
+    xP, xQ, xR = pari_point(P), pari_point(Q), pari_point(R)
+
     # e(P,Q)
     if ePQ:
         pair_PQ = ePQ
     else:
-        pair_PQ = weil_pairing_pari(P, Q, D)
+        pair_PQ = weil_pairing_pari_points(E, xP, xQ, D)
 
     # Write R = aP + bQ for unknown a,b
     # e(R, Q) = e(P, Q)^a
-    pair_a = weil_pairing_pari(R, Q, D)
+    pair_a = weil_pairing_pari_points(E, xR, xQ, D)
 
     # e(R,-P) = e(P, Q)^b
-    pair_b = weil_pairing_pari(R, -P, D)
+    pair_b = weil_pairing_pari_points(E, xR, pari.ellneg(E, xP), D)
 
     # Now solve the dlog in Fq
     a = discrete_log_pari(pair_a, pair_PQ, D)
@@ -213,18 +265,22 @@ def BiDLP_power_two(R, P, Q, e, window, ePQ=None):
     D = 2**e
     exp = (p**2 - 1) // D
 
+    # Convert everything to pari once
+    E = pari_curve(P.curve())
+    xP, xQ, xR = pari_point(P), pari_point(Q), pari_point(R)
+
     # e(P,Q)
     if ePQ:
         pair_PQ = ePQ
     else:
-        pair_PQ = tate_pairing_pari(P, Q, D) ** exp
+        pair_PQ = tate_pairing_pari_points(E, xP, xQ, D) ** exp
 
     # Write R = aP + bQ for unknown a,b
     # e(R, Q) = e(P, Q)^a
-    pair_a = tate_pairing_pari(Q, -R, D) ** exp
+    pair_a = tate_pairing_pari_points(E, xQ, pari.ellneg(E, xR), D) ** exp
 
     # e(R,-P) = e(P, Q)^b
-    pair_b = tate_pairing_pari(P, R, D) ** exp
+    pair_b = tate_pairing_pari_points(E, xP, xR, D) ** exp
 
     # Now solve the dlog in Fq
     a = windowed_pohlig_hellman(pair_a, pair_PQ, e, window)
@@ -26,6 +26,16 @@ def invert_or_zero(x):
     return 1 / x
 
 
+def is_square_Fp2(x):
+    """
+    Quadratic residuosity in Fp2 computed from the norm:
+    x = x0 + i*x1 is a square in Fp2 if and only if
+    x0^2 + x1^2 is a square in Fp
+    """
+    x0, x1 = x.list()
+    return (x0 * x0 + x1 * x1).is_square()
+
+
 def sqrt_Fp(x):
     """
     Faster computation of sqrt in Fp assuming p = 3 mod 4
@@ -0,0 +1,219 @@
+"""
+Selection of the implementation of GF(p^2) = GF(p)[i] / (i^2 + 1) used for the
+computations.
+
+SageMath can back a finite field with Givaro, NTL or pari. Which of these can
+be used depends on the field: Givaro only supports fields with fewer than 2^16
+elements and NTL only fields of characteristic two, so for the primes of
+cryptographic size used here pari (`pari_ffelt`) is usually the only one
+available. Other implementations of Fp2 can be registered with
+`register_fp2_backend()`, and should return a SageMath finite field, as curves
+are constructed over it.
+
+`fp2_field(p)` is deterministic: it uses the implementation passed to it, or
+the one set with `set_fp2_implementation()`, and otherwise lets SageMath pick
+its default, so results never depend on timings. Benchmarking is opt-in:
+`select_fp2_implementation(p)` microbenchmarks multiplication, squaring,
+inversion, square roots and exponentiation for every implementation available
+for p and returns the fastest for the arithmetic used by the theta model. The
+decision is cached for p, and persisted with the other caches when a cache
+directory is set, so it is only made once per prime. To use it:
+
+    implementation, _ = select_fp2_implementation(p)
+    set_fp2_implementation(implementation)
+"""
+
+# Python imports
+import time
+
+# Sage imports
+from sage.misc.lazy_import import lazy_import
+from sage.misc.prandom import randint
+
+# Local imports
+from utilities.cache import FIELD_IMPLEMENTATION_CACHE
+from utilities.fast_sqrt import sqrt_Fp2
+
+lazy_import("sage.rings.finite_rings.finite_field_constructor", "GF")
+
+# Implementations of GF(p^2) in SageMath, in order of preference
+SAGE_IMPLEMENTATIONS = ("givaro", "ntl", "pari_ffelt")
+
+# Operations timed by `microbenchmark()`
+FIELD_OPERATIONS = ("mul", "sqr", "inv", "sqrt", "exp")
+
+# The theta model arithmetic is dominated by multiplications and squarings,
+# inversions and square roots only appear a few times per isogeny
+SELECTION_WEIGHTS = {"mul": 1, "sqr": 1}
+
+# Number of times each operation is timed
+MICROBENCHMARK_N = 2000
+
+# Custom backends: name -> function p -> GF(p^2)
+_CUSTOM_BACKENDS = {}
+
+# Implementation used by `fp2_field()` when none is given, None for the
+# default of SageMath
+_DEFAULT_IMPLEMENTATION = None
+
+# ===================================== #
+#  Constructing the available backends  #
+# ===================================== #
+
+
+def register_fp2_backend(name, constructor):
+    """
+    Make the field returned by constructor(p), which should be GF(p^2)
+    with a generator i such that i^2 = -1, a candidate for `fp2_field()`
+    """
+    if name in SAGE_IMPLEMENTATIONS:
+        raise ValueError(f"{name} is already the name of a SageMath implementation")
+    _CUSTOM_BACKENDS[name] = constructor
+
+
+def _construct(p, implementation, name="i"):
+    if implementation is None:
+        return GF(p**2, name=name, modulus=[1, 0, 1])
+    if implementation in _CUSTOM_BACKENDS:
+        return _CUSTOM_BACKENDS[implementation](p)
+    return GF(p**2, name=name, modulus=[1, 0, 1], impl=implementation)
+
+
+def available_implementations(p):
+    """
+    The fields GF(p^2) of every implementation which supports p, as a
+    dictionary keyed by the name of the implementation
+    """
+    fields = {}
+    for implementation in SAGE_IMPLEMENTATIONS + tuple(_CUSTOM_BACKENDS):
+        try:
+            fields[implementation] = _construct(p, implementation)
+        except (ValueError, TypeError, ImportError, NotImplementedError):
+            # Either the implementation does not support this field, or
+            # SageMath was built without it
+            continue
+    return fields
+
+
+# =================== #
+#  Microbenchmarking  #
+# =================== #
+
+
+def _time_ns(f, xs, ys=None):
+    """
+    Average time in nanoseconds of f over the elements xs, or pairs of
+    elements of xs and ys
+    """
+    if ys is None:
+        t0 = time.perf_counter_ns()
+        for x in xs:
+            f(x)
+    else:
+        t0 = time.perf_counter_ns()
+        for x, y in zip(xs, ys):
+            f(x, y)
+    return (time.perf_counter_ns() - t0) / len(xs)
+
+
+def microbenchmark(F, n=MICROBENCHMARK_N):
+    """
+    Average time in nanoseconds of each operation of `FIELD_OPERATIONS`
+    on random elements of F = GF(p^2). Square roots are those from
+    `utilities/fast_sqrt.py`, exponentiations are by an exponent of
+    the size of p.
+    """
+    p = F.characteristic()
+    e = randint(p // 2, p)
+
+    xs = [F.random_element() for _ in range(n)]
+    ys = [F.random_element() for _ in range(n)]
+    xs = [x if x else F.one() for x in xs]
+    squares = [x * x for x in xs]
+
+    # Fewer of the expensive operations are needed for stable timings
+    m = max(n // 20, 1)
+    return {
+        "mul": _time_ns(lambda x, y: x * y, xs, ys),
+        "sqr": _time_ns(lambda x: x * x, xs),
+        "inv": _time_ns(lambda x: ~x, xs),
+        "sqrt": _time_ns(sqrt_Fp2, squares[:m]),
+        "exp": _time_ns(lambda x: x**e, xs[:m]),
+    }
+
+
+def _score(timings, weights=SELECTION_WEIGHTS):
+    return sum(w * timings[op] for op, w in weights.items())
+
+
+# ========================= #
+#  Choosing the field used  #
+# ========================= #
+
+
+def select_fp2_implementation(p, weights=SELECTION_WEIGHTS, verbose=False):
+    """
+    The name of the fastest implementation of GF(p^2) for the weighted
+    sum of the timings of `microbenchmark()`, along with the timings of
+    every implementation. The decision is cached per prime p and set of
+    available implementations.
+
+    This does not change the field returned by `fp2_field()`, pass the
+    name to `set_fp2_implementation()` to use it.
+    """
+    fields = available_implementations(p)
+    if not fields:
+        raise ValueError(f"no implementation of GF(p^2) is available for {p = }")
+
+    key = (int(p), tuple(fields), tuple(sorted(weights.items())))
+    cached = FIELD_IMPLEMENTATION_CACHE.get(key)
+    if cached is not None:
+        implementation, timings = cached
+    elif len(fields) == 1 and not verbose:
+        # No choice to make, so no need to benchmark
+        implementation, timings = next(iter(fields)), {}
+    else:
+        timings = {name: microbenchmark(F) for name, F in fields.items()}
+        implementation = min(timings, key=lambda name: _score(timings[name], weights))
+        FIELD_IMPLEMENTATION_CACHE.set(key, (implementation, timings))
+
+    if verbose:
+        print_field_report(p, implementation, timings)
+    return implementation, timings
+
+
+def set_fp2_implementation(implementation):
+    """
+    Use the given implementation in `fp2_field()` when none is passed to
+    it, or the default of SageMath when implementation is None
+    """
+    global _DEFAULT_IMPLEMENTATION
+    if implementation is not None and implementation not in (
+        SAGE_IMPLEMENTATIONS + tuple(_CUSTOM_BACKENDS)
+    ):
+        raise ValueError(f"unknown implementation of GF(p^2): {implementation}")
+    _DEFAULT_IMPLEMENTATION = implementation
+
+
+def fp2_field(p, name="i", implementation=None):
+    """
+    The field GF(p^2) = GF(p)[i] / (i^2 + 1) with the given implementation,
+    or the one set with `set_fp2_implementation()`, and otherwise the default
+    of SageMath
+    """
+    if implementation is None:
+        implementation = _DEFAULT_IMPLEMENTATION
+    return _construct(p, implementation, name=name)
+
+
+def print_field_report(p, implementation, timings):
+    """
+    Print the timing of each operation for every implementation, in
+    nanoseconds and relative to a multiplication
+    """
+    print(f"GF(p^2) with {int(p).bit_length()}-bit p, using {implementation}")
+    for name, t in timings.items():
+        marker = "*" if name == implementation else " "
+        print(f"  {marker} {name}:")
+        for op in FIELD_OPERATIONS:
+            print(f"      {op:>4}: {t[op]:12.1f} ns ({t[op] / t['mul']:8.2f} M)")
@@ -0,0 +1,355 @@
+"""
+Opt-in counting of field operations, used to check the costs documented in
+the docstrings (e.g. "Cost: 8S 6M") and the costs used to price strategies.
+
+Field elements are wrapped in `CountingElement`, which behaves like the
+underlying SageMath element but records every multiplication (M), squaring
+(S), inversion (I), square root (sqrt), exponentiation (exp) and addition or
+subtraction (a) in an `OperationCounter`. Multiplications by integers are
+treated as free, as are multiplications by the constants 0, 1 and -1 which
+are not wrapped. The result of any operation with a wrapped element is again
+wrapped, so wrapping the inputs of a function is enough to count everything it
+does in the field.
+
+Operations are recorded in total, for the function which performed them (the
+innermost Python function outside of this module), for the current step set
+with `OperationCounter.step()` and for any active `OperationCounter.measure()`.
+
+Example:
+
+    counter = OperationCounter()
+    X, Z, A, C = counter.wrap([X, Z, A, C])
+    with counter.measure() as cost:
+        KummerPoint.xDBL(X, Z, A, C)
+    format_cost(cost)  # "4M 2S 8a"
+
+Nothing in the package uses this module, so it has no impact on the timings
+unless elements are wrapped explicitly.
+"""
+
+# Python imports
+import re
+import sys
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# Sage imports
+from sage.rings.integer import Integer
+
+# Local imports
+import utilities.fast_sqrt
+
+# Order used when printing costs
+OPERATIONS = ("M", "S", "I", "sqrt", "exp", "a")
+
+# Costs are written as e.g. "8S 6M", "4M + 2S + 8a" or "42M 1S 1I + 1 sqrt"
+_COST_TERM = re.compile(r"(\d+)\s*(sqrt|exp|M|S|I|a|A)\b")
+_COST_STRING = re.compile(r"^(\s*\+?\s*\d+\s*(sqrt|exp|M|S|I|a|A)\b)+\s*$")
+
+# ============================ #
+#  Parsing and printing costs  #
+# ============================ #
+
+
+def parse_cost(cost):
+    """
+    Parse a cost such as "8S 6M" or "4M + 2S + 8a" into a Counter. Returns
+    None when the cost is not a plain sum of operations, e.g. "40M per pair".
+    """
+    if not _COST_STRING.match(cost):
+        return None
+    counts = Counter()
+    for n, op in _COST_TERM.findall(cost):
+        counts["a" if op == "A" else op] += int(n)
+    return counts
+
+
+def documented_cost(f):
+    """
+    The cost given on the "Cost:" line of the docstring of f, up to any
+    comment after a comma, parsed with `parse_cost()`. Returns None if there
+    is no such line or it cannot be parsed
+    """
+    doc = getattr(f, "__doc__", None) or ""
+    match = re.search(r"Cost:\s*([^,\n]+)", doc)
+    if match is None:
+        return None
+    return parse_cost(match.group(1))
+
+
+def format_cost(counts, operations=OPERATIONS):
+    """
+    Format a Counter of operations as e.g. "6M 8S"
+    """
+    terms = [f"{counts[op]}{' ' if len(op) > 1 else ''}{op}" for op in operations if counts[op]]
+    return " ".join(terms) or "0"
+
+
+# =================== #
+#  Counting elements  #
+# =================== #
+
+
+class OperationCounter:
+    """
+    Records the field operations performed on elements wrapped
+    with `OperationCounter.wrap()`
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all recorded operations
+        """
+        self.total = Counter()
+        self.by_function = defaultdict(Counter)
+        self.by_step = defaultdict(Counter)
+        self._step = None
+        self._measures = []
+
+    def record(self, op, n=1):
+        """
+        Record n operations of type op
+        """
+        self.total[op] += n
+        self.by_function[_caller()][op] += n
+        if self._step is not None:
+            self.by_step[self._step][op] += n
+        for counts in self._measures:
+            counts[op] += n
+
+    @contextmanager
+    def step(self, label):
+        """
+        Attribute all operations within the context to the step label
+        """
+        previous, self._step = self._step, label
+        try:
+            yield
+        finally:
+            self._step = previous
+
+    @contextmanager
+    def measure(self):
+        """
+        Yields a Counter of the operations performed within the context
+        """
+        counts = Counter()
+        self._measures.append(counts)
+        try:
+            yield counts
+        finally:
+            self._measures.remove(counts)
+
+    def wrap(self, x):
+        """
+        Wrap a field element, or the field elements in a list or tuple,
+        so that operations on them are counted
+        """
+        if isinstance(x, (list, tuple)):
+            return type(x)(self.wrap(y) for y in x)
+        if isinstance(x, CountingElement):
+            return x
+        return CountingElement(x, self)
+
+    @contextmanager
+    def hooks(self):
+        """
+        Count the square roots from `utilities/fast_sqrt.py` as a single
+        operation, rather than the exponentiations they are made of, in
+        every module which has imported them
+        """
+
+        def sqrt_Fp2(x, canonical=False):
+            self.record("sqrt")
+            return self.wrap(fast_sqrt_Fp2(unwrap(x), canonical=canonical))
+
+        def is_square_Fp2(x):
+            self.record("exp")
+            return fast_is_square_Fp2(unwrap(x))
+
+        fast_sqrt_Fp2 = utilities.fast_sqrt.sqrt_Fp2
+        fast_is_square_Fp2 = utilities.fast_sqrt.is_square_Fp2
+        replacements = {
+            id(fast_sqrt_Fp2): sqrt_Fp2,
+            id(fast_is_square_Fp2): is_square_Fp2,
+        }
+
+        patched = []
+        for module in list(sys.modules.values()):
+            for name, f in list(getattr(module, "__dict__", {}).items()):
+                if id(f) in replacements:
+                    patched.append((module, name, f))
+                    setattr(module, name, replacements[id(f)])
+        try:
+            yield self
+        finally:
+            for module, name, f in patched:
+                setattr(module, name, f)
+
+
+def _caller():
+    """
+    Name of the innermost function outside of this module
+    """
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "<unknown>"
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{frame.f_globals.get('__name__')}.{name}"
+
+
+def unwrap(x):
+    """
+    Remove the counting wrapper from an element, or the elements of a list
+    or tuple
+    """
+    if isinstance(x, (list, tuple)):
+        return type(x)(unwrap(y) for y in x)
+    if isinstance(x, CountingElement):
+        return x.value
+    return x
+
+
+def _is_free(x):
+    """
+    Multiplications by integers and by the constants 0, 1 and -1 of the
+    field (such as the leading coefficient of a monic polynomial) are free
+    """
+    if isinstance(x, (int, Integer)):
+        return True
+    return not isinstance(x, CountingElement) and (x.is_zero() or x.is_one() or (-x).is_one())
+
+
+class CountingElement:
+    """
+    A field element which records the operations performed on it in an
+    `OperationCounter`. Supports the arithmetic used by the theta, Kummer
+    and Mumford code; other methods are forwarded to the wrapped element.
+    """
+
+    __slots__ = ("value", "counter")
+
+    def __init__(self, value, counter):
+        self.value = value
+        self.counter = counter
+
+    def _new(self, value):
+        return CountingElement(value, self.counter)
+
+    def __repr__(self):
+        return repr(self.value)
+
+    def parent(self):
+        """
+        The parent of the wrapped element, so constants created from it
+        are compatible with the rest of the code
+        """
+        return self.value.parent()
+
+    # Additions and subtractions
+
+    def __add__(self, other):
+        self.counter.record("a")
+        return self._new(self.value + unwrap(other))
+
+    def __radd__(self, other):
+        self.counter.record("a")
+        return self._new(unwrap(other) + self.value)
+
+    def __sub__(self, other):
+        self.counter.record("a")
+        return self._new(self.value - unwrap(other))
+
+    def __rsub__(self, other):
+        self.counter.record("a")
+        return self._new(unwrap(other) - self.value)
+
+    def __neg__(self):
+        return self._new(-self.value)
+
+    # Multiplications, squarings and inversions
+
+    def __mul__(self, other):
+        if other is self:
+            self.counter.record("S")
+        elif not _is_free(other):
+            self.counter.record("M")
+        return self._new(self.value * unwrap(other))
+
+    def __rmul__(self, other):
+        if not _is_free(other):
+            self.counter.record("M")
+        return self._new(unwrap(other) * self.value)
+
+    def __truediv__(self, other):
+        self.counter.record("I")
+        if not _is_free(other):
+            self.counter.record("M")
+        return self._new(self.value / unwrap(other))
+
+    def __rtruediv__(self, other):
+        self.counter.record("I")
+        if not _is_free(other):
+            self.counter.record("M")
+        return self._new(unwrap(other) / self.value)
+
+    def __invert__(self):
+        self.counter.record("I")
+        return self._new(~self.value)
+
+    def inverse(self):
+        return ~self
+
+    def __pow__(self, e):
+        if e == 2:
+            self.counter.record("S")
+        elif e == -1:
+            self.counter.record("I")
+        elif e < 0:
+            self.counter.record("I")
+            self.counter.record("exp")
+        elif e > 2:
+            self.counter.record("exp")
+        return self._new(self.value**e)
+
+    def sqrt(self, *args, **kwargs):
+        self.counter.record("sqrt")
+        return self.counter.wrap(self.value.sqrt(*args, **kwargs))
+
+    def is_square(self):
+        self.counter.record("exp")
+        return self.value.is_square()
+
+    # Comparisons are free
+
+    def __eq__(self, other):
+        return self.value == unwrap(other)
+
+    def __ne__(self, other):
+        return self.value != unwrap(other)
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def is_zero(self):
+        return self.value.is_zero()
+
+    def is_one(self):
+        return self.value.is_one()
+
+    def __getattr__(self, name):
+        # Forward public methods to the wrapped element. Private methods
+        # are not forwarded so the coercion model does not mistake this
+        # for a SageMath element and instead falls back to __radd__ etc.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.value, name)
@@ -1,8 +1,6 @@
-from sage.all import(
-    ZZ,
-    prod,
-    cached_function
-)
+from sage.rings.integer_ring import ZZ
+from sage.misc.misc_c import prod
+from sage.misc.cachefunc import cached_function
 
 # ================================================== #
 #  Code to check whether a group element has order D #
@@ -74,6 +72,9 @@ def has_order_D(G, D, multiplicative=False):
     which means we can use this when computing the order
     of points and elements in Fp^k when checking the 
     multiplicative order of the Weil pairing output
+
+    Additive elements may be points on E or KummerPoints,
+    in which case all the multiplications are x-only ladders
     """
     # For the case when we work with elements of Fp^k
     if multiplicative:
@@ -81,10 +82,14 @@ def has_order_D(G, D, multiplicative=False):
         is_identity = lambda a: a == 1
         identity = 1
     # For the case when we work with elements of E / Fp^k
+    # or x-only points on the Kummer line of E
     else:
         group_action = lambda a, k: k * a
         is_identity = lambda a: a.is_zero()
-        identity = G.curve()(0)
+        if hasattr(G, "curve"):
+            identity = G.curve()(0)
+        else:
+            identity = G.parent().zero()
 
     if is_identity(G):
         return False
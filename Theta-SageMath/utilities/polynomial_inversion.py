@@ -1,3 +1,5 @@
+from utilities.batched_inversion import batched_inversion
+
 # ====================================== #
 #  Compute f^(-1) mod g for f,g in R[X]  #
 # ====================================== #
@@ -45,20 +47,63 @@ def invert_mod_polynomial_quartic(f, g):
 
     - 48M 2I (total)
     """
-    R = f.parent()
+    return invert_mod_polynomial_quartic_many([f], [g])[0]
+
+def invert_mod_polynomial_quartic_many(fs, gs, monic=False):
+    """
+    Given lists of polynomials f, g with deg(g) = 4
+    and deg(f) < deg(g) compute f^(-1) mod g for 
+    each pair.
+
+    The two inversions of `invert_mod_polynomial_quartic`
+    are shared between all pairs with Montgomery's trick.
+    When monic is True, the g are assumed to be monic.
 
-    # Extract out the coefficients
-    f0, f1, f2, f3 = f.list()
-    g0, g1, g2, g3, g4 = g.monic().list()
+    Cost: (48M + 6M) per pair and 2I
+    """
+    R = fs[0].parent()
 
     # First, make g monic
-    # 1I 4M
-    if not g4.is_one():
-        inv_g4 = 1/g4
-        g0 *= inv_g4
-        g1 *= inv_g4
-        g2 *= inv_g4
-        g3 *= inv_g4
+    # 1I 4M per pair
+    if monic:
+        gs = [g.list()[:4] for g in gs]
+    else:
+        inv_g4s = batched_inversion(*(g[4] for g in gs))
+        gs = [[gi*inv_g4 for gi in g.list()[:4]] for g, inv_g4 in zip(gs, inv_g4s)]
+
+    fs = [f.padded_list(4) for f in fs]
+    return [R(h) for h in invert_mod_quartic_coefficients_many(fs, gs)]
+
+def invert_mod_quartic_coefficients_many(fs, gs):
+    """
+    Given lists of coefficients [f0, f1, f2, f3] and [g0, g1, g2, g3] 
+    of f and monic g with deg(f) < deg(g) = 4 compute the coefficients 
+    of f^(-1) mod g for each pair, sharing the inversion between all 
+    pairs with Montgomery's trick.
+
+    Cost: (40M + 7M) per pair and 1I
+    """
+    # Compute the adjugate and determinant for each pair
+    systems = [_quartic_inverse_system(f, g) for f, g in zip(fs, gs)]
+
+    # Invert the determinants
+    # 1I
+    det_invs = batched_inversion(*(det for _, det in systems))
+
+    # Compute solution
+    # 4M per pair
+    return [[Di*det_inv for Di in adj] for (adj, _), det_inv in zip(systems, det_invs)]
+
+def _quartic_inverse_system(f, g):
+    """
+    Given the coefficients of f and of the monic g with deg(f) < deg(g) = 4,
+    compute the vector (D1, D2, D3, D4) and the determinant det such that
+    f^(-1) mod g has coefficients Di / det
+
+    Cost: 40M
+    """
+    f0, f1, f2, f3 = f
+    g0, g1, g2, g3 = g
 
     # Compute the matrix coefficients
     # M = [[a1, a2, a3, a4]
@@ -111,15 +156,4 @@ def invert_mod_polynomial_quartic(f, g):
 
     det  = a1*D1 + a2*D2 + a3*D3 + a4*D4
 
-    # Invert the determinant
-    # 1I
-    det_inv = 1/det
-
-    # Compute solution
-    # 4M
-    h0 = D1*det_inv
-    h1 = D2*det_inv
-    h2 = D3*det_inv
-    h3 = D4*det_inv
-
-    return R([h0,h1,h2,h3])
\ No newline at end of file
+    return (D1, D2, D3, D4), det
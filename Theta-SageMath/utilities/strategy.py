@@ -35,8 +35,29 @@ import sys
 
 sys.setrecursionlimit(1500)
 
+# Costs (regular_cost, leftmost_cost) for the doublings and
+# (regular_cost, first_right_cost) for the images of the theta
+# model (2,2)-chain, where the gluing is much more expensive
+THETA_LEFT_COST = (47, 333)
+THETA_RIGHT_COST = (24, 250)
+
+# The same costs for the (2,2)-chain in the Mumford model, for the pair
+# of kernel divisors. The gluing happens before the tree, so the left edge
+# already lives on the first Jacobian.
+#
+# These are timings in microseconds from
+# `benchmarks/benchmark_richelot_strategy.py` (affine_dbl_iter_many for a
+# doubling, FromJacToJac and RichelotCorr.map_many for an image), which
+# gives a doubling of 191us and an image of 615us for DIAMONDS[2] and
+# 200us and 671-688us for DIAMONDS[4]. The leftmost edge costs the same as
+# the rest of the tree. The resulting strategy computes the chain in about
+# 390ms against 395ms for `optimised_strategy_old(n, mul_c=0.175)` for
+# DIAMONDS[2], and 781ms against 801ms for DIAMONDS[4] (median of 15 runs).
+RICHELOT_LEFT_COST = (190, 190)
+RICHELOT_RIGHT_COST = (615, 615)
+
 # fmt: off
-def optimised_strategy(n):
+def optimised_strategy(n, left_cost=THETA_LEFT_COST, right_cost=THETA_RIGHT_COST, with_cost=False):
     """
     A modification of
 
@@ -47,13 +68,17 @@ def optimised_strategy(n):
     the tree. This is partiularly useful for (2,2) isogenies, where the gluing
     doubling and images have a much higher cost than the rest of the tree.
 
+    The costs left_cost = (regular_cost, left_branch_cost) of a doubling and
+    right_cost = (regular_cost, first_right_cost) of an image default to the
+    costs of the theta model. When with_cost is True, the cost of the strategy
+    predicted with these costs is also returned, which is the cost given by
+    `strategy_cost()`.
+
     Thanks to Robin Jadoul for helping with the implementation of this function 
     via personal communication
     """
 
-    # Define the costs and initalise the nodes which we store during doubling
-    left_cost = (47, 333)       # (regular_cost, left_branch_cost) Double
-    right_cost = (24, 250)  # (regular_cost, first_right_cost) Images
+    # Initalise the nodes which we store during doubling
     checkpoints = ({}, {})  # (inner, left edge)
 
     @functools.cache
@@ -121,4 +146,89 @@ def optimised_strategy(n):
     # Use the checkpoints to compute the list
     l = convert(n, checkpoints)
 
+    if with_cost:
+        return l, c
     return l
+
+
+def optimised_strategy_richelot(n):
+    """
+    Optimised strategy for the (2,2)-chain in the Mumford model
+    computed by `split_richelot_chain`, using the costs of the 
+    divisor doublings and images through the Richelot isogenies
+    """
+    return optimised_strategy(
+        n, left_cost=RICHELOT_LEFT_COST, right_cost=RICHELOT_RIGHT_COST
+    )
+
+
+def optimised_suffix_strategy(n, left_cost=THETA_LEFT_COST, right_cost=THETA_RIGHT_COST):
+    """
+    Optimised strategy for the last n steps of a (2,2)-chain, as computed
+    when the chain resumes from a prefix which contains the gluing, so that
+    every step has the regular cost
+    """
+    if n < 1:
+        return []
+    return optimised_strategy(
+        n, left_cost=(left_cost[0],) * 2, right_cost=(right_cost[0],) * 2
+    )
+
+
+# ================================================ #
+#     Replay a strategy for the (2,2)-chain        #
+# ================================================ #
+
+
+def strategy_moves(strategy, n):
+    """
+    Walk the strategy as in `EllipticProductIsogeny.isogeny_chain()` and
+    return the list of moves (direction, k, count, leftmost), in the order
+    the chain performs them, where:
+
+    - ("left", k, d, leftmost) doubles the pair of kernel points d times
+      before computing the k-th (2,2)-isogeny
+    - ("right", k, m, leftmost) pushes the m stored pairs of kernel points
+      through the k-th (2,2)-isogeny
+
+    and leftmost is True for the moves priced with the leftmost costs: the
+    doublings on E1 x E2 and the images through the gluing
+    """
+    moves = []
+    strat_idx = 0
+    level = [0]
+    kernel_elements = 1
+
+    for k in range(n):
+        prev = sum(level)
+        while prev != (n - 1 - k):
+            d = strategy[strat_idx]
+            level.append(d)
+            moves.append(("left", k, d, k == 0))
+            kernel_elements += 1
+            prev += d
+            strat_idx += 1
+
+        kernel_elements -= 1
+        level.pop()
+        moves.append(("right", k, kernel_elements, k == 0))
+
+    return moves
+
+
+def move_cost(move, left_cost=THETA_LEFT_COST, right_cost=THETA_RIGHT_COST):
+    """
+    The cost of a move from `strategy_moves()`
+    """
+    direction, _, count, leftmost = move
+    if direction == "left":
+        return count * left_cost[leftmost]
+    return count * right_cost[leftmost]
+
+
+def strategy_cost(strategy, n, left_cost=THETA_LEFT_COST, right_cost=THETA_RIGHT_COST):
+    """
+    The cost of computing a (2,2)-chain of length n with the strategy, using
+    the costs of `optimised_strategy()`
+    """
+    return sum(move_cost(m, left_cost, right_cost) for m in strategy_moves(strategy, n))
@@ -2,13 +2,25 @@
 Helper functions for the supersingular elliptic curve computations in FESTA
 """
 
+# Python imports
+import functools
+
 # Sage Imports
-from sage.all import ZZ
+from sage.rings.integer_ring import ZZ
+from sage.misc.lazy_import import lazy_import
 
 # Local imports
 from utilities.order import has_order_D
-from utilities.discrete_log import weil_pairing_pari
-from utilities.fast_sqrt import sqrt_Fp2
+from utilities.discrete_log import (
+    pari_curve,
+    pari_point,
+    weil_pairing_pari_points,
+)
+from utilities.fast_sqrt import sqrt_Fp2, is_square_Fp2
+from utilities.cache import TORSION_BASIS_CACHE, fp2_to_ints, ints_to_fp2
+
+# The Kummer line is only needed for x-only point generation
+lazy_import("montgomery_isogenies.kummer_line", "KummerLine")
 
 # =========================================== #
 #   Extract coefficent from Montgomery curve  #
@@ -89,26 +101,95 @@ def generate_point(E, x_start=0):
     )
 
 
+def elligator_x(A, u, r):
+    """
+    Elligator 2 for the Montgomery curve y^2 = x^3 + Ax^2 + x
+    with A != 0, a non-square u and r != 0.
+
+    With v = -A / (1 + ur^2), the two values x1 = v and
+    x2 = -v - A = ur^2 v satisfy f(x2) = ur^2 f(x1), so exactly
+    one of them is the x-coordinate of a point on the curve and
+    the other lies on the twist. Returns this x-coordinate, or
+    None in the degenerate case f(x1) = 0.
+    """
+    v = -A / (1 + u * r * r)
+    fv = v * (v * (v + A) + 1)
+    if fv.is_zero():
+        return None
+    if is_square_Fp2(fv):
+        return v
+    return -v - A
+
+
+def generate_kummer_point(L, x_start=0):
+    """
+    Generate x-only points on the Kummer line L of a curve E, which are
+    images of points in E(Fp2) rather than on its twist.
+
+    When A != 0, the x-coordinates come from Elligator 2 with parameter
+    r = i + x for x in Fp, so every candidate gives a point on E and
+    there is no rejection loop. For A = 0 we fall back to testing the
+    x-coordinates i + x themselves.
+    """
+    F = L.base_ring()
+    one = F.one()
+    A = L.a()
+
+    if x_start:
+        r = x_start + one
+    else:
+        r = F.gen() + one
+
+    # Fixed non-square for Elligator, depends only on the field
+    u = entangled_basis_tables(F)[0][0]
+
+    # Try 1000 times then give up, just protection
+    # for infinite loops
+    for _ in range(1000):
+        if A.is_zero():
+            x = r
+            if not is_square_Fp2(x * (x * x + 1)):
+                x = None
+        elif r.is_zero():
+            x = None
+        else:
+            x = elligator_x(A, u, r)
+
+        if x is not None:
+            yield L(x)
+        r += one
+
+    raise ValueError(
+        "Generated 1000 points, something is probably going wrong somewhere."
+    )
+
+
 def generate_point_order_D(E, D, x_start=0):
     """
     Input:  An elliptic curve E / Fp2
             An integer D dividing (p +1)
     Output: A point P of order D.
+
+    All cofactor clearing and order checking is done with x-only
+    ladders on the Kummer line, and the y-coordinate is only computed
+    for the points which are yielded.
     """
     p = E.base().characteristic()
     n = (p + 1) // D
 
-    Ps = generate_point(E, x_start=x_start)
-    for G in Ps:
-        P = n * G
+    L = KummerLine(E)
+    xGs = generate_kummer_point(L, x_start=x_start)
+    for xG in xGs:
+        xP = n * xG
 
         # Case when we randomly picked
         # a point in the n-torsion
-        if P.is_zero():
+        if xP.is_zero():
             continue
 
         # Check that P has order exactly D
-        if has_order_D(P, D):
+        if has_order_D(xP, D):
+            P = xP.curve_point()
             P._order = ZZ(D)
             yield P
 
@@ -131,10 +212,14 @@ def compute_linearly_independent_point_with_pairing(E, P, D, x_start=0):
     Output: A point Q such that E[D] = <P, Q>
             The Weil pairing e(P,Q)
     """
+    # Convert the curve and P to pari once for all pairings
+    E_pari = pari_curve(E)
+    P_pari = pari_point(P)
+
     Qs = generate_point_order_D(E, D, x_start=x_start)
     for Q in Qs:
         # Make sure the point is linearly independent
-        pair = weil_pairing_pari(P, Q, D)
+        pair = weil_pairing_pari_points(E_pari, P_pari, pari_point(Q), D)
         if has_order_D(pair, D, multiplicative=True):
             Q._order = ZZ(D)
             return Q, pair
@@ -157,6 +242,9 @@ def torsion_basis_with_pairing(E, D):
     While computing E[D] = <P, Q> we naturally compute the
     Weil pairing e(P,Q), which we also return as in some cases
     the Weil pairing is then used when solving the BiDLP
+
+    The basis is deterministic, so it is stored in TORSION_BASIS_CACHE
+    keyed by (p, A, D) and only computed once per curve and degree.
     """
     Fp2 = E.base()
     p = Fp2.characteristic()
@@ -168,9 +256,23 @@ def torsion_basis_with_pairing(E, D):
         print(f"{ZZ(p+1).factor() = }")
         raise ValueError(f"D must divide the point's order")
 
+    key = (int(p), fp2_to_ints(montgomery_coefficient(E)), int(D))
+    cached = TORSION_BASIS_CACHE.get(key)
+    if cached is not None:
+        xP, yP, xQ, yQ, ePQ = (ints_to_fp2(Fp2, c) for c in cached)
+        P, Q = E(xP, yP), E(xQ, yQ)
+        P._order = ZZ(D)
+        Q._order = ZZ(D)
+        return P, Q, ePQ
+
     P = compute_point_order_D(E, D)
     x_start = P[0] + i
     Q, ePQ = compute_linearly_independent_point_with_pairing(E, P, D, x_start=x_start)
+    ePQ = Fp2(ePQ)
+
+    TORSION_BASIS_CACHE.set(
+        key, tuple(fp2_to_ints(c) for c in (P[0], P[1], Q[0], Q[1], ePQ))
+    )
 
     return P, Q, ePQ
 
@@ -184,6 +286,116 @@ def torsion_basis(E, D):
     return P, Q
 
 
+# =============================================== #
+#   Deterministic entangled basis for E[2^n]      #
+# =============================================== #
+
+
+@functools.lru_cache(maxsize=16)
+def entangled_basis_tables(F, size=64):
+    """
+    Precompute, once per field F = GF(p^2), a table of non-squares
+    and a table of squares of the form 1 + k*i for k = 1, 2, ...
+
+    These only depend on the field, so every curve over F picks
+    its basis x-coordinates from the same tables. The entries have
+    distinct i-coordinates, so for any alpha at most one x - alpha
+    lies in GF(p), where everything is a square.
+    """
+    i = F.gen()
+    non_squares, squares = [], []
+    k = F.one()
+    while len(non_squares) < size or len(squares) < size:
+        x = 1 + k * i
+        if is_square_Fp2(x):
+            squares.append(x)
+        else:
+            non_squares.append(x)
+        k += 1
+    return tuple(non_squares[:size]), tuple(squares[:size])
+
+
+def torsion_basis_2e(E, n):
+    """
+    Deterministically compute a basis <P, Q> = E[2^n] such that
+    [2^(n-1)]Q = (0,0), following the entangled basis generation
+    used for SIKE key compression.
+
+    Write E : y^2 = x(x - alpha)(x - beta) and let T(R) = [(p+1)/2]R.
+    By 2-descent, for R not in [2]E:
+
+        T(R) = (0,0)      iff  x(R) is a square
+        T(R) = (alpha,0)  iff  x(R) - alpha is a square
+
+    So we pick x(P) a non-square and x(Q) a square with x(Q) - alpha
+    a non-square. Then T(P), T(Q) are distinct non-zero points of E[2],
+    P and Q are linearly independent and Q lies above (0,0), all by
+    construction. No pairings or order checks are needed, and the
+    cofactors are cleared with x-only ladders.
+    """
+    A = montgomery_coefficient(E)
+    F = E.base_ring()
+    p = F.characteristic()
+
+    D = ZZ(2**n)
+    if (p + 1) % D != 0:
+        raise ValueError(f"2^{n} must divide the order p + 1")
+    cofactor = (p + 1) // D
+
+    # This basis differs from torsion_basis(E, 2^n), so it is
+    # cached under its own key
+    key = (int(p), fp2_to_ints(A), int(D), "entangled")
+    cached = TORSION_BASIS_CACHE.get(key)
+    if cached is not None:
+        xP, yP, xQ, yQ = (ints_to_fp2(F, c) for c in cached)
+        P, Q = E(xP, yP), E(xQ, yQ)
+        P._order = D
+        Q._order = D
+        return P, Q
+
+    # The roots of x^2 + Ax + 1 with alpha * beta = 1
+    alpha = (-A + sqrt_Fp2(A * A - 4)) / 2
+    beta = -A - alpha
+
+    non_squares, squares = entangled_basis_tables(F)
+
+    # x(P) is a non-square, so we only need x^2 + Ax + 1 to be
+    # a non-square for y^2 = x(x^2 + Ax + 1) to be a square
+    xP = next(
+        (x for x in non_squares if not is_square_Fp2(x * x + A * x + 1)), None
+    )
+
+    # x(Q) is a square, we need both x - alpha and x - beta to be
+    # non-squares
+    xQ = next(
+        (
+            x
+            for x in squares
+            if not is_square_Fp2(x - alpha) and not is_square_Fp2(x - beta)
+        ),
+        None,
+    )
+
+    if xP is None or xQ is None:
+        raise ValueError(
+            "Exhausted the entangled basis tables, something is probably going wrong somewhere."
+        )
+
+    # Clear the cofactor with x-only arithmetic, and only lift
+    # the final points to the curve
+    L = KummerLine(E)
+    xP, xQ = L.multiply_many([L(xP), L(xQ)], cofactor, normalise=True)
+    P = xP.curve_point()
+    Q = xQ.curve_point()
+
+    P._order = D
+    Q._order = D
+
+    TORSION_BASIS_CACHE.set(key, tuple(fp2_to_ints(c) for c in (P[0], P[1], Q[0], Q[1])))
+
+    return P, Q
+
+
 # =============================================== #
 #  Ensure Basis <P,Q> of E[2^k] has (0,0) under Q #
 # =============================================== #
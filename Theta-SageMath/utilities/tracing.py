@@ -0,0 +1,182 @@
+"""
+Tracers for the steps of the (2,2)-chains computed by `EllipticProductIsogeny`
+and `EllipticProductIsogenySqrt`.
+
+A tracer is any callable
+
+    tracer(index, kind, elapsed, depth)
+
+which is called after each step of the chain with:
+
+- index: the index k of the (2,2)-isogeny in the chain the step belongs to,
+  with index n for the final splitting
+- kind: one of `STEP_KINDS`, where "prefix" is the push of the kernel through
+  a prefix of the chain found in a `ChainPrefixCache`, traced with the index
+  of the last isogeny of the prefix, and "checkpoint" is the saving of a
+  checkpoint, or the restoring of the checkpoint the chain resumes from
+- elapsed: the wall-clock time of the step in seconds
+- depth: the number of kernel elements stored by the strategy when the step
+  was performed, i.e. the depth of the walk in the strategy tree
+
+Two tracers are provided: `StatsTracer` aggregates the time spent on each kind
+of step and is what `EllipticProductIsogeny.stats()` reports, and
+`ChromeTracer` records every step as an event which can be loaded in
+chrome://tracing or https://ui.perfetto.dev.
+"""
+
+# Python imports
+import json
+import time
+from collections import defaultdict
+
+# The steps of the chain, in the order they first happen
+STEP_KINDS = (
+    "checkpoint",
+    "prefix",
+    "doubling",
+    "gluing",
+    "isogeny",
+    "push",
+    "splitting",
+)
+
+# ============== #
+#  Timing steps  #
+# ============== #
+
+
+class StepTimer:
+    """
+    Context manager timing one step of a chain for the tracer. Does nothing
+    when the tracer is None, so untraced chains only pay for the `with`.
+    """
+
+    __slots__ = ("tracer", "index", "kind", "depth", "_t0")
+
+    def __init__(self, tracer, index, kind, depth):
+        self.tracer = tracer
+        self.index = index
+        self.kind = kind
+        self.depth = depth
+
+    def __enter__(self):
+        if self.tracer is not None:
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.tracer is not None and exc[0] is None:
+            elapsed = time.perf_counter() - self._t0
+            self.tracer(self.index, self.kind, elapsed, self.depth)
+        return False
+
+
+# ========================================== #
+#  Tracers for the steps of the (2,2)-chain  #
+# ========================================== #
+
+
+class StatsTracer:
+    """
+    Aggregates the number of steps and the time spent in each kind of step,
+    both in total and per (2,2)-isogeny of the chain
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._by_kind = defaultdict(list)
+        self._by_index = defaultdict(float)
+        self.max_depth = 0
+
+    def __call__(self, index, kind, elapsed, depth):
+        self._by_kind[kind].append(elapsed)
+        self._by_index[index] += elapsed
+        self.max_depth = max(self.max_depth, depth)
+
+    def stats(self):
+        """
+        A dictionary with, for each kind of step, the number of calls and
+        their total, mean and maximum time in seconds, along with the time
+        spent on each (2,2)-isogeny of the chain and the maximum depth
+        """
+        kinds = {}
+        for kind in sorted(self._by_kind, key=_kind_order):
+            times = self._by_kind[kind]
+            kinds[kind] = {
+                "calls": len(times),
+                "total": sum(times),
+                "mean": sum(times) / len(times),
+                "max": max(times),
+            }
+        return {
+            "total": sum(k["total"] for k in kinds.values()),
+            "kinds": kinds,
+            "steps": [self._by_index[k] for k in sorted(self._by_index)],
+            "max_depth": self.max_depth,
+        }
+
+
+class ChromeTracer:
+    """
+    Records each step as a complete event in the Chrome trace format. The
+    events of several chains can be collected with a single tracer, in which
+    case `name` can be changed between chains to tell them apart.
+    """
+
+    def __init__(self, name="chain"):
+        self.name = name
+        self.events = []
+        self._threads = {}
+        self._t0 = time.perf_counter()
+
+    def _tid(self):
+        # Each name is shown as its own thread in the trace viewer
+        if self.name not in self._threads:
+            tid = len(self._threads)
+            self._threads[self.name] = tid
+            self.events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 0,
+                    "tid": tid,
+                    "args": {"name": self.name},
+                }
+            )
+        return self._threads[self.name]
+
+    def __call__(self, index, kind, elapsed, depth):
+        end = time.perf_counter() - self._t0
+        self.events.append(
+            {
+                "name": kind,
+                "cat": self.name,
+                "ph": "X",
+                "ts": (end - elapsed) * 1e6,
+                "dur": elapsed * 1e6,
+                "pid": 0,
+                "tid": self._tid(),
+                "args": {"index": index, "depth": depth},
+            }
+        )
+
+    def to_json(self):
+        """
+        The recorded events as a Chrome trace
+        """
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def write(self, filename):
+        """
+        Write the Chrome trace to filename
+        """
+        with open(filename, "w") as f:
+            json.dump(self.to_json(), f)
+
+
+def _kind_order(kind):
+    if kind in STEP_KINDS:
+        return STEP_KINDS.index(kind)
+    return len(STEP_KINDS)
@@ -1,4 +1,8 @@
-from sage.all import proof, cached_method, GF
+from sage.structure.proof import all as proof
+from sage.misc.cachefunc import cached_method
+from sage.misc.lazy_import import lazy_import
+
+lazy_import("sage.rings.finite_rings.finite_field_constructor", "GF")
 
 # ========================== #
 #     Speed up SageMath!     #